@@ -1,34 +1,193 @@
 """AI adapters package."""
 
-from typing import Optional, Union
+from typing import Iterator, Optional
 
 import typer
 from typing_extensions import Annotated
 
-from app.core.config import get_config
+from app.core.config import Config, get_cache_dir, get_config
 
+from .base import AIInterface, ChatSession, TimedStream
+from .cache import CachedAI, ResponseCache, open_response_cache
+from .fake import FakeAI
 from .gemini import GeminiAI
-from .openai import OpenAIAI
+from .hedge import HedgedDispatcher, LatencyTracker, run_detached
+from .openai import (
+    DEFAULT_OPENAI_MODEL,
+    DEFAULT_OPENROUTER_MODEL,
+    OPENAI_BASE_URL,
+    OPENROUTER_BASE_URL,
+    OpenAIAI,
+    OpenAIError,
+)
 
 
-def get_ai_response(prompt: str) -> str:
-    """Get AI response for the given prompt."""
-    config = get_config()
-
-    ai: Union[GeminiAI, OpenAIAI]
+def get_ai(
+    config: Optional[Config] = None, provider: Optional[str] = None
+) -> AIInterface:
+    """Create the AI model of provider, by default config.ai_provider."""
+    if config is None:
+        config = get_config()
+    if provider is None:
+        provider = config.ai_provider
 
-    if config.ai_provider == "gemini":
+    if provider == "gemini":
         if not config.gemini_api_key:
             raise ValueError("Gemini API key not configured")
-        ai = GeminiAI(config.gemini_api_key)
-    elif config.ai_provider == "openai":
-        if not config.openai_api_key:
-            raise ValueError("OpenAI API key not configured")
-        ai = OpenAIAI(config.openai_api_key)
+        return GeminiAI(config.gemini_api_key)
+    elif provider in ("openai", "openrouter"):
+        if provider == "openai":
+            api_key, base_url, model, options = (
+                config.openai_api_key,
+                OPENAI_BASE_URL,
+                DEFAULT_OPENAI_MODEL,
+                config.openai,
+            )
+        else:
+            api_key, base_url, model, options = (
+                config.openrouter_api_key,
+                OPENROUTER_BASE_URL,
+                DEFAULT_OPENROUTER_MODEL,
+                config.openrouter,
+            )
+        # Self-hosted servers may not need a key
+        if not api_key and not options.base_url:
+            raise ValueError(f"{provider} API key not configured")
+        return OpenAIAI(
+            api_key,
+            model=options.model or model,
+            base_url=options.base_url or base_url,
+            connect_timeout=options.connect_timeout_s,
+            read_timeout=options.read_timeout_s,
+            max_retries=options.max_retries,
+        )
+    elif provider == "fake":
+        return FakeAI()
     else:
-        raise ValueError(f"Unsupported AI provider: {config.ai_provider}")
+        raise ValueError(f"Unsupported AI provider: {provider}")
+
+
+def get_ai_response(prompt: str, use_cache: bool = True) -> str:
+    """Get AI response for the given prompt, reusing cached responses."""
+    config = get_config()
+    if config.hedge.enabled:
+        return run_detached(aget_ai_response(prompt, use_cache))
+
+    cache = open_response_cache() if use_cache else None
+    try:
+        return _cached(get_ai(config), config.ai_provider, cache).generate_text(prompt)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+async def aget_ai_response(prompt: str, use_cache: bool = True) -> str:
+    """Get AI response for the given prompt, hedged if configured."""
+    config = get_config()
+    cache = open_response_cache() if use_cache else None
+    try:
+        if not config.hedge.enabled:
+            ai = _cached(get_ai(config), config.ai_provider, cache)
+            return await ai.agenerate_text(prompt)
+
+        hedge = config.hedge
+        providers = hedge.providers or [config.ai_provider]
+        # Latencies are remembered across runs, per first provider
+        history = get_cache_dir() / f"ai-latency-{providers[0]}.json"
+        tracker = LatencyTracker.load(history)
+        dispatcher = HedgedDispatcher(
+            [
+                _cached(get_ai(config, provider), provider, cache)
+                for provider in providers
+            ],
+            percentile=hedge.percentile,
+            delay=hedge.delay_s,
+            max_requests=hedge.max_requests,
+            tracker=tracker,
+        )
+        try:
+            return await dispatcher.generate_text(prompt)
+        finally:
+            tracker.save(history)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def stream_ai_response(prompt: str, use_cache: bool = True) -> TimedStream:
+    """Stream the AI response for the given prompt, recording its latency."""
+    config = get_config()
+    return TimedStream(_stream(config, prompt, use_cache), config.ai_provider)
 
-    return ai.generate_text(prompt)
+
+def _stream(config: Config, prompt: str, use_cache: bool) -> Iterator[str]:
+    cache = open_response_cache() if use_cache else None
+    try:
+        yield from _cached(get_ai(config), config.ai_provider, cache).stream_text(
+            prompt
+        )
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def _cached(
+    ai: AIInterface, provider: str, cache: Optional[ResponseCache]
+) -> AIInterface:
+    """Answer repeated prompts from cache, when there is one."""
+    return ai if cache is None else CachedAI(ai, provider, cache)
+
+
+SYSTEM_PROMPT = "You are a helpful assistant. Please provide a short and concise response for a developer. "
+# REPL commands
+EXIT_COMMANDS = ("/exit", "/quit")
+RESET_COMMAND = "/reset"
+
+
+def run_repl(ai: AIInterface, provider: str, question: Optional[str] = None) -> None:
+    """
+    Chat with one model until end of input, keeping the conversation.
+
+    The model is created once, so each turn only pays for the model's own
+    time; follow-up questions are answered in the context of earlier turns.
+
+    Args:
+        ai: The model to chat with
+        provider: Provider name, for the latency logs
+        question: The first message, if already given
+    """
+    session = ai.start_chat()
+    print(
+        f"Chatting with {provider}. {RESET_COMMAND} starts over, "
+        f"{EXIT_COMMANDS[0]} or Ctrl-D quits."
+    )
+    while True:
+        if question is None:
+            try:
+                message = input(">>> ").strip()
+            except (EOFError, KeyboardInterrupt):
+                print()
+                return
+        else:
+            message, question = question.strip(), None
+
+        if not message:
+            continue
+        if message in EXIT_COMMANDS:
+            return
+        if message == RESET_COMMAND:
+            session = ai.start_chat()
+            print("Started a new conversation.")
+            continue
+
+        # The instructions only need to be sent once per conversation
+        prompt = message if session.turns else SYSTEM_PROMPT + message
+        try:
+            for chunk in TimedStream(session.send(prompt), provider):
+                print(chunk, end="", flush=True)
+        except KeyboardInterrupt:
+            print("\n(interrupted)", end="")
+        print()
 
 
 def add_ai(app: typer.Typer, name: str) -> None:
@@ -37,14 +196,54 @@ def add_ai(app: typer.Typer, name: str) -> None:
         question: Annotated[
             Optional[str], typer.Argument(help="The question to ask the AI model")
         ] = None,
+        use_cache: bool = typer.Option(
+            True,
+            "--cache/--no-cache",
+            help="Answer repeated questions from the local response cache",
+        ),
+        repl: bool = typer.Option(
+            False,
+            "--repl",
+            help="Keep chatting with follow-up questions in one session",
+        ),
     ) -> None:
+        if repl:
+            config = get_config()
+            run_repl(get_ai(config), config.ai_provider, question)
+            return None
+
         if question is None:
             question = typer.prompt("What is your question?")
 
         if question:
-            system_prompt = "You are a helpful assistant. Please provide a short and concise response for a developer. "
-            print(get_ai_response(system_prompt + question))
+            if get_config().hedge.enabled:
+                # Hedged requests race whole responses, so there is no stream
+                print(get_ai_response(SYSTEM_PROMPT + question, use_cache))
+                return None
+            # Print tokens as they arrive
+            for chunk in stream_ai_response(SYSTEM_PROMPT + question, use_cache):
+                print(chunk, end="", flush=True)
+            print()
         return None
 
 
-__all__ = ["GeminiAI", "OpenAIAI", "get_ai_response", "add_ai"]
+__all__ = [
+    "AIInterface",
+    "CachedAI",
+    "ChatSession",
+    "FakeAI",
+    "GeminiAI",
+    "HedgedDispatcher",
+    "LatencyTracker",
+    "OpenAIAI",
+    "OpenAIError",
+    "ResponseCache",
+    "TimedStream",
+    "get_ai",
+    "get_ai_response",
+    "aget_ai_response",
+    "stream_ai_response",
+    "run_repl",
+    "run_detached",
+    "add_ai",
+]
@@ -1,5 +1,11 @@
+import asyncio
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.frameworks.logger import setup_logger as get_logger
+
+logger = get_logger(__name__)
 
 
 class AIInterface(ABC):
@@ -20,3 +26,126 @@ class AIInterface(ABC):
             str: The generated text.
         """
         pass
+
+    @property
+    def model_name(self) -> str:
+        """Name of the model answering, for cache keys and logs."""
+        return str(getattr(self, "MODEL_NAME", type(self).__name__))
+
+    def stream_text(self, prompt: str, **kwargs: Dict[str, Any]) -> Iterator[str]:
+        """
+        Generates text based on the given prompt, chunk by chunk as it arrives.
+
+        Providers that can't stream yield the whole response as one chunk.
+
+        Args:
+            prompt (str): The input prompt.
+            **kwargs: Additional keyword arguments for the model.
+
+        Yields:
+            str: Consecutive pieces of the generated text.
+        """
+        yield self.generate_text(prompt, **kwargs)
+
+    async def agenerate_text(self, prompt: str, **kwargs: Dict[str, Any]) -> str:
+        """
+        Generates text based on the given prompt without blocking the event loop.
+
+        The default runs generate_text() in a worker thread: cancelling the
+        task stops waiting for it, but a request already sent is left to finish
+        in the background and its result is dropped.
+
+        Args:
+            prompt (str): The input prompt.
+            **kwargs: Additional keyword arguments for the model.
+
+        Returns:
+            str: The generated text.
+        """
+        return await asyncio.to_thread(self.generate_text, prompt, **kwargs)
+
+    def start_chat(self) -> "ChatSession":
+        """
+        Starts a conversation whose earlier turns are context for later ones.
+
+        Returns:
+            ChatSession: The new, empty conversation.
+        """
+        return ChatSession(self)
+
+
+class ChatSession:
+    """
+    A conversation with a model, kept for follow-up questions.
+
+    This default sends the transcript of the earlier turns with every message,
+    for providers without a chat API of their own.
+    """
+
+    def __init__(self, ai: AIInterface) -> None:
+        self.ai = ai
+        # (message, response) of each completed turn
+        self.turns: List[Tuple[str, str]] = []
+
+    def send(self, message: str, **kwargs: Dict[str, Any]) -> Iterator[str]:
+        """
+        Sends a message and streams the response.
+
+        The turn is only added to the conversation once the response has been
+        read completely.
+
+        Args:
+            message (str): The message.
+            **kwargs: Additional keyword arguments for the model.
+
+        Yields:
+            str: Consecutive pieces of the response.
+        """
+        chunks = []
+        for chunk in self._stream(message, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+        self.turns.append((message, "".join(chunks)))
+
+    def _stream(self, message: str, **kwargs: Dict[str, Any]) -> Iterator[str]:
+        transcript = "".join(
+            f"User: {sent}\n\nAssistant: {received}\n\n"
+            for sent, received in self.turns
+        )
+        prompt = f"{transcript}User: {message}" if transcript else message
+        return self.ai.stream_text(prompt, **kwargs)
+
+
+class TimedStream:
+    """
+    Wraps a stream of text chunks and records how long it took.
+
+    Time-to-first-token is what users perceive as latency; both it and the
+    total time are logged once the stream is exhausted.
+    """
+
+    def __init__(self, chunks: Iterable[str], name: str = "ai") -> None:
+        self._chunks = chunks
+        self.name = name
+        # Seconds until the first non-empty chunk, and until the last one
+        self.first_token_s: Optional[float] = None
+        self.total_s: Optional[float] = None
+        self.chars = 0
+
+    def __iter__(self) -> Iterator[str]:
+        start = time.perf_counter()
+        for chunk in self._chunks:
+            if chunk and self.first_token_s is None:
+                self.first_token_s = time.perf_counter() - start
+            self.chars += len(chunk)
+            yield chunk
+        self.total_s = time.perf_counter() - start
+        logger.debug(
+            "ai.stream.finished",
+            provider=self.name,
+            ttft_s=(
+                round(self.first_token_s, 3) if self.first_token_s is not None else None
+            ),
+            total_s=round(self.total_s, 3),
+            chars=self.chars,
+        )
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import time
+import unicodedata
+from typing import Any, Dict, Iterator, Optional
+
+from app.core.config import get_cache_dir, get_config
+from app.frameworks.logger import setup_logger as get_logger
+from app.tools.disk_cache import DiskCache
+
+from .base import AIInterface
+
+logger = get_logger(__name__)
+
+# Bump when the key derivation or the entry layout changes
+CACHE_KEY_PREFIX = "ai:v1:"
+CACHE_FILENAME = "ai-responses.sqlite3"
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Canonical form of a prompt for cache keys.
+
+    Line endings, trailing whitespace and Unicode composition don't change
+    what is asked, so prompts differing only in those share an entry.
+    """
+    prompt = unicodedata.normalize("NFC", prompt)
+    lines = prompt.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def response_cache_key(
+    provider: str, model: str, prompt: str, params: Dict[str, Any]
+) -> str:
+    """Cache key for a response, from everything that determines it."""
+    digest = hashlib.sha256()
+    digest.update(normalize_prompt(prompt).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+    return f"{CACHE_KEY_PREFIX}{provider}:{model}:{digest.hexdigest()}"
+
+
+class ResponseCache:
+    """
+    AI responses stored in a DiskCache, expiring after a time to live.
+
+    Entries are the creation time, a newline and the UTF-8 response; expired
+    entries are deleted when they are looked up, and the DiskCache evicts the
+    least recently used ones when it's over its size budget. Hits and misses
+    are counted for the lifetime of the object and logged as ai.cache.lookup.
+    """
+
+    def __init__(self, cache: DiskCache, ttl: float) -> None:
+        """
+        Args:
+            cache: Store for the entries
+            ttl: Seconds a response stays valid
+        """
+        self.cache = cache
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """The response stored under key, unless missing or expired."""
+        value = self.cache.get(key)
+        response = None
+        if value is not None:
+            created, _, data = value.partition(b"\n")
+            if time.time() - float(created) <= self.ttl:
+                response = data.decode("utf-8")
+            else:
+                self.expired += 1
+                self.cache.delete(key)
+
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        logger.debug("ai.cache.lookup", hit=response is not None, key=key[-12:])
+        return response
+
+    def set(self, key: str, response: str) -> None:
+        """Store a response under key; empty responses are not worth keeping."""
+        if response:
+            self.cache.set(key, b"%.3f\n" % time.time() + response.encode("utf-8"))
+
+    def close(self) -> None:
+        """Close the store and log the hit/miss counts."""
+        logger.debug(
+            "ai.cache.closed",
+            hits=self.hits,
+            misses=self.misses,
+            expired=self.expired,
+        )
+        self.cache.close()
+
+
+def open_response_cache() -> Optional[ResponseCache]:
+    """Open the AI response cache configured in the global config (or None)."""
+    config = get_config().cache
+    try:
+        return ResponseCache(
+            DiskCache(get_cache_dir() / CACHE_FILENAME, max_bytes=config.ai_max_bytes),
+            ttl=config.ai_ttl_seconds,
+        )
+    except Exception as e:
+        logger.warning(f"AI response cache unavailable: {e}")
+        return None
+
+
+class CachedAI(AIInterface):
+    """
+    Answers repeated prompts from a ResponseCache instead of the wrapped model.
+
+    Streams are stored only once they complete, and replayed as one chunk.
+    """
+
+    def __init__(self, ai: AIInterface, provider: str, cache: ResponseCache):
+        """
+        Args:
+            ai: The model asked on a miss
+            provider: Provider name, part of the cache key
+            cache: Where responses are stored
+        """
+        self.ai = ai
+        self.provider = provider
+        self.cache = cache
+
+    def key(self, prompt: str, params: Dict[str, Any]) -> str:
+        """Cache key of the response to prompt with generation params."""
+        return response_cache_key(self.provider, self.ai.model_name, prompt, params)
+
+    def generate_text(self, prompt: str, **kwargs: Dict[str, Any]) -> str:
+        """
+        Generates text, or returns the cached response to the same prompt.
+
+        Args:
+            prompt (str): The input prompt.
+            **kwargs: Additional keyword arguments for the model.
+
+        Returns:
+            str: The generated text.
+        """
+        key = self.key(prompt, kwargs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        response = self.ai.generate_text(prompt, **kwargs)
+        self.cache.set(key, response)
+        return response
+
+    def stream_text(self, prompt: str, **kwargs: Dict[str, Any]) -> Iterator[str]:
+        """
+        Streams text, or yields the cached response to the same prompt.
+
+        Args:
+            prompt (str): The input prompt.
+            **kwargs: Additional keyword arguments for the model.
+
+        Yields:
+            str: Consecutive pieces of the generated text.
+        """
+        key = self.key(prompt, kwargs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        chunks = []
+        for chunk in self.ai.stream_text(prompt, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+        self.cache.set(key, "".join(chunks))
+
+    async def agenerate_text(self, prompt: str, **kwargs: Dict[str, Any]) -> str:
+        """
+        Generates text asynchronously, or returns the cached response.
+
+        Args:
+            prompt (str): The input prompt.
+            **kwargs: Additional keyword arguments for the model.
+
+        Returns:
+            str: The generated text.
+        """
+        key = self.key(prompt, kwargs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        response = await self.ai.agenerate_text(prompt, **kwargs)
+        self.cache.set(key, response)
+        return response
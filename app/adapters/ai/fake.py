@@ -0,0 +1,106 @@
+import asyncio
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from .base import AIInterface
+
+
+class FakeAI(AIInterface):
+    """
+    Local stand-in provider that replays a canned response, for tests.
+
+    The response is streamed in fixed-size chunks, optionally with delays, so
+    streaming and latency handling can be exercised without a network.
+    """
+
+    MODEL_NAME = "fake"
+
+    def __init__(
+        self,
+        response: str = "This is a fake response.",
+        chunk_size: int = 8,
+        first_token_delay: float = 0.0,
+        chunk_delay: float = 0.0,
+        error: Optional[Exception] = None,
+    ):
+        """
+        Initializes the fake model.
+
+        Args:
+            response (str): The text every prompt is answered with.
+            chunk_size (int): Characters per streamed chunk.
+            first_token_delay (float): Seconds before the first chunk.
+            chunk_delay (float): Seconds between chunks.
+            error (Optional[Exception]): Raised instead of answering, after
+                first_token_delay.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive.")
+        self.response = response
+        self.chunk_size = chunk_size
+        self.first_token_delay = first_token_delay
+        self.chunk_delay = chunk_delay
+        self.error = error
+        # Prompts received, oldest first
+        self.prompts: List[str] = []
+        # Async requests cancelled before they answered
+        self.cancelled = 0
+
+    def generate_text(self, prompt: str, **kwargs: Dict[str, Any]) -> str:
+        """
+        Returns the canned response.
+
+        Args:
+            prompt (str): The input prompt.
+            **kwargs: Ignored.
+
+        Returns:
+            str: The canned response.
+        """
+        return "".join(self.stream_text(prompt, **kwargs))
+
+    def stream_text(self, prompt: str, **kwargs: Dict[str, Any]) -> Iterator[str]:
+        """
+        Streams the canned response in chunks.
+
+        Args:
+            prompt (str): The input prompt.
+            **kwargs: Ignored.
+
+        Yields:
+            str: Chunks of at most chunk_size characters.
+        """
+        self.prompts.append(prompt)
+        time.sleep(self.first_token_delay)
+        if self.error is not None:
+            raise self.error
+        for start in range(0, len(self.response), self.chunk_size):
+            if start:
+                time.sleep(self.chunk_delay)
+            yield self.response[start : start + self.chunk_size]
+
+    async def agenerate_text(self, prompt: str, **kwargs: Dict[str, Any]) -> str:
+        """
+        Returns the canned response after sleeping on the event loop.
+
+        Unlike the default, a cancelled request stops right away.
+
+        Args:
+            prompt (str): The input prompt.
+            **kwargs: Ignored.
+
+        Returns:
+            str: The canned response.
+        """
+        self.prompts.append(prompt)
+        try:
+            chunks = -(-len(self.response) // self.chunk_size)
+            await asyncio.sleep(
+                self.first_token_delay + max(chunks - 1, 0) * self.chunk_delay
+            )
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.response
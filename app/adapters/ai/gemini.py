@@ -1,9 +1,9 @@
 import os
-from typing import Any, Dict
+from typing import Any, Dict, Iterator
 
 import google.generativeai as genai  # type: ignore
 
-from .base import AIInterface
+from .base import AIInterface, ChatSession
 
 
 class GeminiAI(AIInterface):
@@ -11,6 +11,8 @@ class GeminiAI(AIInterface):
     Implementation of AIInterface using Google Gemini.
     """
 
+    MODEL_NAME = "gemini-2.5-flash"
+
     def __init__(self, api_key: str):
         """
         Initializes the Gemini AI model.
@@ -19,7 +21,7 @@ class GeminiAI(AIInterface):
             raise ValueError("Gemini API key not set.")
 
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel("gemini-2.5-flash")
+        self.model = genai.GenerativeModel(self.MODEL_NAME)
 
     def generate_text(self, prompt: str, **kwargs: Dict[str, Any]) -> str:
         """
@@ -35,3 +37,63 @@ class GeminiAI(AIInterface):
         chat = self.model.start_chat()
         response = chat.send_message(prompt, **kwargs)
         return str(response.text)
+
+    def stream_text(self, prompt: str, **kwargs: Dict[str, Any]) -> Iterator[str]:
+        """
+        Generates text using the Gemini model, chunk by chunk as it arrives.
+
+        Args:
+            prompt (str): The input prompt.
+            **kwargs: Additional keyword arguments for the model.
+
+        Yields:
+            str: Consecutive pieces of the generated text.
+        """
+        chat = self.model.start_chat()
+        response = chat.send_message(
+            prompt, stream=True, **kwargs  # type: ignore[arg-type]
+        )
+        for chunk in response:
+            # The last chunk may carry only the finish reason, and a chunk may
+            # have no candidate at all (e.g. only usage metadata)
+            if chunk.candidates and chunk.parts:
+                yield str(chunk.text)
+
+    def start_chat(self) -> ChatSession:
+        """
+        Starts a Gemini chat on the already configured model.
+
+        Returns:
+            ChatSession: The new, empty conversation.
+        """
+        return GeminiChatSession(self)
+
+
+class GeminiChatSession(ChatSession):
+    """
+    A conversation kept in a Gemini chat session.
+
+    The model, its configuration and its transport are created once by
+    GeminiAI and reused for every turn.
+    """
+
+    def __init__(self, ai: GeminiAI) -> None:
+        super().__init__(ai)
+        self._chat = ai.model.start_chat()
+
+    def _stream(self, message: str, **kwargs: Dict[str, Any]) -> Iterator[str]:
+        history = self._chat.history[:]
+        response = self._chat.send_message(
+            message, stream=True, **kwargs  # type: ignore[arg-type]
+        )
+        try:
+            for chunk in response:
+                # The last chunk may carry only the finish reason
+                if chunk.candidates and chunk.parts:
+                    yield str(chunk.text)
+        except BaseException:
+            # An interrupted response must not become part of the history.
+            # Restored rather than rewound: rewind() fails when the stream
+            # broke before any candidate arrived.
+            self._chat.history = history
+            raise
@@ -0,0 +1,275 @@
+import asyncio
+import json
+import math
+import os
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from app.frameworks.logger import setup_logger as get_logger
+
+from .base import AIInterface
+
+logger = get_logger(__name__)
+
+# Hedge once a request is slower than this share of recent requests
+DEFAULT_HEDGE_PERCENTILE = 0.95
+# Hedge delay in seconds until enough latencies have been recorded
+DEFAULT_HEDGE_DELAY = 2.0
+DEFAULT_MAX_REQUESTS = 2
+# Latencies needed before the percentile is trusted over the default delay
+MIN_LATENCY_SAMPLES = 10
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """
+    A sliding window of recent response latencies.
+
+    Each `h` invocation is a new process, so the window can be loaded from and
+    saved to a small JSON file to keep the percentile meaningful across runs.
+    """
+
+    def __init__(self, samples: Iterable[float] = (), window: int = 200) -> None:
+        self._samples: Deque[float] = deque(samples, maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        """Add the latency of a successful request."""
+        self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        The nearest-rank percentile of the recorded latencies.
+
+        Args:
+            p: Fraction between 0 and 1, e.g. 0.95
+
+        Returns:
+            Latency in seconds, or None with fewer than MIN_LATENCY_SAMPLES
+        """
+        if len(self._samples) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(math.ceil(p * len(ordered)), 1)
+        return ordered[rank - 1]
+
+    @classmethod
+    def load(cls, path: Path, window: int = 200) -> "LatencyTracker":
+        """Load latencies saved by save(); a missing or broken file is empty."""
+        try:
+            samples = json.loads(path.read_text(encoding="utf-8"))
+            return cls((float(sample) for sample in samples), window)
+        except (OSError, ValueError, TypeError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning(f"Ignoring latency history {path}: {e}")
+            return cls(window=window)
+
+    def save(self, path: Path) -> None:
+        """Write the latencies atomically, so parallel runs never see half a file."""
+        temp = None
+        try:
+            fd, temp = tempfile.mkstemp(
+                dir=path.parent, prefix=path.name, suffix=".tmp"
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump([round(sample, 4) for sample in self._samples], f)
+            os.replace(temp, path)
+        except OSError as e:
+            logger.warning(f"Can't save latency history {path}: {e}")
+            if temp is not None and os.path.exists(temp):
+                os.unlink(temp)
+
+
+class HedgedDispatcher:
+    """
+    Sends a prompt to several providers, staggered, and keeps the first answer.
+
+    The first provider is asked right away. If it hasn't answered after the
+    hedge delay (a percentile of recent latencies), the next provider is asked
+    too, and so on up to max_requests; providers are reused in order when there
+    are fewer of them, so a single provider gets a duplicate request. A failed
+    request is replaced immediately instead of waiting for the delay. The first
+    successful answer wins and the other requests are cancelled.
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[AIInterface],
+        percentile: float = DEFAULT_HEDGE_PERCENTILE,
+        delay: float = DEFAULT_HEDGE_DELAY,
+        max_requests: int = DEFAULT_MAX_REQUESTS,
+        tracker: Optional[LatencyTracker] = None,
+    ) -> None:
+        """
+        Args:
+            providers: Providers to ask, in order
+            percentile: Latency percentile after which another request is sent
+            delay: Hedge delay in seconds while the tracker has too few samples
+            max_requests: Most requests sent for one prompt, the first included
+            tracker: Latencies of earlier requests; successful requests are
+                recorded into it, and so is the first request when it loses
+                the race
+        """
+        if not providers:
+            raise ValueError("At least one provider is needed")
+        if max_requests < 1:
+            raise ValueError("max_requests must be positive")
+        self.providers = list(providers)
+        self.percentile = percentile
+        self.delay = delay
+        self.max_requests = max_requests
+        self.tracker = tracker if tracker is not None else LatencyTracker()
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for a request before sending the next one."""
+        observed = self.tracker.percentile(self.percentile)
+        return self.delay if observed is None else observed
+
+    async def generate_text(self, prompt: str, **kwargs: Dict[str, Any]) -> str:
+        """
+        Generate text for the prompt with hedged requests.
+
+        Args:
+            prompt: The input prompt
+            **kwargs: Additional keyword arguments for the models
+
+        Returns:
+            The first successful response
+
+        Raises:
+            Exception: The last error, if every request failed
+        """
+        loop = asyncio.get_running_loop()
+        delay = self.hedge_delay()
+        # Request number and start time of each request in flight
+        pending: Dict["asyncio.Task[str]", Tuple[int, float]] = {}
+        errors: List[BaseException] = []
+        sent = 0
+        answered = False
+
+        def send() -> None:
+            nonlocal sent
+            provider = self.providers[sent % len(self.providers)]
+            task = asyncio.ensure_future(provider.agenerate_text(prompt, **kwargs))
+            pending[task] = (sent, loop.time())
+            sent += 1
+
+        send()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=delay if sent < self.max_requests else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    logger.info("ai.hedge.sent", request=sent, after_s=round(delay, 3))
+                    send()
+                    continue
+
+                for task in done:
+                    request, started = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        latency = loop.time() - started
+                        self.tracker.record(latency)
+                        logger.info(
+                            "ai.hedge.finished",
+                            request=request,
+                            sent=sent,
+                            latency_s=round(latency, 3),
+                        )
+                        answered = True
+                        return task.result()
+                    logger.warning("ai.hedge.failed", request=request, error=str(error))
+                    errors.append(error)
+                    if sent < self.max_requests:
+                        send()
+            raise errors[-1]
+        finally:
+            for task, (request, started) in pending.items():
+                if answered and request == 0:
+                    # Only recording winners would drag the percentile down to
+                    # the hedges; the first request took at least this long
+                    self.tracker.record(loop.time() - started)
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+
+class _DetachedExecutor(ThreadPoolExecutor):
+    """
+    Runs each call on its own daemon thread that nobody waits for.
+
+    Blocking provider calls can't be interrupted, so a hedged request that lost
+    the race keeps its thread until the server answers. ThreadPoolExecutor
+    threads are joined on shutdown and at interpreter exit, which would hold
+    the command until the slowest provider is done.
+    """
+
+    def submit(  # type: ignore[override]
+        self, fn: Callable[..., T], /, *args: Any, **kwargs: Any
+    ) -> "Future[T]":
+        future: "Future[T]" = Future()
+
+        def run() -> None:
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+        threading.Thread(target=run, daemon=True).start()
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        pass
+
+
+def run_detached(main: Awaitable[T]) -> T:
+    """
+    Run a coroutine to completion like asyncio.run(), without waiting for
+    threads it abandoned.
+
+    asyncio.run() shuts down the default executor and waits for its threads,
+    so a cancelled asyncio.to_thread() call, such as the losing request of a
+    hedged race, would still delay the result. Here executor calls run on
+    daemon threads, which are left behind once the coroutine is done.
+
+    Args:
+        main: The coroutine to run
+
+    Returns:
+        Its result
+    """
+    loop = asyncio.new_event_loop()
+    loop.set_default_executor(_DetachedExecutor())
+    try:
+        return loop.run_until_complete(main)
+    finally:
+        try:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            loop.close()
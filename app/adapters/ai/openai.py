@@ -1,29 +1,280 @@
-from typing import Any, Dict
+import http.client
+import json
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
 
-from .base import AIInterface
+from app.frameworks.logger import setup_logger as get_logger
+from app.tools.http_pool import HTTPPool, PooledResponse
+
+from .base import AIInterface, ChatSession
+
+logger = get_logger(__name__)
+
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+DEFAULT_OPENAI_MODEL = "gpt-4o-mini"
+DEFAULT_OPENROUTER_MODEL = "openai/gpt-4o-mini"
+
+# Responses worth retrying: rate limited, or the server had a bad moment
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+DEFAULT_MAX_RETRIES = 3
+# Backoff before retry n is random between 0 and min(BASE * 2**n, MAX) seconds
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 20.0
+# Longest Retry-After honoured, so a misbehaving server can't stall us forever
+MAX_RETRY_AFTER = 120.0
+
+
+class OpenAIError(RuntimeError):
+    """A chat completions request failed."""
+
+    def __init__(self, message: str, status: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.status = status
 
 
 class OpenAIAI(AIInterface):
     """
-    Placeholder for OpenAI implementation.
+    Implementation of AIInterface for OpenAI-compatible chat completions APIs.
+
+    Works with OpenAI, OpenRouter and self-hosted servers speaking the same
+    protocol. Requests go through a pool of keep-alive connections and are
+    retried with jittered exponential backoff on rate limits, server errors
+    and network failures, honouring Retry-After.
     """
 
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: Optional[str],
+        model: str = DEFAULT_OPENAI_MODEL,
+        base_url: str = OPENAI_BASE_URL,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 120.0,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+    ):
         """
-        Initializes the OpenAI model.
+        Initializes the OpenAI-compatible model.
+
+        Args:
+            api_key (Optional[str]): Bearer token; only self-hosted servers may
+                go without one.
+            model (str): Model name sent with each request.
+            base_url (str): API root, e.g. https://api.openai.com/v1.
+            connect_timeout (float): Seconds to establish a connection.
+            read_timeout (float): Seconds to wait for each read from the server.
+            max_retries (int): Retries after the first attempt.
         """
-        if not api_key:
+        if not api_key and base_url in (OPENAI_BASE_URL, OPENROUTER_BASE_URL):
             raise ValueError("OpenAI API key not set.")
 
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self._path = urlsplit(self.base_url).path + "/chat/completions"
+        self.pool = HTTPPool(
+            self.base_url, connect_timeout=connect_timeout, read_timeout=read_timeout
+        )
+
+    @property
+    def model_name(self) -> str:
+        """Name of the model answering, for cache keys and logs."""
+        return self.model
+
     def generate_text(self, prompt: str, **kwargs: Dict[str, Any]) -> str:
         """
-        Generates text using the OpenAI model.
+        Generates text using the chat completions API.
 
         Args:
             prompt (str): The input prompt.
-            **kwargs: Additional keyword arguments for the model.
+            **kwargs: Additional request fields, e.g. temperature.
 
         Returns:
             str: The generated text.
         """
-        raise NotImplementedError("OpenAI implementation not yet available.")
+        return self.complete([{"role": "user", "content": prompt}], **kwargs)
+
+    def stream_text(self, prompt: str, **kwargs: Dict[str, Any]) -> Iterator[str]:
+        """
+        Generates text using the chat completions API, chunk by chunk.
+
+        Args:
+            prompt (str): The input prompt.
+            **kwargs: Additional request fields, e.g. temperature.
+
+        Yields:
+            str: Consecutive pieces of the generated text.
+        """
+        return self.stream_complete([{"role": "user", "content": prompt}], **kwargs)
+
+    def start_chat(self) -> ChatSession:
+        """
+        Starts a conversation sent as a list of messages.
+
+        Returns:
+            ChatSession: The new, empty conversation.
+        """
+        return OpenAIChatSession(self)
+
+    def complete(self, messages: List[Dict[str, str]], **kwargs: Any) -> str:
+        """
+        Request a completion of a conversation.
+
+        Args:
+            messages: Chat messages with role and content
+            **kwargs: Additional request fields
+
+        Returns:
+            The assistant's reply
+
+        Raises:
+            OpenAIError: If the request fails after all retries
+        """
+        with self._post({"model": self.model, "messages": messages, **kwargs}) as r:
+            payload = _json(r.read())
+        try:
+            return str(payload["choices"][0]["message"]["content"] or "")
+        except (KeyError, IndexError, TypeError) as e:
+            raise OpenAIError(f"Unexpected response: {payload!r:.200}") from e
+
+    def stream_complete(
+        self, messages: List[Dict[str, str]], **kwargs: Any
+    ) -> Iterator[str]:
+        """
+        Request a completion of a conversation as server-sent events.
+
+        Args:
+            messages: Chat messages with role and content
+            **kwargs: Additional request fields
+
+        Yields:
+            Consecutive pieces of the assistant's reply
+
+        Raises:
+            OpenAIError: If the request fails after all retries
+        """
+        body = {"model": self.model, "messages": messages, "stream": True, **kwargs}
+        with self._post(body) as response:
+            while True:
+                line = response.readline()
+                if not line:
+                    break
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    # Blank separators, comments and other SSE fields
+                    continue
+                data = line[len(b"data:") :].strip()
+                if data == b"[DONE]":
+                    # Drain the rest so the connection can be reused
+                    response.read()
+                    break
+                event = _json(data)
+                if "error" in event:
+                    raise OpenAIError(_error_message(event))
+                for choice in event.get("choices") or []:
+                    text = (choice.get("delta") or {}).get("content")
+                    if text:
+                        yield text
+
+    def close(self) -> None:
+        """Close the pooled connections."""
+        self.pool.close()
+
+    def _post(self, body: Dict[str, Any]) -> PooledResponse:
+        """POST to the chat completions endpoint, retrying transient failures."""
+        data = json.dumps(body).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        if body.get("stream"):
+            headers["Accept"] = "text/event-stream"
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                response = self.pool.request("POST", self._path, data, headers)
+            except (OSError, http.client.HTTPException) as e:
+                error = OpenAIError(f"Request to {self.base_url} failed: {e}")
+            else:
+                if response.status == 200:
+                    return response
+                with response:
+                    payload = response.read()
+                error = OpenAIError(
+                    f"{self.base_url} returned {response.status}: "
+                    f"{_error_message(payload)}",
+                    response.status,
+                )
+                if response.status not in RETRY_STATUSES:
+                    raise error
+                retry_after = _retry_after(response.headers.get("Retry-After"))
+
+            if attempt == self.max_retries:
+                raise error
+            delay = (
+                retry_after
+                if retry_after is not None
+                else random.uniform(0, min(BACKOFF_BASE * 2**attempt, BACKOFF_MAX))
+            )
+            logger.warning(
+                "ai.openai.retry",
+                attempt=attempt + 1,
+                delay_s=round(delay, 2),
+                error=str(error),
+            )
+            time.sleep(delay)
+        raise AssertionError("unreachable")
+
+
+class OpenAIChatSession(ChatSession):
+    """A conversation sent as the chat completions message list."""
+
+    def __init__(self, ai: OpenAIAI) -> None:
+        super().__init__(ai)
+        self._ai = ai
+
+    def _stream(self, message: str, **kwargs: Dict[str, Any]) -> Iterator[str]:
+        messages = []
+        for sent, received in self.turns:
+            messages += [
+                {"role": "user", "content": sent},
+                {"role": "assistant", "content": received},
+            ]
+        messages.append({"role": "user", "content": message})
+        return self._ai.stream_complete(messages, **kwargs)
+
+
+def _json(data: bytes) -> Any:
+    try:
+        return json.loads(data)
+    except ValueError as e:
+        raise OpenAIError(f"Invalid JSON in response: {data[:200]!r}") from e
+
+
+def _error_message(payload: Any) -> str:
+    """The message of an OpenAI-style error body, or the body itself."""
+    if isinstance(payload, bytes):
+        try:
+            payload = json.loads(payload)
+        except ValueError:
+            return bytes(payload[:200]).decode("utf-8", errors="replace")
+    if isinstance(payload, dict) and isinstance(payload.get("error"), dict):
+        return str(payload["error"].get("message", payload["error"]))
+    return str(payload)[:200]
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delay or HTTP date)."""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
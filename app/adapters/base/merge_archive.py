@@ -0,0 +1,294 @@
+import difflib
+import gzip
+import json
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from types import TracebackType
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Type, cast
+
+import typer
+
+from app.adapters.base.merge_writer import MergePart, write_merged_bytes
+from app.frameworks.logger import setup_logger as get_logger
+
+logger = get_logger(__name__)
+
+ARCHIVE_FORMAT = "h-merge"
+ARCHIVE_VERSION = 1
+# Codec name -> file suffix
+ARCHIVE_CODECS = {"gzip": ".gz", "zstd": ".zst"}
+INDEX_SUFFIX = ".index.jsonl"
+
+
+@dataclass
+class ArchiveEntry:
+    """Where one merged file lives inside an archive."""
+
+    # Relative path as shown in the merged output
+    path: str
+    oid: Optional[str]
+    # Byte offset and size of the file's compressed member in the archive
+    offset: int
+    size: int
+    # Uncompressed bytes of the section header that precedes the content
+    header_length: int
+    # Uncompressed UTF-8 bytes and characters of the content
+    length: int
+    chars: int
+    # Whether the content was cut short by a token budget
+    truncated: bool = False
+
+
+def index_path(archive: Path) -> Path:
+    """The sidecar index of an archive: `<archive>.index.jsonl`."""
+    return archive.with_name(archive.name + INDEX_SUFFIX)
+
+
+def write_merge_archive(
+    archive: Path, parts: Iterable[MergePart], codec: str = "gzip"
+) -> Path:
+    """
+    Write merged output as an indexed, compressed archive.
+
+    Every section is compressed as its own gzip member (or zstd frame), so the
+    archive as a whole still decompresses to the plain merged text with `zcat`
+    or `zstdcat`, while a single file can be read by decompressing only its
+    member. The sidecar index records each file's member offset and size,
+    content length, character count, blob OID and whether it was truncated.
+
+    Args:
+        archive (Path): Where to write the archive
+        parts (Iterable[MergePart]): Sections from iter_merge_parts()
+        codec (str): One of ARCHIVE_CODECS
+
+    Returns:
+        Path: The index written next to the archive
+
+    Raises:
+        ValueError: If the codec is unknown
+        ImportError: If codec is zstd and the zstandard package isn't installed
+    """
+    if codec not in ARCHIVE_CODECS:
+        raise ValueError(f"Unknown archive codec: {codec}")
+    compressor = _zstd().ZstdCompressor() if codec == "zstd" else None
+
+    entries: List[ArchiveEntry] = []
+    preamble: Dict[str, int] = {}
+    with open(archive, "wb") as out:
+        for part in parts:
+            offset = out.tell()
+            if compressor is not None:
+                with compressor.stream_writer(out, closefd=False) as member:
+                    length = write_merged_bytes(member, part.chunks)
+            else:
+                with gzip.GzipFile(fileobj=out, mode="wb", mtime=0) as member:
+                    length = write_merged_bytes(cast(BinaryIO, member), part.chunks)
+            size = out.tell() - offset
+
+            header_length = len(part.header.encode("utf-8"))
+            footer_length = len(part.footer.encode("utf-8"))
+            if part.path is None:
+                preamble = {"offset": offset, "size": size}
+                continue
+            entries.append(
+                ArchiveEntry(
+                    path=part.path.as_posix(),
+                    oid=part.oid,
+                    offset=offset,
+                    size=size,
+                    header_length=header_length,
+                    length=length - header_length - footer_length,
+                    chars=part.chars,
+                    truncated=part.truncated,
+                )
+            )
+
+    index = index_path(archive)
+    with open(index, "w", encoding="utf-8") as file:
+        header = {
+            "format": ARCHIVE_FORMAT,
+            "version": ARCHIVE_VERSION,
+            "codec": codec,
+            "preamble": preamble,
+            "files": len(entries),
+        }
+        file.write(json.dumps(header) + "\n")
+        for entry in entries:
+            file.write(json.dumps(asdict(entry), ensure_ascii=False) + "\n")
+
+    logger.info(f"Archived {len(entries)} files to {archive} (index: {index})")
+    return index
+
+
+class MergeArchive:
+    """
+    Random access to the files of an archive written by write_merge_archive().
+
+    Only the index is read up front; each read() seeks to one member and
+    decompresses just that member.
+    """
+
+    def __init__(self, archive: Path) -> None:
+        """
+        Open an archive and load its index.
+
+        Args:
+            archive (Path): The archive file; its index must sit next to it
+
+        Raises:
+            ValueError: If the index is not an h-merge index of a known version
+        """
+        self.path = archive
+        with open(index_path(archive), encoding="utf-8") as file:
+            header = json.loads(file.readline())
+            if (
+                header.get("format") != ARCHIVE_FORMAT
+                or header.get("version") != ARCHIVE_VERSION
+            ):
+                raise ValueError(f"Not an {ARCHIVE_FORMAT} v{ARCHIVE_VERSION} index")
+            self.codec: str = header["codec"]
+            self._preamble: Dict[str, int] = header.get("preamble", {})
+            self.entries: Dict[str, ArchiveEntry] = {}
+            for line in file:
+                entry = ArchiveEntry(**json.loads(line))
+                self.entries[entry.path] = entry
+        self._file: BinaryIO = open(archive, "rb")
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.entries
+
+    def __iter__(self) -> Iterator[ArchiveEntry]:
+        return iter(self.entries.values())
+
+    def read(self, path: str) -> str:
+        """
+        Extract one file's content.
+
+        Args:
+            path (str): The file's path as listed in the index
+
+        Returns:
+            str: The file's content as merged
+
+        Raises:
+            KeyError: If the archive has no such file
+        """
+        entry = self.entries[path]
+        data = self._decompress(entry.offset, entry.size)
+        content = data[entry.header_length : entry.header_length + entry.length]
+        return content.decode("utf-8")
+
+    def read_preamble(self) -> str:
+        """Extract the directory structure section."""
+        if not self._preamble:
+            return ""
+        data = self._decompress(self._preamble["offset"], self._preamble["size"])
+        return data.decode("utf-8")
+
+    def diff(self, other: "MergeArchive", context: int = 3) -> Iterator[str]:
+        """
+        Yield a unified diff from this archive to another.
+
+        Files whose blob OIDs match are skipped without being decompressed,
+        unless a token budget cut either side's content differently.
+
+        Args:
+            other (MergeArchive): The newer archive
+            context (int): Lines of context around each change
+
+        Yields:
+            str: Lines of the unified diff
+        """
+        for path in sorted(self.entries.keys() | other.entries.keys()):
+            old = self.entries.get(path)
+            new = other.entries.get(path)
+            if old and new and old.oid and _same_content(old, new):
+                continue
+            old_lines = self.read(path).splitlines(keepends=True) if old else []
+            new_lines = other.read(path).splitlines(keepends=True) if new else []
+            yield from difflib.unified_diff(
+                old_lines,
+                new_lines,
+                fromfile=f"a/{path}" if old else "/dev/null",
+                tofile=f"b/{path}" if new else "/dev/null",
+                n=context,
+            )
+
+    def close(self) -> None:
+        """Close the archive file."""
+        self._file.close()
+
+    def _decompress(self, offset: int, size: int) -> bytes:
+        self._file.seek(offset)
+        data = self._file.read(size)
+        if self.codec == "zstd":
+            # Streamed frames don't record their content size, which
+            # ZstdDecompressor.decompress() requires
+            return bytes(_zstd().ZstdDecompressor().decompressobj().decompress(data))
+        return gzip.decompress(data)
+
+    def __enter__(self) -> "MergeArchive":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+def _same_content(old: ArchiveEntry, new: ArchiveEntry) -> bool:
+    """Whether two entries hold the same blob, kept to the same length."""
+    return (old.oid, old.truncated, old.length) == (new.oid, new.truncated, new.length)
+
+
+def _zstd() -> Any:
+    """Import the optional zstandard package."""
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(
+            "zstd archives need the zstandard package: pip install 'h-cli[zstd]'"
+        ) from e
+    return zstandard
+
+
+def add_merge_archive(app: typer.Typer, name: str) -> None:
+    @app.command(name=name)
+    def merge_archive_command(
+        archive: Path = typer.Argument(
+            ..., exists=True, dir_okay=False, help="Archive written by `h m --format`"
+        ),
+        paths: List[str] = typer.Argument(None, help="Files to extract to stdout"),
+        list_files: bool = typer.Option(
+            False, "--list", "-l", help="List archived files with their sizes"
+        ),
+        diff: Optional[Path] = typer.Option(
+            None,
+            "--diff",
+            exists=True,
+            dir_okay=False,
+            help="Show a unified diff from ARCHIVE to this newer archive",
+        ),
+    ) -> None:
+        """Extract, list or diff files of a merge archive."""
+        with MergeArchive(archive) as merged:
+            if diff:
+                with MergeArchive(diff) as newer:
+                    sys.stdout.writelines(merged.diff(newer))
+            elif list_files:
+                for entry in merged:
+                    print(
+                        f"{entry.chars:>10} chars  {entry.oid or '-':40}  {entry.path}"
+                    )
+            elif paths:
+                for path in paths:
+                    if path not in merged:
+                        logger.error(f"Not in archive: {path}")
+                        raise typer.Exit(1)
+                    sys.stdout.write(merged.read(path))
+            else:
+                sys.stdout.write(merged.read_preamble())
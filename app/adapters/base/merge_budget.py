@@ -0,0 +1,152 @@
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.adapters.base.merge_ingest import IngestedFile, SpillBuffer, read_content
+from app.frameworks.logger import setup_logger as get_logger
+from app.tools.path_matcher import PathMatcher
+from app.tools.token_estimator import estimate_tokens
+
+logger = get_logger(__name__)
+
+# Orders in which files are admitted into the budget (after priority patterns)
+BUDGET_ORDERS = ("size", "recency", "path")
+# Don't bother truncating a file down to fewer tokens than this
+MIN_TRUNCATED_TOKENS = 64
+TRUNCATION_MARKER = "\n... [truncated: {kept} of ~{total} tokens]\n"
+# Directory listing line extras per file: "[N chars] " and the budget annotation
+LISTING_TOKENS_PER_FILE = 8
+
+
+@dataclass
+class BudgetDecision:
+    """How much of one file fits into the token budget."""
+
+    tokens: int
+    # Characters of the file's content to keep; None keeps all of it
+    keep_chars: Optional[int] = None
+    omitted: bool = False
+
+    @property
+    def truncated(self) -> bool:
+        """Whether only the beginning of the file is kept."""
+        return self.keep_chars is not None and not self.omitted
+
+    def annotation(self) -> str:
+        """Suffix for the file's line in the directory structure."""
+        if self.omitted:
+            return f" [omitted: ~{self.tokens} tokens]"
+        if self.truncated:
+            return f" [truncated: ~{self.tokens} tokens]"
+        return ""
+
+
+def plan_budget(
+    entries: Sequence[IngestedFile],
+    spill: SpillBuffer,
+    max_tokens: int,
+    reserved_tokens: int = 0,
+    priority_patterns: Optional[List[str]] = None,
+    order: str = "size",
+    pinned: int = 0,
+) -> Dict[int, BudgetDecision]:
+    """
+    Decide which files fit into a token budget.
+
+    Files are admitted by priority: the first `pinned` entries (explicitly
+    requested files), then files matching earlier priority patterns before
+    later ones, then by `order` (smallest first, most recently modified first,
+    or listing order). The first file that no longer fits is truncated if a
+    useful part of it still fits; everything after it is omitted.
+
+    Args:
+        entries (Sequence[IngestedFile]): Mergeable files in output order
+        spill (SpillBuffer): Where the entries' contents are stored
+        max_tokens (int): Total token budget
+        reserved_tokens (int): Tokens already used by headers and listings
+        priority_patterns (Optional[List[str]]): .gitignore-style patterns,
+            most important first
+        order (str): One of BUDGET_ORDERS
+        pinned (int): Number of leading entries that are admitted first
+
+    Returns:
+        Dict[int, BudgetDecision]: Decisions keyed by index into entries
+    """
+    matchers = [PathMatcher([pattern]) for pattern in priority_patterns or []]
+    decisions: Dict[int, BudgetDecision] = {}
+    for index, entry in enumerate(entries):
+        content = read_content(entry, spill)
+        header = f"## File: {entry.path}\n"
+        decisions[index] = BudgetDecision(
+            tokens=estimate_tokens(header) + estimate_tokens(content) + 1
+        )
+
+    def rank(index: int) -> Tuple[int, int, float]:
+        entry = entries[index]
+        if index < pinned:
+            return (0, 0, index)
+        relative = entry.path.as_posix()
+        priority = next(
+            (i for i, matcher in enumerate(matchers) if matcher.matches(relative)),
+            len(matchers),
+        )
+        if order == "size":
+            key: float = decisions[index].tokens
+        elif order == "recency":
+            key = -_mtime(entry)
+        else:
+            key = index
+        return (1, priority, key)
+
+    remaining = max_tokens - reserved_tokens
+    exhausted = False
+    for index in sorted(decisions, key=rank):
+        decision = decisions[index]
+        if exhausted:
+            decision.omitted = True
+        elif decision.tokens <= remaining:
+            remaining -= decision.tokens
+        elif remaining >= MIN_TRUNCATED_TOKENS:
+            entry = entries[index]
+            decision.keep_chars = _truncation_point(
+                read_content(entry, spill), remaining, decision.tokens
+            )
+            remaining = 0
+            exhausted = True
+        else:
+            decision.omitted = True
+            exhausted = True
+
+    omitted = sum(decision.omitted for decision in decisions.values())
+    logger.info(
+        f"Token budget: ~{max_tokens - remaining} of {max_tokens} tokens used, "
+        f"{omitted} files omitted"
+    )
+    return decisions
+
+
+def truncate_content(content: str, decision: BudgetDecision) -> str:
+    """Cut content down to what the decision keeps, marking the cut."""
+    if not decision.truncated or decision.keep_chars is None:
+        return content
+    kept = content[: decision.keep_chars]
+    return kept + TRUNCATION_MARKER.format(
+        kept=estimate_tokens(kept), total=decision.tokens
+    )
+
+
+def _truncation_point(content: str, budget: int, tokens: int) -> int:
+    """Number of leading chars of content that fit budget, cut at a line end."""
+    marker_tokens = estimate_tokens(TRUNCATION_MARKER)
+    keep = int(len(content) * max(budget - marker_tokens, 0) / max(tokens, 1))
+    newline = content.rfind("\n", 0, keep)
+    return newline + 1 if newline > 0 else keep
+
+
+def _mtime(entry: IngestedFile) -> float:
+    if entry.mtime is not None:
+        return entry.mtime
+    try:
+        return os.stat(entry.full_path).st_mtime
+    except OSError:
+        return 0.0
@@ -0,0 +1,56 @@
+from typing import Optional, Tuple
+
+from app.core.config import get_cache_dir, get_config
+from app.frameworks.logger import setup_logger as get_logger
+from app.tools.disk_cache import DiskCache
+
+logger = get_logger(__name__)
+
+# Bump when the classification or decoding rules change
+CACHE_KEY_PREFIX = "merge:v1:"
+CACHE_FILENAME = "merge-content.sqlite3"
+
+
+def open_merge_cache() -> DiskCache:
+    """Open the merge content cache configured in the global config."""
+    return DiskCache(
+        get_cache_dir() / CACHE_FILENAME, max_bytes=get_config().cache.merge_max_bytes
+    )
+
+
+def cache_key(oid: str) -> str:
+    """Cache key for the content of a blob."""
+    return CACHE_KEY_PREFIX + oid
+
+
+def encode_entry(
+    binary: bool, error: Optional[str], char_count: int, data: bytes
+) -> bytes:
+    """
+    Serialize a file's classification and content for the cache.
+
+    Layout: one kind byte (B = binary, E = undecodable, T = text); text entries
+    continue with the decimal char count, a newline and the UTF-8 content.
+    """
+    if binary:
+        return b"B"
+    if error is not None:
+        return b"E" + error.encode("utf-8")
+    return b"T%d\n" % char_count + data
+
+
+def decode_entry(value: bytes) -> Tuple[bool, Optional[str], int, memoryview]:
+    """
+    Inverse of encode_entry().
+
+    Returns:
+        Tuple[bool, Optional[str], int, memoryview]:
+            (binary, error, char_count, UTF-8 content)
+    """
+    kind = value[:1]
+    if kind == b"B":
+        return True, None, 0, memoryview(b"")
+    if kind == b"E":
+        return False, value[1:].decode("utf-8"), 0, memoryview(b"")
+    newline = value.index(b"\n")
+    return False, None, int(value[1:newline]), memoryview(value)[newline + 1 :]
@@ -1,25 +1,55 @@
 import os
 import subprocess
+import sys
+from itertools import chain
 from pathlib import Path
-from typing import List, Optional
-from fnmatch import fnmatch
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, cast
 
 import typer
 from typing_extensions import Annotated
 
+from app.adapters.base.merge_archive import ARCHIVE_CODECS, write_merge_archive
+from app.adapters.base.merge_budget import (
+    BUDGET_ORDERS,
+    LISTING_TOKENS_PER_FILE,
+    BudgetDecision,
+    plan_budget,
+    truncate_content,
+)
+from app.adapters.base.merge_cache import open_merge_cache
+from app.adapters.base.merge_ingest import (
+    DEFAULT_JOBS,
+    ZERO_COPY_MIN_BYTES,
+    IngestedFile,
+    SpillBuffer,
+    content_range,
+    ingest_contents,
+    ingest_files,
+    read_content,
+)
+from app.adapters.base.merge_scope import RELATED_MODES, ChangeScope
+from app.adapters.base.merge_writer import (
+    MergeChunk,
+    MergePart,
+    write_merged_bytes,
+    write_merged_files,
+)
 from app.adapters.git.git_commands import GitCommands
+from app.adapters.git.git_index import STAGE_MASK, GitIndex, load_index
 from app.frameworks.logger import setup_logger as get_logger
 from app.tools import vscode_utils
-from app.tools.file_utils import (
-    create_temp_file,
-    is_binary_file,
-    read_file,
-    should_exclude_file,
-    write_file,
-)
+from app.tools.disk_cache import DiskCache
+from app.tools.file_utils import get_temp_file_path, normalize_roots
+from app.tools.path_matcher import PathMatcher
+from app.tools.token_estimator import estimate_tokens
 
 logger = get_logger(__name__)
 
+# `h m --rev` value that merges the index instead of a commit (git's `:path`)
+INDEX_REV = ":"
+# Submodule entries in trees and the index
+GITLINK_MODE = "160000"
+
 IGNORED_FILES = [
     "uv.lock",
     "package-lock.json",
@@ -30,54 +60,375 @@ IGNORED_FILES = [
     ".terraform.lock.hcl",
 ]
 IGNORED_EXTENSIONS = [".svg", ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp"]
+DOC_EXTENSIONS = [".md"]
 
 
-def get_git_tracked_files(directory: Path) -> List[Path]:
+class TrackedFile(NamedTuple):
+    """A file listed from the Git index."""
+
+    path: Path
+    # Blob OID, when the working tree copy is known to match the index
+    oid: Optional[str] = None
+    # Git's text/binary classification, when it was requested
+    binary: Optional[bool] = None
+    # Modification time recorded in the index, when the file is known to match it
+    mtime: Optional[float] = None
+
+
+def get_git_tracked_files(
+    directory: Path, pathspecs: Optional[List[str]] = None
+) -> List[Path]:
     """Get a list of files tracked by Git in the specified directory."""
+    return [file.path for file in list_tracked_files(directory, pathspecs)]
+
+
+def list_tracked_files(
+    directory: Path,
+    pathspecs: Optional[List[str]] = None,
+    blob_ids: bool = False,
+    classify: bool = False,
+    roots: Optional[List[str]] = None,
+) -> List[TrackedFile]:
+    """
+    List files tracked by Git, letting Git do as much filtering as possible.
+
+    Without pathspecs and classification the index is read natively (see
+    load_index()), so no process is spawned; files are compared against the
+    index's stat data like `git ls-files --modified` does. Otherwise, or if the
+    index can't be read natively, `git ls-files` is run with NUL-separated
+    output, so no path quoting or newline handling is needed.
+
+    Args:
+        directory (Path): The directory to list files under
+        pathspecs (Optional[List[str]]): Git pathspecs restricting the listing
+        blob_ids (bool): Whether to report blob OIDs of files whose working tree
+            copy matches the index (modified and unmerged files get None)
+        classify (bool): Whether to report Git's binary classification from
+            `git ls-files --eol`, so binary files never have to be opened
+        roots (Optional[List[str]]): Only list files in these subtrees, given
+            as normalized paths relative to directory (see normalize_roots());
+            only their part of the index is read
+
+    Returns:
+        List[TrackedFile]: Tracked files in index order, paths relative to directory
+    """
+    if not pathspecs and not classify:
+        loaded = load_index(directory)
+        if loaded is not None:
+            return _index_tracked_files(directory, *loaded, blob_ids, roots)
+
+    args = ["--stage"] if blob_ids else []
+    if classify:
+        args.append("--eol")
+
+    pathspecs = _scope_pathspecs(pathspecs, roots)
     try:
-        # Use -c core.quotepath=false to prevent escaping non-ASCII characters
-        result = subprocess.run(
-            ["git", "-c", "core.quotepath=false", "ls-files"],
-            capture_output=True,
-            text=True,
-            check=True,
-            encoding="utf-8",
-            cwd=directory,
+        records = _git_ls_files(directory, args, pathspecs)
+        modified = (
+            set(_git_ls_files(directory, ["--modified"], pathspecs))
+            if blob_ids
+            else set()
         )
-
-        return [Path(file) for file in result.stdout.split("\n") if file]
     except subprocess.CalledProcessError:
         return []
+    if roots and pathspecs and len(pathspecs) > len(roots):
+        # Other positive pathspecs are OR'd with the roots
+        records = [
+            record
+            for record in records
+            if _under_roots(record.split("\t", len(args))[-1], roots)
+        ]
+
+    files: List[TrackedFile] = []
+    seen = set()
+    for record in records:
+        fields = record.split("\t", len(args))
+        path = fields[-1]
+        if path in seen:
+            # Unmerged paths are listed once per stage
+            files[-1] = files[-1]._replace(oid=None)
+            continue
+        seen.add(path)
+
+        oid = None
+        if blob_ids:
+            _mode, oid, stage = fields[0].split(" ")
+            if stage != "0" or path in modified:
+                oid = None
+
+        binary = None
+        if classify:
+            binary = _is_binary_eol(fields[-2])
+
+        files.append(TrackedFile(Path(path), oid, binary))
+    return files
+
+
+def _index_tracked_files(
+    directory: Path,
+    index: GitIndex,
+    prefix: str,
+    blob_ids: bool,
+    roots: Optional[List[str]] = None,
+) -> List[TrackedFile]:
+    """list_tracked_files() from a natively read index."""
+    selected: List[Tuple[int, str]] = []
+    unmerged = set()
+    for i in _index_entries(index, prefix, roots):
+        path = index.path(i)[len(prefix) :]
+        if selected and selected[-1][1] == path:
+            # Unmerged paths are listed once per stage
+            unmerged.add(path)
+            continue
+        selected.append((i, path))
+
+    if not blob_ids:
+        return [TrackedFile(Path(path)) for _, path in selected]
+
+    root = str(directory)
+    clean = index.is_clean_many(
+        [(i, os.path.join(root, path)) for i, path in selected], DEFAULT_JOBS
+    )
+    return [
+        (
+            TrackedFile(Path(path), index.oid(i), mtime=index.mtimes_ns[i] / 1e9)
+            if is_clean and path not in unmerged
+            else TrackedFile(Path(path))
+        )
+        for (i, path), is_clean in zip(selected, clean)
+    ]
 
 
-def should_include_file(file_path: Path, include_patterns: List[str]) -> bool:
+def _index_entries(
+    index: GitIndex, prefix: str, roots: Optional[List[str]]
+) -> Iterator[int]:
     """
-    Check if a file should be included based on glob patterns.
+    Numbers of the index entries under prefix and in one of roots, in order.
 
-    Returns True if:
-    - include_patterns is empty (include all)
-    - OR file matches at least one of the include patterns
+    The index is sorted by path, so each subtree is a contiguous range found
+    by binary search; entries outside the roots are never decoded.
     """
-    if not include_patterns:
+    if not roots:
+        yield from index.prefix_range(prefix)
+        return
+    ranges = []
+    for root in roots:
+        path = prefix + root
+        # A root naming a file sorts before anything else starting with it
+        exact = index.prefix_range(path)
+        end = exact.start
+        while end < exact.stop and index.path(end) == path:
+            end += 1
+        ranges += [range(exact.start, end), index.prefix_range(path + "/")]
+    for entries in sorted(ranges, key=lambda entries: entries.start):
+        yield from entries
+
+
+def _scope_pathspecs(
+    pathspecs: Optional[List[str]], roots: Optional[List[str]]
+) -> Optional[List[str]]:
+    """Add literal pathspecs restricting a listing to roots."""
+    if not roots:
+        return pathspecs
+    return [*(f":(literal){root}" for root in roots), *(pathspecs or [])]
+
+
+def _under_roots(path: str, roots: List[str]) -> bool:
+    """Whether a '/'-separated path is one of roots or inside one."""
+    return any(path == root or path.startswith(root + "/") for root in roots)
+
+
+def list_snapshot_files(
+    directory: Path,
+    rev: str,
+    pathspecs: Optional[List[str]] = None,
+    roots: Optional[List[str]] = None,
+) -> List[TrackedFile]:
+    """
+    List the files of a commit, or of the index, with their blob OIDs.
+
+    Args:
+        directory (Path): The directory to list files under
+        rev (str): A commit-ish, or INDEX_REV for the index
+        pathspecs (Optional[List[str]]): Git pathspecs restricting the listing;
+            only applied to the index, since `git ls-tree` doesn't support
+            pathspec magic
+        roots (Optional[List[str]]): Only list files in these subtrees, given
+            as normalized paths relative to directory (see normalize_roots())
+
+    Returns:
+        List[TrackedFile]: Regular files and symlinks in Git's order, paths
+            relative to directory
+
+    Raises:
+        ValueError: If rev can't be resolved
+    """
+    if rev == INDEX_REV and not pathspecs:
+        loaded = load_index(directory)
+        if loaded is not None:
+            index, prefix = loaded
+            return [
+                TrackedFile(Path(index.path(i)[len(prefix) :]), index.oid(i))
+                for i in _index_entries(index, prefix, roots)
+                if index.flags[i] & STAGE_MASK == 0
+                and index.modes[i] != int(GITLINK_MODE, 8)
+            ]
+
+    try:
+        if rev == INDEX_REV:
+            records = _git_ls_files(
+                directory, ["--stage"], _scope_pathspecs(pathspecs, roots)
+            )
+        else:
+            # ls-tree only takes plain path prefixes, which roots are
+            result = subprocess.run(
+                ["git", "ls-tree", "-r", "-z", rev, "--", *(roots or [])],
+                capture_output=True,
+                check=True,
+                cwd=directory,
+            )
+            records = [
+                record
+                for record in result.stdout.decode(
+                    "utf-8", errors="surrogateescape"
+                ).split("\0")
+                if record
+            ]
+    except subprocess.CalledProcessError as e:
+        raise ValueError(
+            f"Can't list files of {rev!r}: {e.stderr.decode().strip()}"
+        ) from e
+
+    files = []
+    for record in records:
+        info, path = record.split("\t", 1)
+        if rev == INDEX_REV:
+            mode, oid, stage = info.split(" ")
+            if stage != "0":
+                # Unmerged; there is no single version to merge
+                continue
+        else:
+            mode, _type, oid = info.split(" ")
+        if mode == GITLINK_MODE:
+            continue
+        files.append(TrackedFile(Path(path), oid))
+    return files
+
+
+def _is_tree_ish(directory: Path, rev: str) -> bool:
+    """Whether rev names a commit or tree in the repository."""
+    result = subprocess.run(
+        ["git", "rev-parse", "--verify", "--quiet", f"{rev}^{{tree}}"],
+        capture_output=True,
+        cwd=directory,
+    )
+    return result.returncode == 0
+
+
+def _git_ls_files(
+    directory: Path, args: List[str], pathspecs: Optional[List[str]]
+) -> List[str]:
+    """Run `git ls-files -z` and split its NUL-separated records."""
+    command = ["git", "ls-files", "-z", *args]
+    if pathspecs:
+        command += ["--", *pathspecs]
+    result = subprocess.run(command, capture_output=True, check=True, cwd=directory)
+    return [
+        record
+        for record in result.stdout.decode("utf-8", errors="surrogateescape").split(
+            "\0"
+        )
+        if record
+    ]
+
+
+def _is_binary_eol(eol_info: str) -> Optional[bool]:
+    """
+    Interpret the `i/<eol> w/<eol> attr/<attr>` columns of `git ls-files --eol`.
+
+    Git reports `w/-text` when its content sniffing finds a NUL byte in the
+    working tree file, and `attr/-text` when .gitattributes marks it binary.
+    """
+    _index_eol, worktree_eol, *attr = eol_info.split()
+    attrs = " ".join(attr).removeprefix("attr/").split()
+    if "-text" in attrs:
         return True
+    if worktree_eol == "w/":
+        # Not in the working tree (or not a regular file); let the reader decide
+        return None
+    return worktree_eol == "w/-text"
 
-    return any(fnmatch(str(file_path), pattern) for pattern in include_patterns)
 
+def compile_merge_filters(
+    exclude_patterns: List[str], include_patterns: List[str], include_docs: bool
+) -> Tuple[PathMatcher, Optional[PathMatcher]]:
+    """
+    Compile the exclude and include rules of a merge once, up front.
 
-def merge_files(
+    IGNORED_FILES, IGNORED_EXTENSIONS and (unless include_docs) DOC_EXTENSIONS
+    are folded into the exclude matcher together with the user's patterns.
+
+    Args:
+        exclude_patterns (List[str]): .gitignore-style patterns to exclude
+        include_patterns (List[str]): .gitignore-style patterns to include
+        include_docs (bool): Whether documentation files are merged
+
+    Returns:
+        Tuple[PathMatcher, Optional[PathMatcher]]: The exclude matcher and the
+        include matcher (None when every file is included)
+    """
+    extensions = IGNORED_EXTENSIONS + ([] if include_docs else DOC_EXTENSIONS)
+    exclude = PathMatcher(
+        IGNORED_FILES + [f"*{ext}" for ext in extensions] + exclude_patterns
+    )
+    include = PathMatcher(include_patterns) if include_patterns else None
+    return exclude, include
+
+
+def iter_merge_sections(
+    directory: Path, *args: Any, **kwargs: Any
+) -> Iterator[MergeChunk]:
+    """
+    Yield the merged output of Git-tracked and additional files piece by piece.
+
+    Flattens iter_merge_parts(), which takes the same arguments. File contents
+    are yielded separately from their headers so that a consumer writing to a
+    file never holds more than one file's content in memory.
+
+    Yields:
+        MergeChunk: Consecutive pieces of the merged output; always str unless
+            raw is True
+    """
+    for part in iter_merge_parts(directory, *args, **kwargs):
+        yield from part.chunks
+
+
+def iter_merge_parts(
     directory: Path,
     exclude_patterns: Optional[List[str]] = None,
     include_patterns: Optional[List[str]] = None,
     additional_files: Optional[List[Path]] = None,
     include_docs: bool = False,
     char_count: bool = False,
-) -> str:
+    jobs: int = DEFAULT_JOBS,
+    cache: Optional[DiskCache] = None,
+    max_tokens: Optional[int] = None,
+    priority_patterns: Optional[List[str]] = None,
+    budget_order: str = "size",
+    raw: bool = False,
+    blob_ids: bool = False,
+    rev: Optional[str] = None,
+    changes: Optional[ChangeScope] = None,
+    roots: Optional[List[str]] = None,
+) -> Iterator[MergePart]:
     """
-    Merge all files tracked by Git and additional files into a single string.
+    Yield the merged output of Git-tracked and additional files section by section.
     Exclude binary files and files matching the exclude patterns.
     Include only files matching include patterns if provided.
     If char_count is True, prepend each file name with its character count.
 
+    The first part is the directory structure, followed by one part per file.
+
     Args:
         directory (Path): The directory to process files from
         exclude_patterns (Optional[List[str]]): Patterns to exclude from processing
@@ -85,9 +436,35 @@ def merge_files(
         additional_files (Optional[List[Path]]): Additional files to include
         include_docs (bool): Whether to include documentation files
         char_count (bool): Whether to prepend each file name with its character count
-
-    Returns:
-        str: The merged content of all processed files
+        jobs (int): Number of threads reading files concurrently
+        cache (Optional[DiskCache]): Content cache keyed by Git blob OID
+        max_tokens (Optional[int]): Approximate token budget for the output;
+            files that don't fit are truncated or omitted (see plan_budget())
+        priority_patterns (Optional[List[str]]): Patterns of files to admit
+            into the budget first, most important first
+        budget_order (str): How remaining files are admitted: size, recency
+            or path
+        raw (bool): Yield large CR-free UTF-8 files as ByteRange references to
+            their bytes on disk instead of decoded text, for write_merged_bytes()
+        blob_ids (bool): Whether to report blob OIDs even without a cache
+        rev (Optional[str]): Merge the files of this commit (or of the index,
+            with INDEX_REV) instead of the working tree. Blobs are streamed
+            through one `git cat-file --batch` process; cache and raw are
+            ignored, additional files are still read from disk.
+        changes (Optional[ChangeScope]): Only merge files changed since a
+            commit, staged or unstaged (and optionally related files); the
+            filters below still apply
+        roots (Optional[List[str]]): Only merge files in these subtrees
+            (relative to directory, or absolute). Git only lists the subtrees,
+            so the cost scales with their size; paths stay relative to
+            directory.
+
+    Yields:
+        MergePart: The directory structure, then each merged file
+
+    Raises:
+        ValueError: If rev or the changes' base commit can't be resolved, or a
+            root is outside directory
     """
     if exclude_patterns is None:
         exclude_patterns = []
@@ -95,86 +472,284 @@ def merge_files(
         include_patterns = []
     if additional_files is None:
         additional_files = []
+    scope = normalize_roots(directory, roots) if roots else []
+
+    exclude_matcher, include_matcher = compile_merge_filters(
+        exclude_patterns, include_patterns, include_docs
+    )
 
-    merged_content = ""
+    # Without a cache, let git skip excluded paths and binary files up front.
+    # With one, `--eol` would make git read every working tree file and defeat
+    # a warm cache, so the index is read natively, the matchers below filter in
+    # Python and only cache misses are opened and checked for binary content.
+    # Include pathspecs would be OR'd with the roots, so they are left out then.
+    pathspecs = exclude_matcher.to_git_pathspecs(exclude=True) or []
+    if include_matcher is not None and not scope:
+        pathspecs += include_matcher.to_git_pathspecs() or []
 
     # Get directory structure, respecting exclusions
-    git = GitCommands(logger)
-    git_files = get_git_tracked_files(directory)
-    filtered_files = []
-
-    for file_path in git_files:
-        full_path = directory / file_path
-        if any(seg in (IGNORED_FILES + exclude_patterns) for seg in full_path.parts):
-            logger.info(f"Ignoring file: {full_path}")
-            continue
+    if rev is not None:
+        git_files = list_snapshot_files(directory, rev, roots=scope)
+        cache = None
+        raw = False
+    else:
+        git_files = list_tracked_files(
+            directory,
+            pathspecs if cache is None else None,
+            blob_ids=cache is not None or blob_ids,
+            classify=cache is None,
+            roots=scope,
+        )
+    if changes:
+        selected = changes.select(
+            directory, [file.path.as_posix() for file in git_files], scope
+        )
+        git_files = [file for file in git_files if file.path.as_posix() in selected]
+
+    candidates = []
+    ignored = skipped = binary = 0
 
-        if should_exclude_file(
-            full_path, exclude_patterns, include_docs
-        ) or is_binary_file(full_path):
+    for file in git_files:
+        relative = file.path.as_posix()
+        if exclude_matcher.matches(relative):
+            ignored += 1
             continue
 
         # Skip if it doesn't match any include pattern (when include patterns are provided)
-        if not should_include_file(file_path, include_patterns):
-            logger.info(f"Skipping file (not in include patterns): {full_path}")
+        if include_matcher is not None and not include_matcher.matches(relative):
+            skipped += 1
             continue
 
-        filtered_files.append(file_path)
+        if file.binary:
+            binary += 1
+            continue
 
-    # Generate directory structure from filtered files
-    directory_lines = []
-    for file_path in filtered_files:
-        full_path = directory / file_path
-        if char_count:
-            try:
-                content = read_file(full_path)
-                count = len(content)
-                line = f"[{count} chars] {file_path}"
-            except Exception as e:
-                logger.error(f"Error reading file {full_path}: {e}")
-                line = f"[0 chars] {file_path}"
-        else:
-            line = str(file_path)
-        directory_lines.append(line)
+        candidates.append(file)
 
-    directory_structure = "\n".join(directory_lines)
-    merged_content += f"## Directory Structure\n{directory_structure}\n\n"
+    if ignored or skipped or binary:
+        logger.info(
+            f"Ignored {ignored} excluded files, "
+            f"skipped {skipped} files not in include patterns "
+            f"and {binary} binary files"
+        )
 
-    # Merge Git-tracked files
-    for file_path in filtered_files:
-        full_path = directory / file_path
-        try:
-            content = read_file(full_path)
-            char_count_str = f"[{len(content)} chars] " if char_count else ""
-            merged_content += f"## File: {char_count_str}{file_path}\n{content}\n"
-        except Exception as e:
-            logger.error(f"Error processing file {full_path}: {e}")
+    # Unchanged files are served from the cache by blob OID without opening them
+    oids = {file.path: file.oid for file in candidates if file.oid}
 
-    # Merge additional files
+    extra_files = []
     for file_path in additional_files:
         if not file_path.is_absolute():
             file_path = directory / file_path
 
-        if should_exclude_file(
-            file_path, exclude_patterns, include_docs
-        ) or is_binary_file(file_path):
+        relative = _relative_posix(file_path, directory)
+        if exclude_matcher.matches(relative):
             continue
 
         # Skip if it doesn't match any include pattern (when include patterns are provided)
-        if not should_include_file(file_path, include_patterns):
+        if include_matcher is not None and not include_matcher.matches(relative):
             logger.info(
                 f"Skipping additional file (not in include patterns): {file_path}"
             )
             continue
 
-        try:
-            content = read_file(file_path)
-            char_count_str = f"[{len(content)} chars] " if char_count else ""
-            merged_content += f"## File: {char_count_str}{file_path}\n{content}\n"
-        except Exception as e:
-            logger.error(f"Error processing file {file_path}: {e}")
+        extra_files.append((file_path, file_path))
+
+    raw_min_bytes = ZERO_COPY_MIN_BYTES if raw else None
+    with SpillBuffer() as spill:
+        # Read every candidate exactly once; binary files drop out here
+        if rev is not None:
+            ingested = _ingest_snapshot(directory, candidates, spill)
+        else:
+            ingested = ingest_files(
+                ((file.path, directory / file.path) for file in candidates),
+                spill,
+                jobs,
+                cache=cache,
+                blob_ids=oids,
+                raw_min_bytes=raw_min_bytes,
+            )
+        entries = [entry for entry in ingested if not entry.binary]
+        # Saves an os.stat() per file when the budget orders by recency
+        mtimes = {file.path: file.mtime for file in candidates if file.mtime}
+        for entry in entries:
+            entry.mtime = mtimes.get(entry.path)
+        extra_entries = [
+            entry
+            for entry in ingest_files(
+                extra_files, spill, jobs, raw_min_bytes=raw_min_bytes
+            )
+            if entry.mergeable
+        ]
+
+        # Additional files were asked for explicitly, so they are admitted first
+        merged = extra_entries + [entry for entry in entries if entry.mergeable]
+        decisions: Dict[int, BudgetDecision] = {}
+        if max_tokens is not None:
+            decisions = plan_budget(
+                merged,
+                spill,
+                max_tokens,
+                reserved_tokens=estimate_tokens(
+                    "\n".join(str(entry.path) for entry in entries)
+                )
+                + len(entries) * LISTING_TOKENS_PER_FILE,
+                priority_patterns=priority_patterns,
+                order=budget_order,
+                pinned=len(extra_entries),
+            )
+        decision_of = {
+            id(entry): decisions[index]
+            for index, entry in enumerate(merged)
+            if index in decisions
+        }
+
+        # Generate directory structure from filtered files
+        directory_lines = []
+        for entry in entries:
+            if char_count:
+                line = f"[{entry.char_count} chars] {entry.path}"
+            else:
+                line = str(entry.path)
+            if id(entry) in decision_of:
+                line += decision_of[id(entry)].annotation()
+            directory_lines.append(line)
+
+        directory_structure = "\n".join(directory_lines)
+        yield MergePart("## Directory Structure\n", directory_structure, "\n\n")
+
+        # Merge Git-tracked files, then additional files
+        for entry in [*entries, *extra_entries]:
+            decision = decision_of.get(id(entry))
+            if not entry.mergeable or (decision and decision.omitted):
+                continue
+            content: MergeChunk
+            chars = entry.char_count
+            if decision and decision.truncated:
+                content = truncate_content(read_content(entry, spill), decision)
+                chars = len(content)
+            elif raw:
+                content = content_range(entry, spill)
+            else:
+                content = read_content(entry, spill)
+            yield _file_part(
+                entry.path,
+                oids.get(entry.path),
+                content,
+                chars,
+                char_count,
+                truncated=bool(decision and decision.truncated),
+            )
+
+
+def _ingest_snapshot(
+    directory: Path, files: List[TrackedFile], spill: SpillBuffer
+) -> Iterator[IngestedFile]:
+    """Read files' blobs through a single `git cat-file --batch` session."""
+    with GitCommands(logger, cwd=directory) as git:
+        blobs = git.cat_file().read_many(cast(str, file.oid) for file in files)
+        yield from ingest_contents(
+            ((file.path, directory / file.path) for file in files),
+            (blob.data if blob else None for blob in blobs),
+            spill,
+        )
+
+
+def _relative_posix(file_path: Path, directory: Path) -> str:
+    """Path as matched by the filters: relative to directory when inside it."""
+    try:
+        return file_path.relative_to(directory).as_posix()
+    except ValueError:
+        return file_path.as_posix()
+
+
+def _file_part(
+    file_path: Path,
+    oid: Optional[str],
+    content: MergeChunk,
+    chars: int,
+    char_count: bool,
+    truncated: bool = False,
+) -> MergePart:
+    """Build the header, content and trailing newline of a single file section."""
+    char_count_str = f"[{chars} chars] " if char_count else ""
+    return MergePart(
+        f"## File: {char_count_str}{file_path}\n",
+        content,
+        "\n",
+        path=file_path,
+        oid=oid,
+        chars=chars,
+        truncated=truncated,
+    )
+
+
+def merge_files(
+    directory: Path,
+    exclude_patterns: Optional[List[str]] = None,
+    include_patterns: Optional[List[str]] = None,
+    additional_files: Optional[List[Path]] = None,
+    include_docs: bool = False,
+    char_count: bool = False,
+    jobs: int = DEFAULT_JOBS,
+    cache: Optional[DiskCache] = None,
+    max_tokens: Optional[int] = None,
+    priority_patterns: Optional[List[str]] = None,
+    budget_order: str = "size",
+    rev: Optional[str] = None,
+    changes: Optional[ChangeScope] = None,
+    roots: Optional[List[str]] = None,
+) -> str:
+    """
+    Merge all files tracked by Git and additional files into a single string.
 
-    return merged_content
+    Thin wrapper around iter_merge_sections(); prefer streaming the sections
+    with write_merged_files() when the result is written to a file.
+
+    Args:
+        directory (Path): The directory to process files from
+        exclude_patterns (Optional[List[str]]): Patterns to exclude from processing
+        include_patterns (Optional[List[str]]): Patterns to include in processing
+        additional_files (Optional[List[Path]]): Additional files to include
+        include_docs (bool): Whether to include documentation files
+        char_count (bool): Whether to prepend each file name with its character count
+        jobs (int): Number of threads reading files concurrently
+        cache (Optional[DiskCache]): Content cache keyed by Git blob OID
+        max_tokens (Optional[int]): Approximate token budget for the output;
+            files that don't fit are truncated or omitted (see plan_budget())
+        priority_patterns (Optional[List[str]]): Patterns of files to admit
+            into the budget first, most important first
+        budget_order (str): How remaining files are admitted: size, recency
+            or path
+        rev (Optional[str]): Merge this commit (or INDEX_REV for the index)
+            instead of the working tree
+        changes (Optional[ChangeScope]): Only merge changed (and related) files
+        roots (Optional[List[str]]): Only merge files in these subtrees
+
+    Returns:
+        str: The merged content of all processed files
+    """
+    # Without raw=True every section is text
+    return "".join(
+        cast(
+            Iterator[str],
+            iter_merge_sections(
+                directory=directory,
+                exclude_patterns=exclude_patterns,
+                include_patterns=include_patterns,
+                additional_files=additional_files,
+                include_docs=include_docs,
+                char_count=char_count,
+                jobs=jobs,
+                cache=cache,
+                max_tokens=max_tokens,
+                priority_patterns=priority_patterns,
+                budget_order=budget_order,
+                rev=rev,
+                changes=changes,
+                roots=roots,
+            ),
+        )
+    )
 
 
 def add_merge_files(app: typer.Typer, name: str) -> None:
@@ -193,7 +768,7 @@ def add_merge_files(app: typer.Typer, name: str) -> None:
             [], "--file", "-f", help="Additional files to merge"
         ),
         output: Optional[Path] = typer.Option(
-            None, "--output", "-o", help="Output file path"
+            None, "--output", "-o", help="Output file path ('-' for stdout)"
         ),
         docs: bool = typer.Option(
             False, "--docs", help="Include Markdown files in the merge"
@@ -215,33 +790,164 @@ def add_merge_files(app: typer.Typer, name: str) -> None:
             "--char-count",
             help="Prepend each file name with its character count",
         ),
+        jobs: int = typer.Option(
+            DEFAULT_JOBS,
+            "--jobs",
+            "-j",
+            min=1,
+            help="Number of threads reading files concurrently",
+        ),
+        use_cache: bool = typer.Option(
+            True,
+            "--cache/--no-cache",
+            help="Reuse file contents of unchanged blobs from the local cache",
+        ),
+        max_tokens: Optional[int] = typer.Option(
+            None,
+            "--max-tokens",
+            min=1,
+            help="Fit the output into roughly this many LLM tokens",
+        ),
+        priority: List[str] = typer.Option(
+            [],
+            "--priority",
+            help="Glob patterns of files to keep first under --max-tokens",
+        ),
+        order: str = typer.Option(
+            "size",
+            "--order",
+            help=f"Order files are kept in under --max-tokens: {', '.join(BUDGET_ORDERS)}",
+        ),
+        output_format: str = typer.Option(
+            "text",
+            "--format",
+            help="Output format: text, or an indexed gzip or zstd archive",
+        ),
+        rev: Optional[str] = typer.Option(
+            None,
+            "--rev",
+            help=f"Merge files of this commit ('{INDEX_REV}' for the index) "
+            "instead of the working tree",
+        ),
+        since: Optional[str] = typer.Option(
+            None,
+            "--since",
+            help="Only merge files changed between REV's merge base and HEAD",
+        ),
+        staged: bool = typer.Option(
+            False, "--staged", help="Only merge files with staged changes"
+        ),
+        unstaged: bool = typer.Option(
+            False, "--unstaged", help="Only merge files with unstaged changes"
+        ),
+        related: List[str] = typer.Option(
+            [],
+            "--related",
+            help="With --since/--staged/--unstaged, also merge related files: "
+            "dir (same directory) or name (same module name, e.g. tests)",
+        ),
+        roots: List[Path] = typer.Option(
+            [],
+            "--root",
+            help="Only merge files under this path (repeatable); git only "
+            "lists these subtrees",
+        ),
     ) -> None:
         """Merge files tracked by Git and additional files."""
         seperator = "-" * 10
+        header = "\n\n\n" + seperator + "Merged Files" + seperator + "\n\n\n"
 
-        merged_content = (
-            "\n\n\n"
-            + seperator
-            + "Merged Files"
-            + seperator
-            + "\n\n\n"
-            + merge_files(
+        if order not in BUDGET_ORDERS:
+            raise typer.BadParameter(
+                f"must be one of {', '.join(BUDGET_ORDERS)}", param_hint="--order"
+            )
+
+        if output_format not in ("text", *ARCHIVE_CODECS):
+            raise typer.BadParameter(
+                f"must be one of text, {', '.join(ARCHIVE_CODECS)}",
+                param_hint="--format",
+            )
+        if output_format != "text" and output == Path("-"):
+            raise typer.BadParameter(
+                "archives can't be written to stdout", param_hint="--output"
+            )
+
+        if rev not in (None, INDEX_REV) and not _is_tree_ish(directory, rev):
+            raise typer.BadParameter(f"unknown revision {rev!r}", param_hint="--rev")
+
+        changes = ChangeScope(since, staged, unstaged, tuple(related))
+        for mode in related:
+            if mode not in RELATED_MODES:
+                raise typer.BadParameter(
+                    f"must be one of {', '.join(RELATED_MODES)}",
+                    param_hint="--related",
+                )
+        if related and not changes:
+            raise typer.BadParameter(
+                "needs --since, --staged or --unstaged", param_hint="--related"
+            )
+        if since is not None and not _is_tree_ish(directory, since):
+            raise typer.BadParameter(
+                f"unknown revision {since!r}", param_hint="--since"
+            )
+
+        try:
+            scope = normalize_roots(directory, [str(root) for root in roots])
+        except ValueError as e:
+            raise typer.BadParameter(str(e), param_hint="--root")
+
+        cache = None
+        if use_cache:
+            try:
+                cache = open_merge_cache()
+            except Exception as e:
+                logger.warning(f"Merge cache unavailable, reading all files: {e}")
+
+        def parts(raw: bool) -> Iterator[MergePart]:
+            return iter_merge_parts(
                 directory=directory,
                 exclude_patterns=exclude,
                 include_patterns=include,
                 additional_files=files,
                 include_docs=docs,
                 char_count=char_count,
+                jobs=jobs,
+                cache=cache,
+                max_tokens=max_tokens,
+                priority_patterns=priority,
+                budget_order=order,
+                raw=raw,
+                blob_ids=output_format != "text",
+                rev=rev,
+                changes=changes or None,
+                roots=scope,
             )
-        )
 
-        if output:
-            write_file(output, merged_content)
+        def sections(raw: bool) -> Iterator[MergeChunk]:
+            return chain(
+                [header], (chunk for part in parts(raw) for chunk in part.chunks)
+            )
+
+        if output_format != "text":
+            archive = output or Path(
+                get_temp_file_path("merged_files.txt" + ARCHIVE_CODECS[output_format])
+            )
+            try:
+                write_merge_archive(archive, parts(raw=True), codec=output_format)
+            except ImportError as e:
+                raise typer.BadParameter(str(e), param_hint="--format")
+        elif output == Path("-"):
+            write_merged_files(sys.stdout, cast(Iterator[str], sections(raw=False)))
+            sys.stdout.flush()
+        elif output:
+            # Large files are copied into real files by the kernel, undecoded
+            with open(output, "wb") as out:
+                write_merged_bytes(out, sections(raw=True))
             logger.info(f"Merged content written to {output}")
         else:
-            # Create temp file and open in VS Code
-            temp_file = create_temp_file(
-                filename="merged_files.txt", content=merged_content
-            )
+            # Stream into the temp file and open in VS Code
+            temp_file = get_temp_file_path("merged_files.txt")
+            with open(temp_file, "wb") as out:
+                write_merged_bytes(out, sections(raw=True))
             logger.info(f"Merged content available at {temp_file}")
             vscode_utils.open_file_with_vscode(temp_file)
@@ -0,0 +1,447 @@
+import codecs
+import io
+import mmap
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+from typing import (
+    IO,
+    BinaryIO,
+    Callable,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
+
+from app.adapters.base.merge_cache import cache_key, decode_entry, encode_entry
+from app.adapters.base.merge_writer import ByteRange
+from app.frameworks.logger import setup_logger as get_logger
+from app.tools.disk_cache import DiskCache
+
+logger = get_logger(__name__)
+
+# Same window is_binary_file() sniffs for NUL bytes
+BINARY_SNIFF_BYTES = 8192
+# Decoded contents stay in memory up to this size before spilling to disk
+SPILL_MEMORY_LIMIT = 32 * 1024 * 1024
+# Files at least this large are validated in place and copied verbatim when the
+# output is a real file, instead of being decoded and re-encoded
+ZERO_COPY_MIN_BYTES = 1024 * 1024
+RAW_VALIDATE_CHUNK_BYTES = 1024 * 1024
+# Same default as ThreadPoolExecutor; reading is I/O bound, not CPU bound
+DEFAULT_JOBS = min(32, (os.cpu_count() or 1) + 4)
+# How many reads each worker may run ahead of the (ordered) consumer
+READ_AHEAD_PER_WORKER = 4
+# Files looked up in (and written to) the content cache per round trip
+CACHE_BATCH_SIZE = 1024
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class IngestedFile:
+    """Result of reading a single file once for the merge."""
+
+    path: Path
+    full_path: Path
+    binary: bool = False
+    error: Optional[str] = None
+    char_count: int = 0
+    offset: int = 0
+    length: int = 0
+    # Set when the content is used verbatim from this file instead of the spill
+    source: Optional[Path] = None
+    # Modification time, when already known from the index
+    mtime: Optional[float] = None
+
+    @property
+    def mergeable(self) -> bool:
+        """Whether the file has content that can be written to the merge."""
+        return not self.binary and self.error is None
+
+
+class SpillBuffer:
+    """
+    Append-only scratch storage for decoded file contents.
+
+    Contents are kept as UTF-8 in memory until max_memory is exceeded, then
+    rolled over to an anonymous temporary file instead of growing the heap.
+    """
+
+    def __init__(self, max_memory: int = SPILL_MEMORY_LIMIT) -> None:
+        self._max_memory = max_memory
+        self._file: IO[bytes] = io.BytesIO()
+        self._rolled = False
+        self._size = 0
+
+    def append(self, text: str) -> Tuple[int, int]:
+        """
+        Store text at the end of the buffer.
+
+        Args:
+            text (str): The decoded content to store
+
+        Returns:
+            Tuple[int, int]: The byte offset and byte length of the stored text
+        """
+        return self.append_bytes(text.encode("utf-8"))
+
+    def append_bytes(self, data: Union[bytes, memoryview]) -> Tuple[int, int]:
+        """Store already UTF-8 encoded text; see append()."""
+        offset = self._size
+        if not self._rolled and offset + len(data) > self._max_memory:
+            self._roll_over()
+        self._file.seek(offset)
+        self._file.write(data)
+        self._size += len(data)
+        return offset, len(data)
+
+    def read(self, offset: int, length: int) -> str:
+        """Read back text previously stored with append()."""
+        self._file.seek(offset)
+        return self._file.read(length).decode("utf-8")
+
+    def byte_range(self, offset: int, length: int) -> ByteRange:
+        """Refer to stored bytes so a writer can copy them without decoding."""
+        return ByteRange(self._file, offset, length)
+
+    def close(self) -> None:
+        """Release the underlying memory or temporary file."""
+        self._file.close()
+
+    def _roll_over(self) -> None:
+        disk = tempfile.TemporaryFile(mode="w+b")
+        if isinstance(self._file, io.BytesIO):
+            disk.write(self._file.getbuffer())
+        self._file.close()
+        self._file = disk
+        self._rolled = True
+
+    def __enter__(self) -> "SpillBuffer":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+class ReadResult(NamedTuple):
+    """Outcome of reading one file."""
+
+    binary: bool
+    text: Optional[str] = None
+    error: Optional[str] = None
+    # Set when the file's bytes are valid, CR-free UTF-8 that is used verbatim
+    # from disk; holds the character count and text stays None
+    raw_chars: Optional[int] = None
+    raw_size: int = 0
+
+
+def decode_text(data: bytes) -> str:
+    """
+    Decode file bytes the same way read_file() does.
+
+    Applies UTF-8 decoding and universal newline translation, so the result is
+    identical to reading the file in text mode.
+
+    Raises:
+        UnicodeDecodeError: If the data is not valid UTF-8
+    """
+    text = data.decode("utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def read_text(full_path: Path, raw_min_bytes: Optional[int] = None) -> ReadResult:
+    """
+    Open a file once, sniff it for binary content and decode it.
+
+    Unreadable files are reported as binary, matching is_binary_file().
+
+    With raw_min_bytes, files at least that large are memory-mapped and only
+    validated instead of decoded: if they are CR-free UTF-8 their bytes on disk
+    are exactly what the merge needs, so the writer can copy them verbatim.
+    Files that fail validation take the normal decoding path.
+
+    Args:
+        full_path (Path): The file to read
+        raw_min_bytes (Optional[int]): Size from which files may be used verbatim
+
+    Returns:
+        ReadResult: The classification and the text (or raw character count)
+    """
+    try:
+        with open(full_path, "rb") as file:
+            if raw_min_bytes is not None:
+                size = os.fstat(file.fileno()).st_size
+                if size >= raw_min_bytes:
+                    raw = _read_raw(file, size)
+                    if raw is not None:
+                        return raw
+                    file.seek(0)
+            data = file.read()
+    except OSError:
+        return ReadResult(binary=True)
+    return classify_bytes(data)
+
+
+def classify_bytes(data: bytes) -> ReadResult:
+    """Sniff already loaded file content for binary data and decode it."""
+    if b"\x00" in data[:BINARY_SNIFF_BYTES]:
+        return ReadResult(binary=True)
+
+    try:
+        return ReadResult(binary=False, text=decode_text(data))
+    except UnicodeDecodeError as e:
+        return ReadResult(binary=False, error=str(e))
+
+
+def _read_raw(file: BinaryIO, size: int) -> Optional[ReadResult]:
+    """
+    Validate a large file in place for verbatim use.
+
+    Returns None when the file needs decoding (CRs or invalid UTF-8), so the
+    caller falls back to the decoding path.
+    """
+    try:
+        view = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    with view:
+        if view.find(b"\x00", 0, BINARY_SNIFF_BYTES) != -1:
+            return ReadResult(binary=True)
+        if view.find(b"\r") != -1:
+            return None
+
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        chars = 0
+        try:
+            for start in range(0, size, RAW_VALIDATE_CHUNK_BYTES):
+                chunk = view[start : start + RAW_VALIDATE_CHUNK_BYTES]
+                if chunk.isascii() and not decoder.getstate()[0]:
+                    chars += len(chunk)
+                else:
+                    chars += len(decoder.decode(chunk))
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return None
+    return ReadResult(binary=False, raw_chars=chars, raw_size=size)
+
+
+def read_content(entry: IngestedFile, spill: SpillBuffer) -> str:
+    """Get an ingested file's text, wherever it is stored."""
+    if entry.source is not None:
+        with open(entry.source, "rb") as file:
+            return file.read(entry.length).decode("utf-8")
+    return spill.read(entry.offset, entry.length)
+
+
+def content_range(entry: IngestedFile, spill: SpillBuffer) -> ByteRange:
+    """Refer to an ingested file's UTF-8 bytes, wherever they are stored."""
+    if entry.source is not None:
+        return ByteRange(entry.source, 0, entry.length)
+    return spill.byte_range(entry.offset, entry.length)
+
+
+def ordered_map(fn: Callable[[T], R], items: Iterable[T], jobs: int) -> Iterator[R]:
+    """
+    Apply fn to items on a thread pool, yielding results in input order.
+
+    At most jobs * READ_AHEAD_PER_WORKER calls are in flight, so results never
+    pile up in memory when the consumer is slower than the workers.
+
+    Args:
+        fn (Callable[[T], R]): The function to apply
+        items (Iterable[T]): The inputs
+        jobs (int): Number of worker threads; 1 or less runs serially
+
+    Yields:
+        R: fn(item) for each item, in the order of items
+    """
+    if jobs <= 1:
+        yield from map(fn, items)
+        return
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        pending: Deque[Future[R]] = deque()
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= jobs * READ_AHEAD_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def ingest_file(path: Path, full_path: Path, spill: SpillBuffer) -> IngestedFile:
+    """
+    Read a file exactly once and keep its decoded content in the spill buffer.
+
+    Args:
+        path (Path): The path shown in the merged output
+        full_path (Path): The path used to open the file
+        spill (SpillBuffer): Where the decoded content is stored
+
+    Returns:
+        IngestedFile: Classification, character count and spill location
+    """
+    return _store(path, full_path, read_text(full_path), spill)[0]
+
+
+def ingest_files(
+    files: Iterable[Tuple[Path, Path]],
+    spill: SpillBuffer,
+    jobs: int = DEFAULT_JOBS,
+    cache: Optional[DiskCache] = None,
+    blob_ids: Optional[Mapping[Path, str]] = None,
+    raw_min_bytes: Optional[int] = None,
+) -> Iterator[IngestedFile]:
+    """
+    Read many files concurrently, storing them in the spill buffer in order.
+
+    Sniffing and decoding run on worker threads; only appending to the spill
+    buffer happens on the calling thread, so the output order (and therefore
+    the merged output) is identical to a serial run.
+
+    With a cache, files that have a blob OID are looked up by that OID first
+    and only cache misses are opened; their results are written back.
+
+    Args:
+        files (Iterable[Tuple[Path, Path]]): (display path, full path) pairs
+        spill (SpillBuffer): Where the decoded contents are stored
+        jobs (int): Number of reader threads
+        cache (Optional[DiskCache]): Content cache keyed by blob OID
+        blob_ids (Optional[Mapping[Path, str]]): Blob OIDs by display path
+        raw_min_bytes (Optional[int]): Size from which files are validated and
+            referenced on disk instead of being decoded into the spill buffer
+
+    Yields:
+        IngestedFile: One entry per input file, in input order
+    """
+    files = list(files)
+
+    def read(pair: Tuple[Path, Path]) -> ReadResult:
+        return read_text(pair[1], raw_min_bytes)
+
+    if cache is None or not blob_ids:
+        results = ordered_map(read, files, jobs)
+        for (path, full_path), result in zip(files, results):
+            yield _store(path, full_path, result, spill)[0]
+        return
+
+    hits = misses = 0
+    for start in range(0, len(files), CACHE_BATCH_SIZE):
+        batch = files[start : start + CACHE_BATCH_SIZE]
+        keys = {
+            path: cache_key(blob_ids[path]) for path, _ in batch if path in blob_ids
+        }
+        cached = cache.get_many(keys.values())
+        to_read = [pair for pair in batch if keys.get(pair[0]) not in cached]
+        results = ordered_map(read, to_read, jobs)
+
+        new_entries: List[Tuple[str, bytes]] = []
+        for path, full_path in batch:
+            key = keys.get(path)
+            value = cached.get(key) if key else None
+            if value is not None:
+                hits += 1
+                yield _restore(path, full_path, value, spill)
+                continue
+
+            misses += 1
+            entry, data = _store(path, full_path, next(results), spill)
+            if key and data is not None:
+                new_entries.append(
+                    (
+                        key,
+                        encode_entry(entry.binary, entry.error, entry.char_count, data),
+                    )
+                )
+            yield entry
+        cache.set_many(new_entries)
+
+    logger.debug("merge.cache", hits=hits, misses=misses)
+
+
+def ingest_contents(
+    files: Iterable[Tuple[Path, Path]],
+    contents: Iterable[Optional[bytes]],
+    spill: SpillBuffer,
+) -> Iterator[IngestedFile]:
+    """
+    Store contents that were loaded elsewhere, e.g. blobs read from Git.
+
+    Args:
+        files (Iterable[Tuple[Path, Path]]): (display path, full path) pairs
+        contents (Iterable[Optional[bytes]]): Each file's bytes, or None if it
+            couldn't be read
+        spill (SpillBuffer): Where the decoded contents are stored
+
+    Yields:
+        IngestedFile: One entry per input file, in input order
+    """
+    for (path, full_path), data in zip(files, contents):
+        result = ReadResult(binary=True) if data is None else classify_bytes(data)
+        yield _store(path, full_path, result, spill)[0]
+
+
+def _store(
+    path: Path, full_path: Path, result: ReadResult, spill: SpillBuffer
+) -> Tuple[IngestedFile, Optional[bytes]]:
+    """
+    Turn a read_text() result into an IngestedFile, spilling its text.
+
+    Returns the stored bytes alongside, or None for files used verbatim from
+    disk, which are not cached since their bytes were never read into memory.
+    """
+    entry = IngestedFile(
+        path=path, full_path=full_path, binary=result.binary, error=result.error
+    )
+    if result.error is not None:
+        logger.error(f"Error reading file {full_path}: {result.error}")
+    if result.raw_chars is not None:
+        entry.source = full_path
+        entry.char_count = result.raw_chars
+        entry.length = result.raw_size
+        return entry, None
+    data = b""
+    if result.text is not None:
+        data = result.text.encode("utf-8")
+        entry.char_count = len(result.text)
+        entry.offset, entry.length = spill.append_bytes(data)
+    return entry, data
+
+
+def _restore(
+    path: Path, full_path: Path, value: bytes, spill: SpillBuffer
+) -> IngestedFile:
+    """Turn a cached entry into an IngestedFile without opening the file."""
+    binary, error, char_count, data = decode_entry(value)
+    entry = IngestedFile(
+        path=path,
+        full_path=full_path,
+        binary=binary,
+        error=error,
+        char_count=char_count,
+    )
+    if entry.mergeable:
+        entry.offset, entry.length = spill.append_bytes(data)
+    return entry
@@ -0,0 +1,167 @@
+import posixpath
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Collection, Dict, List, Optional, Set, Tuple
+
+from app.frameworks.logger import setup_logger as get_logger
+
+logger = get_logger(__name__)
+
+# How files related to a changed file are found
+RELATED_MODES = ("dir", "name")
+# Module names too generic to relate files by (every package has one)
+GENERIC_MODULE_NAMES = {"__init__", "__main__", "index", "main", "mod", "conftest"}
+_TEST_PREFIXES = ("test_",)
+_TEST_SUFFIXES = ("_test", "_tests", "_spec")
+
+
+@dataclass(frozen=True)
+class ChangeScope:
+    """
+    Restricts a merge to changed files, and optionally files related to them.
+
+    The sources are combined: a file is selected if it changed in any of them.
+    """
+
+    # Files changed between the merge base of this commit and HEAD
+    since: Optional[str] = None
+    # Files with staged changes
+    staged: bool = False
+    # Files with unstaged changes in the working tree
+    unstaged: bool = False
+    # Also select related files: "dir" for files in the same directory, "name"
+    # for files with the same module name (e.g. foo.py and test_foo.py)
+    related: Tuple[str, ...] = ()
+
+    def __bool__(self) -> bool:
+        return bool(self.since or self.staged or self.unstaged)
+
+    def changed_paths(
+        self, directory: Path, roots: Optional[List[str]] = None
+    ) -> Set[str]:
+        """
+        List changed files that still exist, relative to directory.
+
+        Args:
+            directory (Path): The directory whose changes are listed
+            roots (Optional[List[str]]): Only list changes in these subtrees
+
+        Returns:
+            Set[str]: '/'-separated paths relative to directory
+
+        Raises:
+            ValueError: If since can't be resolved
+        """
+        queries: List[List[str]] = []
+        if self.since:
+            queries.append([f"{self.since}...HEAD"])
+        if self.staged:
+            queries.append(["--cached"])
+        if self.unstaged:
+            queries.append([])
+
+        paths: Set[str] = set()
+        pathspecs = [f":(literal){root}" for root in roots or []]
+        for args in queries:
+            paths.update(_diff_names(directory, args, pathspecs))
+        return paths
+
+    def select(
+        self,
+        directory: Path,
+        tracked: Collection[str],
+        roots: Optional[List[str]] = None,
+    ) -> Set[str]:
+        """
+        Choose the tracked files this scope covers.
+
+        Args:
+            directory (Path): The directory being merged
+            tracked (Collection[str]): '/'-separated tracked paths relative to
+                directory, used to find related files
+            roots (Optional[List[str]]): Only look for changes in these
+                subtrees, relative to directory
+
+        Returns:
+            Set[str]: The selected paths, a subset of tracked
+
+        Raises:
+            ValueError: If since can't be resolved
+        """
+        tracked_set = set(tracked)
+        changed = self.changed_paths(directory, roots) & tracked_set
+        selected = set(changed)
+        if "dir" in self.related:
+            dirs = {posixpath.dirname(path) for path in changed}
+            selected.update(
+                path for path in tracked_set if posixpath.dirname(path) in dirs
+            )
+        if "name" in self.related:
+            by_name: Dict[str, List[str]] = {}
+            for path in tracked_set:
+                by_name.setdefault(module_name(path), []).append(path)
+            for path in changed:
+                name = module_name(path)
+                if name and name not in GENERIC_MODULE_NAMES:
+                    selected.update(by_name.get(name, []))
+
+        logger.info(
+            f"Selected {len(changed)} changed files"
+            + (
+                f" and {len(selected) - len(changed)} related files"
+                if self.related
+                else ""
+            )
+        )
+        return selected
+
+
+def module_name(path: str) -> str:
+    """
+    The module a file belongs to, ignoring extensions and test affixes.
+
+    `src/foo.py`, `tests/test_foo.py`, `foo_test.go` and `foo.spec.ts` all
+    belong to `foo`.
+    """
+    name = posixpath.basename(path).split(".", 1)[0].lower()
+    for prefix in _TEST_PREFIXES:
+        if name.startswith(prefix) and len(name) > len(prefix):
+            name = name[len(prefix) :]
+    for suffix in _TEST_SUFFIXES:
+        if name.endswith(suffix) and len(name) > len(suffix):
+            name = name[: -len(suffix)]
+            break
+    return name
+
+
+def _diff_names(
+    directory: Path, args: List[str], pathspecs: Optional[List[str]] = None
+) -> List[str]:
+    """Run `git diff --name-only` restricted to directory, without deletions."""
+    result = subprocess.run(
+        [
+            "git",
+            "diff",
+            "--name-only",
+            "-z",
+            "--relative",
+            "--diff-filter=d",
+            "--no-renames",
+            *args,
+            "--",
+            *(pathspecs or []),
+        ],
+        capture_output=True,
+        cwd=directory,
+    )
+    if result.returncode != 0:
+        raise ValueError(
+            f"Can't list changes ({' '.join(args) or 'working tree'}): "
+            f"{result.stderr.decode(errors='replace').strip()}"
+        )
+    return [
+        path
+        for path in result.stdout.decode("utf-8", errors="surrogateescape").split("\0")
+        if path
+    ]
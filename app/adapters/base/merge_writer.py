@@ -0,0 +1,160 @@
+import io
+import os
+from pathlib import Path
+from typing import IO, BinaryIO, Iterable, NamedTuple, Optional, TextIO, Tuple, Union
+
+from app.frameworks.logger import setup_logger as get_logger
+
+logger = get_logger(__name__)
+
+# Chunk size for the read/write fallback when the kernel can't copy for us
+COPY_CHUNK_BYTES = 1024 * 1024
+
+
+class ByteRange(NamedTuple):
+    """A run of UTF-8 bytes written to the merge verbatim, without decoding."""
+
+    # A file on disk, or an already open binary stream
+    source: Union[Path, IO[bytes]]
+    offset: int
+    length: int
+
+
+MergeChunk = Union[str, ByteRange]
+
+
+class MergePart(NamedTuple):
+    """One section of the merged output: the directory structure or one file."""
+
+    header: str
+    content: MergeChunk
+    footer: str
+    # The merged file, or None for the directory structure
+    path: Optional[Path] = None
+    # Blob OID of the merged file, when known
+    oid: Optional[str] = None
+    # Characters in content
+    chars: int = 0
+    # Whether content was cut short to fit the token budget
+    truncated: bool = False
+
+    @property
+    def chunks(self) -> Tuple[MergeChunk, MergeChunk, MergeChunk]:
+        """The section's pieces in output order."""
+        return (self.header, self.content, self.footer)
+
+
+def write_merged_files(stream: TextIO, sections: Iterable[str]) -> int:
+    """
+    Stream merged output sections into an open text stream.
+
+    Args:
+        stream (TextIO): The destination, e.g. an open file or sys.stdout
+        sections (Iterable[str]): Pieces produced by iter_merge_sections()
+
+    Returns:
+        int: The number of characters written
+    """
+    written = 0
+    for section in sections:
+        written += stream.write(section)
+    return written
+
+
+def write_merged_bytes(out: BinaryIO, chunks: Iterable[MergeChunk]) -> int:
+    """
+    Stream merged output into a binary file, splicing file bodies in the kernel.
+
+    Text chunks are encoded and written normally. ByteRange chunks are copied
+    with os.copy_file_range() or os.sendfile() where the platform and both
+    files allow it, falling back to a plain read/write loop.
+
+    Args:
+        out (BinaryIO): The destination file, opened in binary write mode
+        chunks (Iterable[MergeChunk]): Pieces produced by iter_merge_sections()
+            with raw=True
+
+    Returns:
+        int: The number of bytes written
+    """
+    written = 0
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            written += out.write(chunk.encode("utf-8"))
+        else:
+            _copy_range(out, chunk)
+            written += chunk.length
+    return written
+
+
+def _copy_range(out: BinaryIO, chunk: ByteRange) -> None:
+    """Append chunk's bytes to out."""
+    if isinstance(chunk.source, Path):
+        with open(chunk.source, "rb") as source:
+            _copy_from(out, source, chunk.offset, chunk.length)
+    else:
+        _copy_from(out, chunk.source, chunk.offset, chunk.length)
+
+
+def _copy_from(out: BinaryIO, source: IO[bytes], offset: int, length: int) -> None:
+    if isinstance(source, io.BytesIO):
+        out.write(source.getbuffer()[offset : offset + length])
+        return
+
+    copied = 0
+    # Wrappers like GzipFile expose the fileno() of the file they write to,
+    # so only let the kernel write into plain files
+    if isinstance(out, (io.FileIO, io.BufferedWriter, io.BufferedRandom)):
+        out.flush()
+        position = out.tell()
+        try:
+            copied = _kernel_copy(
+                source.fileno(), out.fileno(), offset, length, position
+            )
+        except (OSError, io.UnsupportedOperation) as e:
+            logger.debug(f"Kernel copy unavailable, copying through userspace: {e}")
+            copied = 0
+        out.seek(position + copied)
+
+    source.seek(offset + copied)
+    remaining = length - copied
+    while remaining > 0:
+        data = source.read(min(COPY_CHUNK_BYTES, remaining))
+        if not data:
+            raise OSError(f"{source} ended before {length} bytes were copied")
+        out.write(data)
+        remaining -= len(data)
+
+
+def _kernel_copy(
+    source_fd: int, out_fd: int, offset: int, length: int, position: int
+) -> int:
+    """Copy as much as the kernel can without passing data through Python."""
+    copied = 0
+    if hasattr(os, "copy_file_range"):
+        try:
+            while copied < length:
+                n = os.copy_file_range(
+                    source_fd,
+                    out_fd,
+                    length - copied,
+                    offset + copied,
+                    position + copied,
+                )
+                if n == 0:
+                    break
+                copied += n
+            return copied
+        except OSError:
+            if copied:
+                return copied
+
+    if hasattr(os, "sendfile"):
+        # sendfile() writes at the output's file position
+        os.lseek(out_fd, position, os.SEEK_SET)
+        while copied < length:
+            n = os.sendfile(out_fd, source_fd, offset + copied, length - copied)
+            if n == 0:
+                break
+            copied += n
+    return copied
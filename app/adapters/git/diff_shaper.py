@@ -0,0 +1,276 @@
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from typing import Iterable, List, Optional, Tuple
+
+from app.tools.token_estimator import estimate_tokens
+
+# 프롬프트에 넣을 diff 전체의 토큰 예산
+DEFAULT_MAX_DIFF_TOKENS = 12_000
+# 이보다 큰 hunk는 추가/삭제 줄 수 요약으로 대체
+DEFAULT_MAX_HUNK_TOKENS = 1_500
+# 이보다 긴 줄이 추가되면 minified 파일로 간주
+MINIFIED_LINE_CHARS = 500
+# 추가된 내용의 앞부분에서 생성된 파일 표시를 찾는 줄 수
+GENERATED_MARKER_LINES = 20
+
+LOCK_FILES = {
+    "package-lock.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "uv.lock",
+    "poetry.lock",
+    "Pipfile.lock",
+    "Cargo.lock",
+    "Gemfile.lock",
+    "composer.lock",
+    "go.sum",
+    ".terraform.lock.hcl",
+}
+GENERATED_PATTERNS = [
+    "*.min.js",
+    "*.min.css",
+    "*.map",
+    "*.pb.go",
+    "*_pb2.py",
+    "*_pb2_grpc.py",
+    "*.generated.*",
+    "*.snap",
+    "vendor/*",
+    "*/vendor/*",
+    "node_modules/*",
+    "dist/*",
+]
+GENERATED_MARKERS = ("@generated", "DO NOT EDIT", "auto-generated", "autogenerated")
+
+
+@dataclass
+class ShapedDiff:
+    """프롬프트 예산에 맞게 줄인 diff와 통계."""
+
+    text: str
+    original_bytes: int = 0
+    original_lines: int = 0
+    tokens: int = 0
+    files: int = 0
+    # 생성된 파일/lock 파일로 판단해 내용을 생략한 파일 수
+    generated: int = 0
+    # 요약으로 대체한 hunk 수
+    omitted_hunks: int = 0
+    # 예산을 넘어 numstat 요약으로만 남긴 파일 수
+    summarized: int = 0
+
+
+@dataclass
+class _Hunk:
+    header: str
+    lines: List[str] = field(default_factory=list)
+    added: int = 0
+    removed: int = 0
+    tokens: int = 0
+    omitted: bool = False
+
+    def render(self) -> str:
+        if self.omitted:
+            return (
+                f"{self.header.rstrip()} "
+                f"[hunk omitted: +{self.added} -{self.removed} lines]\n"
+            )
+        return self.header + "".join(self.lines)
+
+
+@dataclass
+class _FileDiff:
+    path: str
+    header: List[str] = field(default_factory=list)
+    hunks: List[_Hunk] = field(default_factory=list)
+    added: int = 0
+    removed: int = 0
+    generated: Optional[str] = None
+    # 헤더와 남긴 hunk의 토큰 수 (생략한 hunk의 요약 줄은 제외한 근사치)
+    tokens: int = 0
+    # 읽은 hunk 수 (예산을 넘어 hunk를 버린 뒤에도 유지)
+    hunk_count: int = 0
+    # 남은 예산에 들어가지 않아 hunk 내용을 더 모으지 않는 파일
+    over_budget: bool = False
+
+    def render(self) -> str:
+        header = "".join(self.header)
+        if self.generated:
+            return (
+                f"{header}[{self.generated} omitted: "
+                f"+{self.added} -{self.removed} lines]\n"
+            )
+        return header + "".join(hunk.render() for hunk in self.hunks)
+
+
+class DiffShaper:
+    """`git diff` 출력을 파일 단위로 읽으며 프롬프트 예산에 맞게 줄이는 클래스.
+
+    - lock 파일, minified 파일, 생성된 파일은 내용 대신 줄 수만 남깁니다.
+    - max_hunk_tokens보다 큰 hunk는 hunk 헤더와 줄 수 요약으로 대체합니다.
+    - 전체 예산을 넘는 파일은 마지막에 `--numstat` 형식의 요약으로만 남깁니다.
+
+    내용을 생략하기로 한 hunk와 파일은 줄 수만 셉니다. 현재 파일의 hunk는 남은
+    예산을 넘는 순간 버리고, 예산을 넘은 파일은 경로와 줄 수만 남기므로
+    메모리에는 예산 안에 들어간 출력과 그만큼의 현재 파일 내용만 쌓입니다.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = DEFAULT_MAX_DIFF_TOKENS,
+        max_hunk_tokens: int = DEFAULT_MAX_HUNK_TOKENS,
+    ) -> None:
+        """초기화.
+
+        Args:
+            max_tokens: diff 전체의 토큰 예산
+            max_hunk_tokens: hunk 하나의 최대 토큰 수
+        """
+        self.max_tokens = max_tokens
+        self.max_hunk_tokens = max_hunk_tokens
+
+    def shape(self, lines: Iterable[str]) -> ShapedDiff:
+        """diff 줄들을 읽어 예산에 맞게 줄이기.
+
+        Args:
+            lines: 줄바꿈이 포함된 `git diff` 출력 줄들
+
+        Returns:
+            줄인 diff와 통계
+        """
+        stats = ShapedDiff(text="")
+        sections: List[str] = []
+        # 예산을 넘은 파일의 (경로, 추가 줄 수, 삭제 줄 수)
+        summarized: List[Tuple[str, int, int]] = []
+        used = 0
+
+        def finish(file: Optional[_FileDiff]) -> None:
+            nonlocal used
+            if file is None:
+                return
+            stats.files += 1
+            if file.generated:
+                stats.generated += 1
+            if not file.over_budget and used + file.tokens <= self.max_tokens:
+                section = file.render()
+                tokens = estimate_tokens(section)
+                if used + tokens <= self.max_tokens:
+                    sections.append(section)
+                    used += tokens
+                    stats.omitted_hunks += sum(hunk.omitted for hunk in file.hunks)
+                    return
+            summarized.append((file.path, file.added, file.removed))
+            if not file.generated:
+                stats.omitted_hunks += file.hunk_count
+
+        file: Optional[_FileDiff] = None
+        hunk: Optional[_Hunk] = None
+        for line in lines:
+            stats.original_bytes += len(line.encode("utf-8", "surrogateescape"))
+            stats.original_lines += 1
+
+            if line.startswith("diff --git "):
+                finish(file)
+                file = _FileDiff(
+                    path=_diff_path(line), header=[line], tokens=estimate_tokens(line)
+                )
+                file.generated = _generated_reason(file.path)
+                hunk = None
+                continue
+            if file is None:
+                continue
+
+            if line.startswith("@@"):
+                hunk = _Hunk(header=line, tokens=estimate_tokens(line))
+                file.hunk_count += 1
+                if not file.generated and not file.over_budget:
+                    file.hunks.append(hunk)
+                    file.tokens += hunk.tokens
+                continue
+            if hunk is None:
+                # 파일 헤더 (index, ---/+++ 줄, Binary files ... differ 등)
+                file.header.append(line)
+                file.tokens += estimate_tokens(line)
+                continue
+
+            if line.startswith("+"):
+                hunk.added += 1
+                file.added += 1
+                if not file.generated:
+                    file.generated = _content_reason(line, file.added)
+                    if file.generated:
+                        file.hunks.clear()
+                        file.tokens = estimate_tokens("".join(file.header))
+            elif line.startswith("-"):
+                hunk.removed += 1
+                file.removed += 1
+
+            if file.generated or file.over_budget or hunk.omitted:
+                continue
+            line_tokens = estimate_tokens(line)
+            hunk.tokens += line_tokens
+            if hunk.tokens > self.max_hunk_tokens:
+                hunk.omitted = True
+                # 지금까지 남긴 줄은 요약 한 줄로 바뀜
+                file.tokens -= hunk.tokens - line_tokens - estimate_tokens(hunk.header)
+                hunk.lines.clear()
+                continue
+            hunk.lines.append(line)
+            file.tokens += line_tokens
+            if used + file.tokens > self.max_tokens:
+                # 이 파일은 요약으로만 남으므로 모은 hunk를 바로 버림
+                file.over_budget = True
+                file.hunks.clear()
+        finish(file)
+
+        if summarized:
+            stats.summarized = len(summarized)
+            summary = [
+                f"[{len(summarized)} more files summarized to fit the prompt budget]\n"
+            ]
+            used += estimate_tokens(summary[0])
+            for index, (path, added, removed) in enumerate(summarized):
+                line = f"{added}\t{removed}\t{path}\n"
+                tokens = estimate_tokens(line)
+                if used + tokens > self.max_tokens:
+                    rest = summarized[index:]
+                    summary.append(
+                        f"... and {len(rest)} more files "
+                        f"(+{sum(added for _, added, _ in rest)} "
+                        f"-{sum(removed for _, _, removed in rest)} lines)\n"
+                    )
+                    break
+                summary.append(line)
+                used += tokens
+            sections.append("".join(summary))
+
+        stats.text = "".join(sections).rstrip("\n")
+        stats.tokens = estimate_tokens(stats.text)
+        return stats
+
+
+def _diff_path(header: str) -> str:
+    """`diff --git a/<path> b/<path>` 줄에서 경로 추출."""
+    _, _, path = header.rstrip("\n").rpartition(" b/")
+    return path.strip('"')
+
+
+def _generated_reason(path: str) -> Optional[str]:
+    """경로만 보고 lock 파일이나 생성된 파일인지 판단."""
+    name = path.rsplit("/", 1)[-1]
+    if name in LOCK_FILES:
+        return "lock file"
+    if any(fnmatch(path, pattern) for pattern in GENERATED_PATTERNS):
+        return "generated file"
+    return None
+
+
+def _content_reason(line: str, added: int) -> Optional[str]:
+    """추가된 줄을 보고 minified 파일이나 생성된 파일인지 판단."""
+    if len(line) > MINIFIED_LINE_CHARS:
+        return "minified file"
+    if added <= GENERATED_MARKER_LINES and any(
+        marker in line for marker in GENERATED_MARKERS
+    ):
+        return "generated file"
+    return None
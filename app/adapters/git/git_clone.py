@@ -1,85 +1,597 @@
+import hashlib
 import os
+import re
 import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, List, NamedTuple, Optional
 from urllib.parse import urlparse
 
 import typer
+import yaml
 from rich.console import Console
+from rich.progress import BarColumn, Progress, TaskID, TextColumn
+from rich.table import Table
 
+from app.core.config import get_cache_dir
 from app.frameworks.logger import setup_logger as get_logger
 from app.tools.vscode_utils import open_file_with_vscode
 
+from .git_commands import GitError
+
 logger = get_logger(__name__)
 
+MIRRORS_DIRNAME = "mirrors"
+# 여러 저장소를 clone할 때 기본 동시 실행 수
+DEFAULT_CLONE_JOBS = 4
+# e.g. "Receiving objects:  45% (450/1000), 1.20 MiB | 2.00 MiB/s"
+_PROGRESS_RE = re.compile(
+    r"^(?:remote: )?(?P<phase>[A-Za-z][A-Za-z ]*?):\s+(?P<percent>\d+)%"
+    r"(?: \((?P<done>\d+)/(?P<total>\d+)\))?"
+)
+# Bytes read from git's stderr at a time; progress lines end with \r, not \n
+_READ_CHUNK = 4096
+# mirror 경로별 lock: 같은 URL을 동시에 clone해도 mirror는 한 번에 하나만 갱신
+_mirror_locks: Dict[Path, threading.Lock] = {}
+_mirror_locks_guard = threading.Lock()
+
+
+class CloneProgress(NamedTuple):
+    """git이 stderr로 출력하는 진행 상황 한 줄."""
+
+    phase: str
+    percent: int
+    done: Optional[int] = None
+    total: Optional[int] = None
+
+
+@dataclass
+class CloneOptions:
+    """clone 방식 설정."""
+
+    # 최근 depth개 커밋만 가져오는 shallow clone
+    depth: Optional[int] = None
+    # partial clone 필터 (예: blob:none은 필요한 파일 내용만 나중에 가져옴)
+    filter: Optional[str] = None
+    # 주어진 디렉토리만 checkout하는 sparse checkout (cone 모드)
+    sparse: List[str] = field(default_factory=list)
+    # 로컬 bare mirror 캐시를 --reference로 사용
+    mirror: bool = False
+
+
+@dataclass
+class CloneJob:
+    """clone할 저장소 하나."""
+
+    url: str
+    target: Path
+    options: CloneOptions = field(default_factory=CloneOptions)
+
+    @property
+    def name(self) -> str:
+        return self.target.name
+
+
+@dataclass
+class CloneResult:
+    """clone 작업 결과."""
+
+    job: CloneJob
+    # cloned, fetched, skipped, failed 중 하나
+    status: str
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def parse_progress(line: str) -> Optional[CloneProgress]:
+    """git 진행 상황 줄 해석.
+
+    Args:
+        line: stderr 한 줄 (\\r 또는 \\n 제외)
+
+    Returns:
+        진행 상황, 진행 상황 줄이 아니면 None
+    """
+    match = _PROGRESS_RE.match(line.strip())
+    if not match:
+        return None
+    done, total = match.group("done"), match.group("total")
+    return CloneProgress(
+        phase=match.group("phase"),
+        percent=int(match.group("percent")),
+        done=int(done) if done else None,
+        total=int(total) if total else None,
+    )
+
+
+def run_with_progress(
+    command: List[str],
+    on_progress: Optional[Callable[[CloneProgress], None]] = None,
+    on_output: Optional[Callable[[str], None]] = None,
+    cwd: Optional[Path] = None,
+) -> subprocess.CompletedProcess:
+    """명령어를 실행하며 stdout과 stderr를 동시에 읽기.
+
+    stderr는 별도 스레드에서 읽으므로 어느 한쪽 파이프 버퍼가 가득 차서 멈추는
+    일이 없습니다. stderr의 진행 상황 줄은 on_progress로, 나머지 줄은
+    on_output으로 전달합니다.
+
+    Args:
+        command: 실행할 명령어
+        on_progress: 진행 상황 콜백
+        on_output: 진행 상황이 아닌 출력 줄 콜백
+        cwd: 실행할 디렉토리
+
+    Returns:
+        종료 코드와 진행 상황을 제외한 stdout, stderr
+    """
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=cwd,
+    )
+    assert process.stdout is not None and process.stderr is not None
+    stderr_lines: List[str] = []
+
+    def handle(line: str) -> None:
+        progress = parse_progress(line)
+        if progress is not None:
+            if on_progress:
+                on_progress(progress)
+            return
+        stderr_lines.append(line)
+        if on_output:
+            on_output(line)
+
+    def drain_stderr(stream: IO[bytes]) -> None:
+        pending = b""
+        while chunk := stream.read1(_READ_CHUNK):  # type: ignore[attr-defined]
+            pending += chunk
+            *lines, pending = re.split(rb"[\r\n]", pending)
+            for line in lines:
+                if line.strip():
+                    handle(line.decode("utf-8", "replace"))
+        if pending.strip():
+            handle(pending.decode("utf-8", "replace"))
+
+    reader = threading.Thread(target=drain_stderr, args=(process.stderr,), daemon=True)
+    reader.start()
+    stdout_lines = []
+    for raw in process.stdout:
+        line = raw.decode("utf-8", "replace").rstrip("\n")
+        stdout_lines.append(line)
+        if on_output and line.strip():
+            on_output(line)
+    reader.join()
+    process.wait()
+    return subprocess.CompletedProcess(
+        command,
+        process.returncode,
+        "\n".join(stdout_lines),
+        "\n".join(stderr_lines),
+    )
+
+
+def repo_name_from_url(repo_url: str) -> str:
+    """URL이나 경로에서 저장소 이름 추출 (`.git` 제외)."""
+    path = urlparse(repo_url).path or repo_url
+    # scp 형식 (git@host:org/repo.git)
+    path = path.rsplit(":", 1)[-1]
+    return os.path.splitext(os.path.basename(path.rstrip("/")))[0]
+
+
+def mirror_path(repo_url: str) -> Path:
+    """저장소 URL에 해당하는 bare mirror 경로."""
+    digest = hashlib.sha1(repo_url.encode("utf-8")).hexdigest()[:12]
+    return (
+        get_cache_dir()
+        / MIRRORS_DIRNAME
+        / f"{repo_name_from_url(repo_url)}-{digest}.git"
+    )
+
+
+def update_mirror(
+    repo_url: str, on_progress: Optional[Callable[[CloneProgress], None]] = None
+) -> Path:
+    """bare mirror를 만들거나 최신 상태로 fetch.
+
+    같은 mirror를 갱신하는 다른 스레드가 있으면 끝날 때까지 기다립니다.
+
+    Args:
+        repo_url: 저장소 URL
+        on_progress: 진행 상황 콜백
+
+    Returns:
+        mirror 경로
+
+    Raises:
+        GitError: clone이나 fetch 실패시
+    """
+    mirror = mirror_path(repo_url)
+    with _mirror_locks_guard:
+        lock = _mirror_locks.setdefault(mirror, threading.Lock())
+    with lock:
+        if (mirror / "HEAD").exists():
+            command = ["git", "--git-dir", str(mirror), "fetch", "--prune"]
+            command += ["--progress"]
+        else:
+            mirror.parent.mkdir(parents=True, exist_ok=True)
+            command = ["git", "clone", "--mirror", "--progress", repo_url, str(mirror)]
+        result = run_with_progress(command, on_progress)
+    if result.returncode != 0:
+        logger.error("git.mirror.failed", url=repo_url, error=result.stderr)
+        raise GitError(f"mirror 업데이트 중 오류가 발생했습니다: {result.stderr}")
+    return mirror
+
+
+def clone_repository(
+    repo_url: str,
+    target_dir: Path,
+    options: Optional[CloneOptions] = None,
+    on_progress: Optional[Callable[[CloneProgress], None]] = None,
+    on_output: Optional[Callable[[str], None]] = None,
+) -> None:
+    """저장소를 clone.
+
+    mirror를 사용하면 먼저 로컬 mirror를 갱신한 뒤 `--reference --dissociate`로
+    clone하므로, 이미 가지고 있는 객체는 네트워크로 다시 받지 않습니다.
+
+    Args:
+        repo_url: 저장소 URL
+        target_dir: clone할 디렉토리
+        options: clone 방식
+        on_progress: 진행 상황 콜백
+        on_output: 기타 출력 줄 콜백
+
+    Raises:
+        GitError: clone 실패시
+    """
+    options = options or CloneOptions()
+    command = ["git", "clone", "--progress"]
+    if options.depth:
+        command += ["--depth", str(options.depth)]
+    if options.filter:
+        command += [f"--filter={options.filter}"]
+    if options.sparse:
+        command += ["--sparse"]
+    if options.mirror:
+        mirror = update_mirror(repo_url, on_progress)
+        command += ["--reference", str(mirror), "--dissociate"]
+    command += [repo_url, str(target_dir)]
+
+    result = run_with_progress(command, on_progress, on_output)
+    if result.returncode != 0:
+        logger.error("git.clone.failed", url=repo_url, error=result.stderr)
+        raise GitError(f"clone 중 오류가 발생했습니다: {result.stderr}")
+
+    if options.sparse:
+        result = run_with_progress(
+            ["git", "sparse-checkout", "set", *options.sparse],
+            on_progress,
+            on_output,
+            cwd=target_dir,
+        )
+        if result.returncode != 0:
+            logger.error("git.sparse_checkout.failed", error=result.stderr)
+            raise GitError(f"sparse checkout 중 오류가 발생했습니다: {result.stderr}")
+
+
+def fetch_repository(
+    target_dir: Path, on_progress: Optional[Callable[[CloneProgress], None]] = None
+) -> None:
+    """이미 clone된 저장소를 fetch.
+
+    Args:
+        target_dir: 저장소 디렉토리
+        on_progress: 진행 상황 콜백
+
+    Raises:
+        GitError: fetch 실패시
+    """
+    result = run_with_progress(
+        ["git", "fetch", "--prune", "--progress"], on_progress, cwd=target_dir
+    )
+    if result.returncode != 0:
+        logger.error("git.fetch.failed", target=str(target_dir), error=result.stderr)
+        raise GitError(f"fetch 중 오류가 발생했습니다: {result.stderr}")
+
+
+def load_manifest(
+    manifest: Path, root: Path, defaults: Optional[CloneOptions] = None
+) -> List[CloneJob]:
+    """YAML manifest에서 clone할 저장소 목록 읽기.
+
+    manifest는 URL 목록이거나 `repos` 목록을 가진 mapping입니다. 각 항목은
+    URL 문자열이거나 `url`과 선택적인 `path`, `depth`, `blobless`, `filter`,
+    `sparse`, `mirror`를 가진 mapping입니다. mapping의 `root`와 `defaults`는
+    각각 기본 상위 디렉토리와 모든 항목의 기본 clone 방식입니다.
+
+    Args:
+        manifest: manifest 파일 경로
+        root: 상대 경로의 기준 디렉토리
+        defaults: 기본 clone 방식 (manifest의 defaults가 우선)
+
+    Returns:
+        clone 작업 목록 (같은 디렉토리는 한 번만)
+
+    Raises:
+        ValueError: manifest 형식이 잘못된 경우
+    """
+    with open(manifest, encoding="utf-8") as f:
+        data = yaml.safe_load(f) or []
+
+    if isinstance(data, dict):
+        root = Path(os.path.expanduser(str(data.get("root", root))))
+        defaults = _clone_options(data.get("defaults") or {}, defaults)
+        entries = data.get("repos") or []
+    else:
+        entries = data
+    if not isinstance(entries, list):
+        raise ValueError(f"{manifest}: 저장소 목록이 필요합니다")
+
+    jobs: List[CloneJob] = []
+    seen = set()
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"url": entry}
+        if not isinstance(entry, dict) or "url" not in entry:
+            raise ValueError(f"{manifest}: 잘못된 항목입니다: {entry!r}")
+        url = str(entry["url"])
+        target = root / os.path.expanduser(
+            str(entry.get("path") or repo_name_from_url(url))
+        )
+        if target in seen:
+            continue
+        seen.add(target)
+        jobs.append(CloneJob(url, target, _clone_options(entry, defaults)))
+    return jobs
+
+
+def _clone_options(values: Any, base: Optional[CloneOptions] = None) -> CloneOptions:
+    """manifest 항목의 값으로 clone 방식 덮어쓰기."""
+    if not isinstance(values, dict):
+        raise ValueError(f"잘못된 clone 설정입니다: {values!r}")
+    options = replace(base) if base else CloneOptions()
+    if "depth" in values:
+        options.depth = int(values["depth"]) if values["depth"] else None
+    if values.get("blobless"):
+        options.filter = "blob:none"
+    if "filter" in values:
+        options.filter = values["filter"]
+    if "sparse" in values:
+        sparse = values["sparse"] or []
+        options.sparse = [sparse] if isinstance(sparse, str) else list(sparse)
+    if "mirror" in values:
+        options.mirror = bool(values["mirror"])
+    return options
+
+
+def clone_many(
+    jobs: List[CloneJob],
+    max_workers: int = DEFAULT_CLONE_JOBS,
+    fetch: bool = False,
+    on_progress: Optional[Callable[[CloneJob, CloneProgress], None]] = None,
+    on_done: Optional[Callable[[CloneResult], None]] = None,
+) -> List[CloneResult]:
+    """여러 저장소를 동시에 clone.
+
+    이미 git 저장소가 있는 디렉토리는 건너뛰거나 fetch만 합니다. 한 저장소의
+    실패는 다른 저장소에 영향을 주지 않고 결과에 기록됩니다.
+
+    Args:
+        jobs: clone 작업 목록
+        max_workers: 동시에 실행할 git 프로세스 수
+        fetch: 이미 있는 저장소를 건너뛰지 않고 fetch할지 여부
+        on_progress: 저장소별 진행 상황 콜백 (작업 스레드에서 호출)
+        on_done: 저장소 하나가 끝날 때마다 호출되는 콜백
+
+    Returns:
+        jobs와 같은 순서의 결과 목록
+    """
+
+    def run(job: CloneJob) -> CloneResult:
+        progress = (lambda update: on_progress(job, update)) if on_progress else None
+        start = time.perf_counter()
+        try:
+            if (job.target / ".git").exists():
+                if not fetch:
+                    return CloneResult(job, "skipped")
+                fetch_repository(job.target, progress)
+                status = "fetched"
+            else:
+                # git removes a target it created itself when the clone fails
+                job.target.parent.mkdir(parents=True, exist_ok=True)
+                clone_repository(job.url, job.target, job.options, progress)
+                status = "cloned"
+        except (GitError, OSError) as e:
+            return CloneResult(job, "failed", time.perf_counter() - start, str(e))
+        return CloneResult(job, status, time.perf_counter() - start)
+
+    results: List[Optional[CloneResult]] = [None] * len(jobs)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(run, job): i for i, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            logger.info(
+                "git.clone.finished",
+                url=result.job.url,
+                status=result.status,
+                seconds=round(result.seconds, 3),
+            )
+            if on_done:
+                on_done(result)
+    return [result for result in results if result is not None]
+
 
 def add_git_clone(app: typer.Typer, name: str) -> None:
     @app.command(name=name)
     def function(
-        repo_url: str,
+        repo_urls: List[str] = typer.Argument(
+            None, help="Repository URLs to clone", show_default=False
+        ),
         target_dir: str = typer.Option(
             None,
             "--target",
             "-t",
-            help="Target directory to clone into",
+            help="Target directory to clone into (single repository only)",
+        ),
+        root: str = typer.Option(
+            "~/dev", "--root", help="Directory that repositories are cloned into"
+        ),
+        manifest: Optional[Path] = typer.Option(
+            None,
+            "--manifest",
+            "-m",
+            exists=True,
+            dir_okay=False,
+            help="YAML file listing repositories to clone",
+        ),
+        jobs: int = typer.Option(
+            DEFAULT_CLONE_JOBS, "--jobs", "-j", min=1, help="Concurrent clones"
+        ),
+        fetch: bool = typer.Option(
+            False, "--fetch", help="Fetch repositories that already exist"
+        ),
+        open_editor: bool = typer.Option(
+            True, "--open/--no-open", help="Open the result in VS Code"
+        ),
+        depth: Optional[int] = typer.Option(
+            None, "--depth", min=1, help="Shallow clone with this many commits"
+        ),
+        blobless: bool = typer.Option(
+            False,
+            "--blobless",
+            help="Partial clone (--filter=blob:none); file contents are fetched on demand",
+        ),
+        sparse: List[str] = typer.Option(
+            [], "--sparse", "-s", help="Only check out these directories"
+        ),
+        mirror: bool = typer.Option(
+            False,
+            "--mirror",
+            help="Clone via a local mirror cache (~/.cache/h-cli/mirrors)",
         ),
     ) -> None:
         """Git repository를 clone하고 VS Code에서 엽니다."""
         console = Console()
+        options = CloneOptions(
+            depth=depth,
+            filter="blob:none" if blobless else None,
+            sparse=sparse,
+            mirror=mirror,
+        )
+        root_dir = Path(os.path.expanduser(root))
 
         try:
-            repo_name = os.path.splitext(os.path.basename(urlparse(repo_url).path))[0]
-            if target_dir is None:
-                target_dir = os.path.join(os.path.expanduser("~"), "dev", repo_name)
-
-            console.print(
-                f"\n[bold]Cloning repository:[/bold] {repo_url} to {target_dir}\n"
+            clone_jobs = load_manifest(manifest, root_dir, options) if manifest else []
+        except (OSError, ValueError, yaml.YAMLError) as e:
+            raise typer.BadParameter(str(e), param_hint="--manifest")
+        for url in repo_urls or []:
+            clone_jobs.append(
+                CloneJob(url, root_dir / repo_name_from_url(url), options)
             )
+        if not clone_jobs:
+            raise typer.BadParameter("Give a repository URL or --manifest")
+        if target_dir is not None:
+            if len(clone_jobs) > 1:
+                raise typer.BadParameter(
+                    "Only valid with a single repository", param_hint="--target"
+                )
+            clone_jobs[0].target = Path(target_dir)
 
-            # Ensure target directory exists
-            os.makedirs(target_dir, exist_ok=True)
+        for job in clone_jobs:
+            console.print(f"[bold]Cloning repository:[/bold] {job.url} to {job.target}")
+        console.print()
 
-            # Clone the repository
-            process = subprocess.Popen(
-                ["git", "clone", repo_url, target_dir],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
+        with Progress(
+            TextColumn("[bold]{task.fields[repo]:<24}"),
+            TextColumn("{task.description:<20}"),
+            BarColumn(),
+            TextColumn("{task.percentage:>3.0f}%"),
+            console=console,
+            transient=True,
+        ) as progress:
+            overall = progress.add_task(
+                f"0/{len(clone_jobs)} done", total=len(clone_jobs), repo="Total"
             )
+            tasks: Dict[int, TaskID] = {}
 
-            if process.stdout:
-                while True:
-                    output = process.stdout.readline()
-                    if output == "" and process.poll() is not None:
-                        break
-                    if output:
-                        console.print(output.strip())
-
-            if process.returncode != 0:
-                if process.stderr:
-                    error_output = process.stderr.read()
-                    logger.error("git.clone.failed", error=error_output)
-                    console.print(
-                        f"\n[red]Error:[/red] Failed to clone repository: {error_output}"
-                    )
-                else:
-                    logger.error(
-                        "git.clone.failed",
-                        error="Git clone failed with no error message",
+            def on_progress(job: CloneJob, update: CloneProgress) -> None:
+                # Each job reports from a single worker thread
+                task = tasks.get(id(job))
+                if task is None:
+                    task = tasks[id(job)] = progress.add_task(
+                        update.phase, total=100, repo=job.name
                     )
-                    console.print(
-                        f"\n[red]Error:[/red] Git clone failed with no error message"
-                    )
-                raise typer.Exit(1)
+                progress.update(
+                    task, description=update.phase, completed=update.percent
+                )
 
-            console.print(
-                f"\n[bold]Repository cloned successfully to:[/bold] {target_dir}\n"
-            )
+            def on_done(result: CloneResult) -> None:
+                task = tasks.pop(id(result.job), None)
+                if task is not None:
+                    progress.remove_task(task)
+                progress.advance(overall)
+                done = int(progress.tasks[overall].completed)
+                progress.update(overall, description=f"{done}/{len(clone_jobs)} done")
+
+            results = clone_many(clone_jobs, jobs, fetch, on_progress, on_done)
 
-            # Open the cloned directory in VS Code
-            open_file_with_vscode(target_dir)
+        _print_summary(console, results)
 
-        except Exception as e:
-            logger.error("git.clone.failed", error=str(e))
-            console.print(
-                "\n[red]Error:[/red] An unexpected error occurred while cloning the repository."
+        succeeded = [r.job.target for r in results if r.status != "failed"]
+        if open_editor and succeeded:
+            # Open the editor once, on the common parent when there are several
+            open_file_with_vscode(
+                str(succeeded[0])
+                if len(succeeded) == 1
+                else os.path.commonpath([str(path) for path in succeeded])
             )
+        if len(succeeded) < len(results):
             raise typer.Exit(1)
+
+
+def _print_summary(console: Console, results: List[CloneResult]) -> None:
+    """clone 결과를 표로 출력."""
+    styles = {
+        "cloned": "green",
+        "fetched": "green",
+        "skipped": "yellow",
+        "failed": "red",
+    }
+    table = Table(show_edge=False)
+    table.add_column("Repository")
+    table.add_column("Status")
+    table.add_column("Time", justify="right")
+    table.add_column("Details", overflow="fold")
+    for result in results:
+        style = styles[result.status]
+        table.add_row(
+            str(result.job.target),
+            f"[{style}]{result.status}[/{style}]",
+            f"{result.seconds:.1f}s",
+            _error_reason(result.error or ""),
+        )
+    console.print(table)
+
+    counts = {status: 0 for status in styles}
+    for result in results:
+        counts[result.status] += 1
+    console.print(
+        "\n"
+        + ", ".join(f"{count} {status}" for status, count in counts.items() if count)
+    )
+
+
+def _error_reason(error: str) -> str:
+    """git 오류 출력에서 원인이 적힌 줄 (첫 fatal/error 줄)."""
+    lines = [line.strip() for line in error.splitlines() if line.strip()]
+    for line in lines:
+        if line.startswith(("fatal:", "error:")):
+            return line
+    return lines[-1] if lines else ""
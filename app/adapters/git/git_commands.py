@@ -1,23 +1,67 @@
+import os
 import subprocess
-from typing import List
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import TracebackType
+from typing import (
+    IO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
 from structlog.stdlib import BoundLogger
 
+from app.adapters.git.diff_shaper import DEFAULT_MAX_DIFF_TOKENS, DiffShaper, ShapedDiff
+from app.core.config import get_cache_dir, get_config
 from app.frameworks.logger import setup_logger
+from app.tools.disk_cache import DiskCache
+from app.tools.path_tree import DEFAULT_MAX_ENTRIES, PathTree
 
 logger = setup_logger(__name__)
 
+T = TypeVar("T")
+
+TREE_CACHE_FILENAME = "git-tree.sqlite3"
+TREE_CACHE_KEY_PREFIX = "tree:v1:"
+
+
+@dataclass
+class CommitContext:
+    """커밋 메시지 프롬프트에 들어가는 git 정보."""
+
+    status: str
+    diff: str
+    logs: List[str]
+    tree: str
+    # 쿼리 이름별 소요 시간 (초)
+    timings: Dict[str, float] = field(default_factory=dict)
+
 
 class GitCommands:
     """Git 명령어 실행을 위한 클래스."""
 
-    def __init__(self, logger: BoundLogger) -> None:
+    def __init__(self, logger: BoundLogger, cwd: Optional[Path] = None) -> None:
         """초기화.
 
         Args:
             logger: 로거 인스턴스
+            cwd: git 명령어를 실행할 디렉토리 (없으면 현재 디렉토리)
         """
         self.logger = logger
+        self.cwd = cwd
+        self._batches: Dict[bool, CatFileBatch] = {}
 
     def run_command(self, args: List[str], check: bool = True) -> str:
         """Git 명령어 실행.
@@ -38,23 +82,50 @@ class GitCommands:
                 capture_output=True,
                 text=True,
                 check=check,
+                cwd=self.cwd,
             )
             return result.stdout.strip()
         except subprocess.CalledProcessError as e:
             self.logger.error(f"git.{args[0]}.failed", error=str(e))
             raise GitError(f"git {args[0]} 명령어 실행 중 오류가 발생했습니다.")
 
-    def check_changes(self) -> None:
+    def get_staged_snapshot(self) -> Tuple[str, Optional[str]]:
+        """스테이지된 index의 트리 OID와 HEAD 커밋 OID 조회.
+
+        `git write-tree`는 index 전체를 트리 객체로 기록하므로, 둘이 같으면
+        스테이지된 변경사항도 같습니다.
+
+        Returns:
+            (트리 OID, HEAD 커밋 OID. 첫 커밋 전이면 None)
+
+        Raises:
+            GitError: 충돌 중인 파일이 있는 등 트리를 기록할 수 없는 경우
+        """
+        tree = self.run_command(["write-tree"])
+        head = self.run_command(
+            ["rev-parse", "--verify", "--quiet", "HEAD"], check=False
+        )
+        return tree, head or None
+
+    def check_changes(
+        self, changes: Optional[str] = None, staged: Optional[str] = None
+    ) -> None:
         """변경사항과 스테이지된 파일 확인.
 
+        Args:
+            changes: 이미 가져온 `git diff` 결과 (없으면 직접 실행)
+            staged: 이미 가져온 `git diff --staged` 결과 (없으면 직접 실행)
+
         Raises:
             GitError: 변경사항이 없거나 스테이지된 파일이 없을 때
         """
         # 변경사항 확인 (git diff)
-        changes = self.run_command(["diff"])
+        if changes is None:
+            changes = self.run_command(["diff"])
 
         # 스테이지된 변경사항 확인 (git diff --staged)
-        staged = self.run_command(["diff", "--staged"])
+        if staged is None:
+            staged = self.run_command(["diff", "--staged"])
 
         # 변경사항이 없으면 에러
         if not changes and not staged:
@@ -86,25 +157,451 @@ class GitCommands:
         logs = self.run_command(["log", f"-{count}", "--no-merges"]).splitlines()
         return logs if logs else ["No commit history"]
 
-    def get_directory_tree(self, depth: int = 3) -> str:
+    def get_directory_tree(
+        self,
+        depth: int = 3,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        sizes: bool = False,
+        use_cache: bool = True,
+        roots: Optional[Sequence[str]] = None,
+    ) -> str:
         """디렉토리 트리 가져오기.
 
+        HEAD 트리를 깊이 제한이 있는 트리로 그립니다. 항목이 max_entries개보다 많은
+        디렉토리는 파일 개수로 요약합니다. 결과는 HEAD 트리 OID를 키로 디스크에
+        캐시되므로 커밋이 바뀌기 전까지는 트리를 다시 읽지 않습니다.
+
+        roots를 주면 각 디렉토리의 하위 트리만 읽어서 `root/` 제목 아래에
+        그립니다. 하위 트리 OID로 읽고 캐시하므로 비용은 저장소 전체가 아니라
+        하위 트리 크기에 비례합니다.
+
         Args:
             depth: 트리 깊이
+            max_entries: 디렉토리마다 표시할 최대 항목 수
+            sizes: 파일과 디렉토리 크기 표시 여부
+            use_cache: 디스크 캐시 사용 여부
+            roots: 그릴 디렉토리들 (현재 디렉토리 기준 경로)
 
         Returns:
             디렉토리 트리 문자열
+
+        Raises:
+            GitError: root가 HEAD의 디렉토리가 아닐 때
+        """
+        if not roots:
+            try:
+                tree_oid = self.run_command(["rev-parse", "HEAD^{tree}"])
+            except GitError:
+                return "Could not generate directory tree"
+            return (
+                self._render_tree(tree_oid, depth, max_entries, sizes, use_cache)
+                or "Could not generate directory tree"
+            )
+
+        sections = []
+        for root in dict.fromkeys(root.rstrip("/") or "." for root in roots):
+            try:
+                tree_oid = self.run_command(
+                    ["rev-parse", "--verify", "--quiet", f"HEAD:./{root}"]
+                )
+                tree = self._render_tree(tree_oid, depth, max_entries, sizes, use_cache)
+            except GitError:
+                tree = None
+            if tree is None:
+                raise GitError(f"{root}은(는) HEAD에 있는 디렉토리가 아닙니다.")
+            sections.append(f"{root}/\n{tree}" if tree else f"{root}/")
+        return "\n\n".join(sections)
+
+    def _render_tree(
+        self,
+        tree_oid: str,
+        depth: int,
+        max_entries: int,
+        sizes: bool,
+        use_cache: bool,
+    ) -> Optional[str]:
+        """트리 OID의 트리를 그리기 (캐시 사용, 트리가 아니면 None)."""
+        key = f"{TREE_CACHE_KEY_PREFIX}{tree_oid}:{depth}:{max_entries}:{int(sizes)}"
+        cache = _open_tree_cache() if use_cache else None
+        try:
+            if cache is not None:
+                cached = cache.get(key)
+                if cached is not None:
+                    self.logger.debug("git.tree.cache_hit", tree=tree_oid)
+                    return cached.decode("utf-8")
+
+            try:
+                long_format = ["-l"] if sizes else []
+                listing = self.run_command(
+                    ["ls-tree", "-r", "-z", "--full-tree", *long_format, tree_oid]
+                )
+            except GitError:
+                return None
+
+            path_tree = PathTree()
+            for record in listing.split("\0"):
+                if not record:
+                    continue
+                info, path = record.split("\t", 1)
+                size = info.split()[-1] if sizes else "-"
+                path_tree.add(path, int(size) if size.isdigit() else None)
+            tree = path_tree.render(depth, max_entries, sizes)
+
+            if cache is not None:
+                cache.set(key, tree.encode("utf-8"))
+            return tree
+        finally:
+            if cache is not None:
+                cache.close()
+
+    def iter_lines(self, args: List[str]) -> Iterator[str]:
+        """Git 명령어를 실행하고 출력을 한 줄씩 스트리밍.
+
+        Args:
+            args: 실행할 git 명령어와 인자들
+
+        Yields:
+            줄바꿈이 포함된 출력 줄
+
+        Raises:
+            GitError: git 명령어 실행 실패시
         """
+        with subprocess.Popen(
+            ["git"] + args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=self.cwd,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        ) as process:
+            assert process.stdout is not None
+            yield from process.stdout
+            stderr = process.stderr.read() if process.stderr else ""
+        if process.returncode != 0:
+            self.logger.error(f"git.{args[0]}.failed", error=stderr.strip())
+            raise GitError(f"git {args[0]} 명령어 실행 중 오류가 발생했습니다.")
+
+    def get_shaped_staged_diff(
+        self, max_tokens: int = DEFAULT_MAX_DIFF_TOKENS
+    ) -> ShapedDiff:
+        """스테이지된 변경사항을 프롬프트 예산에 맞게 줄여서 가져오기.
+
+        diff를 파일 단위로 스트리밍하며 lock/생성된 파일과 큰 hunk를 요약하므로
+        거대한 diff도 메모리에 한꺼번에 올리지 않습니다.
+
+        Args:
+            max_tokens: diff 전체의 토큰 예산
+
+        Returns:
+            줄인 diff와 통계
+        """
+        start = time.perf_counter()
+        shaped = DiffShaper(max_tokens).shape(
+            self.iter_lines(["diff", "--staged", "--no-color", "--no-ext-diff"])
+        )
+        self.logger.info(
+            "git.diff.shaped",
+            original_bytes=shaped.original_bytes,
+            original_lines=shaped.original_lines,
+            shaped_chars=len(shaped.text),
+            shaped_tokens=shaped.tokens,
+            files=shaped.files,
+            generated=shaped.generated,
+            omitted_hunks=shaped.omitted_hunks,
+            summarized=shaped.summarized,
+            elapsed_ms=round((time.perf_counter() - start) * 1000),
+        )
+        return shaped
+
+    def collect_commit_context(
+        self,
+        log_count: int = 5,
+        tree_depth: int = 3,
+        max_diff_tokens: int = DEFAULT_MAX_DIFF_TOKENS,
+    ) -> CommitContext:
+        """커밋 메시지 프롬프트에 필요한 정보를 동시에 수집.
+
+        서로 독립적인 git 명령어들을 스레드 풀에서 한꺼번에 실행하므로 전체 소요
+        시간은 가장 느린 명령어 하나의 시간 정도입니다. 변경사항 확인에 사용한
+        스테이지된 diff는 다시 실행하지 않고 그대로 재사용합니다. diff는
+        get_shaped_staged_diff()로 프롬프트 예산에 맞게 줄입니다.
+
+        Args:
+            log_count: 가져올 로그 개수
+            tree_depth: 트리 깊이
+            max_diff_tokens: diff 전체의 토큰 예산
+
+        Returns:
+            수집한 정보와 쿼리별 소요 시간
+
+        Raises:
+            GitError: 변경사항이 없거나 스테이지된 파일이 없을 때, 또는 git 명령어 실행 실패시
+        """
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+
+            def submit(name: str, query: Callable[[], T]) -> "Future[T]":
+                return pool.submit(self._timed, name, query, timings)
+
+            # 변경 여부만 필요하므로 전체 diff 대신 파일 이름만 가져옴
+            changes = submit(
+                "changes", lambda: self.run_command(["diff", "--name-only"])
+            )
+            staged = submit(
+                "staged", lambda: self.get_shaped_staged_diff(max_diff_tokens).text
+            )
+            status = submit("status", self.get_status)
+            logs = submit("logs", lambda: self.get_recent_logs(log_count))
+            tree = submit("tree", lambda: self.get_directory_tree(tree_depth))
+
+            # 변경사항 확인 에러가 다른 명령어의 에러보다 우선
+            self.check_changes(changes=changes.result(), staged=staged.result())
+            context = CommitContext(
+                status=status.result(),
+                diff=staged.result(),
+                logs=logs.result(),
+                tree=tree.result(),
+                timings=timings,
+            )
+
+        self.logger.info(
+            "git.context.collected",
+            total_ms=round((time.perf_counter() - start) * 1000),
+            **{f"{name}_ms": round(t * 1000) for name, t in timings.items()},
+        )
+        return context
+
+    def _timed(self, name: str, query: Callable[[], T], timings: Dict[str, float]) -> T:
+        """쿼리를 실행하고 소요 시간을 timings에 기록."""
+        start = time.perf_counter()
         try:
-            return self.run_command(
-                ["ls-tree", "--full-tree", "-r", "HEAD", "--name-only"]
+            return query()
+        finally:
+            timings[name] = time.perf_counter() - start
+            self.logger.debug(
+                "git.query", name=name, elapsed_ms=round(timings[name] * 1000)
             )
-        except GitError:
-            return "Could not generate directory tree"
+
+    def cat_file(self, check_only: bool = False) -> "CatFileBatch":
+        """오래 유지되는 `git cat-file --batch` 세션 가져오기.
+
+        세션은 처음 요청할 때 시작되고 close()까지 재사용되므로, 객체를 몇 개를
+        읽든 git 프로세스는 하나만 실행됩니다.
+
+        Args:
+            check_only: 내용 없이 객체 정보만 읽는 `--batch-check` 세션 여부
+
+        Returns:
+            cat-file 세션
+        """
+        batch = self._batches.get(check_only)
+        if batch is None or not batch.alive:
+            batch = CatFileBatch(self.cwd, check_only=check_only)
+            self._batches[check_only] = batch
+        return batch
+
+    def close(self) -> None:
+        """열려 있는 cat-file 세션 종료."""
+        for batch in self._batches.values():
+            batch.close()
+        self._batches.clear()
+
+    def __enter__(self) -> "GitCommands":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
 
     def list_files_command(self) -> str:
-        """git ls-files 명령어 실행."""
-        return self.run_command(["ls-files"])
+        """추적 중인 파일 목록 조회 (`git ls-files`).
+
+        index를 네이티브로 읽을 수 있으면 git 프로세스를 실행하지 않습니다.
+        """
+        # git_index는 GitError 때문에 이 모듈을 import함
+        from .git_index import load_index
+
+        loaded = load_index(Path(self.cwd or os.getcwd()))
+        if loaded is None:
+            return self.run_command(["ls-files"])
+        index, prefix = loaded
+        paths: List[str] = []
+        for i in range(len(index)):
+            path = index.path(i)
+            # 충돌 중인 경로는 stage마다 한 번씩 들어 있음
+            if path.startswith(prefix) and (not paths or paths[-1] != path):
+                paths.append(path)
+        return "\n".join(path[len(prefix) :] for path in paths)
+
+
+def _open_tree_cache() -> Optional[DiskCache]:
+    """렌더링된 트리 캐시 열기 (열 수 없으면 None)."""
+    try:
+        return DiskCache(
+            get_cache_dir() / TREE_CACHE_FILENAME,
+            max_bytes=get_config().cache.tree_max_bytes,
+        )
+    except Exception as e:
+        logger.warning(f"Tree cache unavailable: {e}")
+        return None
+
+
+class GitObject(NamedTuple):
+    """cat-file로 읽은 git 객체."""
+
+    oid: str
+    type: str
+    size: int
+    # --batch-check 세션에서는 None
+    data: Optional[bytes] = None
+
+
+class CatFileBatch:
+    """`git cat-file --batch` 프로세스 하나로 여러 객체를 읽는 세션.
+
+    요청을 파이프로 보내고 응답을 순서대로 읽으므로, 파일마다 git 프로세스를
+    새로 띄우는 것보다 훨씬 빠르고 작업 트리가 바뀌어도 같은 스냅샷을 읽습니다.
+    """
+
+    def __init__(self, cwd: Optional[Path] = None, check_only: bool = False) -> None:
+        """cat-file 프로세스 시작.
+
+        Args:
+            cwd: git 저장소 디렉토리
+            check_only: 내용 없이 객체 정보만 읽을지 여부 (`--batch-check`)
+        """
+        self.check_only = check_only
+        self._lock = threading.Lock()
+        # read_many()로 응답을 받는 중인 스레드
+        self._streaming: Optional[int] = None
+        self._process = subprocess.Popen(
+            ["git", "cat-file", "--batch-check" if check_only else "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=cwd,
+        )
+
+    @property
+    def alive(self) -> bool:
+        """프로세스가 아직 요청을 받을 수 있는지 여부."""
+        return self._process.poll() is None
+
+    def read(self, rev: str) -> Optional[GitObject]:
+        """객체 하나 읽기.
+
+        Args:
+            rev: 객체 이름 (OID, `HEAD:path`, `:path` 등)
+
+        Returns:
+            읽은 객체, 없으면 None
+
+        Raises:
+            GitError: cat-file 프로세스가 응답하지 않을 때
+            RuntimeError: 같은 스레드에서 read_many()를 순회하는 도중일 때
+        """
+        self._check_not_streaming()
+        stdin, stdout = self._process.stdin, self._process.stdout
+        assert stdin is not None and stdout is not None
+        # 응답 하나만 기다리므로 보내는 스레드 없이 바로 주고받음
+        with self._lock:
+            try:
+                stdin.write(rev.encode("utf-8", "surrogateescape") + b"\n")
+                stdin.flush()
+            except (BrokenPipeError, ValueError) as e:
+                raise GitError("git cat-file 프로세스가 종료되었습니다.") from e
+            return self._read_response(stdout)
+
+    def read_many(self, revs: Iterable[str]) -> Iterator[Optional[GitObject]]:
+        """여러 객체를 요청 순서대로 읽기.
+
+        요청은 별도 스레드에서 보내므로 파이프 버퍼가 가득 차도 멈추지 않습니다.
+        다 읽기 전에 중단하면 남은 응답 때문에 세션을 재사용할 수 없으므로
+        프로세스를 종료합니다. 순회가 끝날 때까지 세션을 잡고 있으므로, 순회하는
+        도중에 같은 세션의 read()나 read_many()를 호출할 수 없습니다 (다른
+        스레드의 호출은 순회가 끝날 때까지 기다림).
+
+        Args:
+            revs: 객체 이름들
+
+        Yields:
+            요청 순서대로 읽은 객체, 없는 객체는 None
+
+        Raises:
+            GitError: cat-file 프로세스가 응답하지 않을 때
+            RuntimeError: 같은 스레드에서 이미 read_many()를 순회하는 도중일 때
+        """
+        self._check_not_streaming()
+        revs = list(revs)
+        stdin, stdout = self._process.stdin, self._process.stdout
+        assert stdin is not None and stdout is not None
+
+        def send() -> None:
+            try:
+                for rev in revs:
+                    stdin.write(rev.encode("utf-8", "surrogateescape") + b"\n")
+                stdin.flush()
+            except (BrokenPipeError, ValueError):
+                pass
+
+        with self._lock:
+            self._streaming = threading.get_ident()
+            sender = threading.Thread(target=send, daemon=True)
+            sender.start()
+            done = 0
+            try:
+                for _ in revs:
+                    yield self._read_response(stdout)
+                    done += 1
+            finally:
+                self._streaming = None
+                if done < len(revs):
+                    # 보내는 스레드가 쓰기에서 멈춰 있지 않도록 먼저 종료
+                    self._process.terminate()
+                sender.join()
+                if done < len(revs):
+                    self.close()
+
+    def _check_not_streaming(self) -> None:
+        # 순회 중인 스레드가 lock을 다시 잡으려 하면 영원히 기다리게 됨
+        if self._streaming == threading.get_ident():
+            raise RuntimeError(
+                "read_many()를 순회하는 도중에는 세션을 사용할 수 없습니다."
+            )
+
+    def _read_response(self, stdout: IO[bytes]) -> Optional[GitObject]:
+        header = stdout.readline()
+        if not header:
+            raise GitError("git cat-file 프로세스가 종료되었습니다.")
+        fields = header.split()
+        if fields[-1] in (b"missing", b"ambiguous"):
+            return None
+        oid, kind, size = fields[0].decode(), fields[1].decode(), int(fields[2])
+        if self.check_only:
+            return GitObject(oid, kind, size)
+        data = stdout.read(size)
+        stdout.read(1)
+        return GitObject(oid, kind, size, data)
+
+    def close(self) -> None:
+        """프로세스 종료."""
+        if self._process.stdin:
+            try:
+                self._process.stdin.close()
+            except BrokenPipeError:
+                pass
+        if self._process.poll() is None:
+            self._process.terminate()
+        self._process.wait()
+        if self._process.stdout:
+            self._process.stdout.close()
 
 
 class GitError(Exception):
@@ -1,7 +1,8 @@
+import hashlib
 import os
 import sys
-import time
 from pathlib import Path
+from typing import Optional
 
 import typer
 from dotenv import load_dotenv
@@ -10,16 +11,23 @@ from rich.live import Live
 from rich.spinner import Spinner
 from rich.text import Text
 
-from app.adapters.ai.gemini import GeminiAI
-from app.core.config import get_config
+from app.adapters.ai import get_ai
+from app.adapters.ai.base import TimedStream
+from app.core.config import get_cache_dir, get_config
 from app.frameworks.logger import setup_logger as get_logger
+from app.tools.disk_cache import DiskCache
 from app.tools.file_utils import create_temp_file
+from app.tools.token_estimator import estimate_tokens
 from app.tools.vscode_utils import open_file_with_vscode
 
+from .diff_shaper import DEFAULT_MAX_DIFF_TOKENS
 from .git_commands import GitCommands, GitError
 
 logger = get_logger(__name__)
 
+MESSAGE_CACHE_FILENAME = "git-commit-msg.sqlite3"
+MESSAGE_CACHE_KEY_PREFIX = "commit-msg:v1:"
+
 
 def add_git_commit_msg_prompt(app: typer.Typer, name: str) -> None:
     @app.command(name=name)
@@ -30,78 +38,118 @@ def add_git_commit_msg_prompt(app: typer.Typer, name: str) -> None:
         tree_depth: int = typer.Option(
             3, "--depth", "-d", help="Maximum depth for directory tree"
         ),
+        max_diff_tokens: int = typer.Option(
+            DEFAULT_MAX_DIFF_TOKENS,
+            "--max-diff-tokens",
+            min=1,
+            help="Token budget for the staged diff in the prompt",
+        ),
+        refresh: bool = typer.Option(
+            False,
+            "--refresh",
+            help="Generate a new message even if one is cached for these changes",
+        ),
     ) -> None:
         """커밋 메시지 생성을 위한 프롬프트 생성."""
         console = Console()
 
         config = get_config()
 
-        if config.gemini_api_key is None:
-            console.print("\n[red]Error:[/red] Gemini API key is not set.")
-            raise typer.Exit(1)
-
+        cache: Optional[DiskCache] = None
         try:
             git = GitCommands(logger)
-
-            # 먼저 변경사항과 스테이지 상태 체크 (에러나면 여기서 종료)
-            git.check_changes()
-
-            # 이후 정보 수집
-            status = git.get_status()
-            diff = git.get_staged_diff()
-            logs = "\n".join(git.get_recent_logs(log_count))
-            tree = git.get_directory_tree(tree_depth)
-
-            # 프롬프트 출력
-            # console.print(f"\n[bold]Git Status:[/bold]\n{status}")
-            # console.print(f"\n[bold]Staged Changes:[/bold]\n{diff}")
-            # console.print(f"\n[bold]Recent Commits:[/bold]\n{logs}")
-            # console.print(f"\n[bold]Project Structure:[/bold]\n{tree}")
-
-            # Generate commit message using Gemini
-            gemini = GeminiAI(config.gemini_api_key)
-            prompt = _PROMPT.format(
-                status=status,
-                diff=diff,
-                logs=logs,
-                tree=tree,
+            try:
+                ai = get_ai(config)
+            except ValueError as e:
+                console.print(f"\n[red]Error:[/red] {e}")
+                raise typer.Exit(1)
+
+            # 같은 스테이지 상태와 옵션으로 다시 실행하면 저장된 메시지를 바로 사용
+            cache = _open_message_cache()
+            key = (
+                _message_cache_key(
+                    git, ai.model_name, log_count, tree_depth, max_diff_tokens
+                )
+                if cache is not None
+                else None
             )
+            cached = None
+            if cache is not None and key is not None and not refresh:
+                cached = cache.get(key)
+                logger.info("git.prompt.cache", hit=cached is not None)
 
-            try:
-                with Live(console=console, screen=True) as live:
-                    start_time = time.time()
-                    spinner = Spinner(
-                        "dots", text="Generating commit message...", style="bold green"
-                    )
-                    live.update(spinner)
+            if cached is not None:
+                commit_message = cached.decode("utf-8")
+                console.print(
+                    "\n[bold green]Using the cached commit message for these "
+                    "staged changes[/bold green] (--refresh to regenerate)"
+                )
+                git_commit_command = _show_commit_message(console, commit_message)
+            else:
+                # 변경사항 체크와 정보 수집을 동시에 실행 (체크 실패시 여기서 종료)
+                context = git.collect_commit_context(
+                    log_count, tree_depth, max_diff_tokens=max_diff_tokens
+                )
+                status = context.status
+                diff = context.diff
+                logs = "\n".join(context.logs)
+                tree = context.tree
+
+                # 프롬프트 출력
+                # console.print(f"\n[bold]Git Status:[/bold]\n{status}")
+                # console.print(f"\n[bold]Staged Changes:[/bold]\n{diff}")
+                # console.print(f"\n[bold]Recent Commits:[/bold]\n{logs}")
+                # console.print(f"\n[bold]Project Structure:[/bold]\n{tree}")
+
+                # Generate commit message using the configured provider
+                prompt = _PROMPT.format(
+                    status=status,
+                    diff=diff,
+                    logs=logs,
+                    tree=tree,
+                )
+                logger.info(
+                    "git.prompt.built",
+                    chars=len(prompt),
+                    tokens=estimate_tokens(prompt),
+                )
 
-                    commit_message = gemini.generate_text(prompt)
-                    commit_message = commit_message.replace("`", "")
-                    end_time = time.time()
-                    elapsed_time = end_time - start_time
-                    live.update(
+                try:
+                    # Render the message as it streams in, then print it once done
+                    stream = TimedStream(ai.stream_text(prompt), config.ai_provider)
+                    streamed = Text()
+                    with Live(
+                        Spinner(
+                            "dots",
+                            text="Generating commit message...",
+                            style="bold green",
+                        ),
+                        console=console,
+                        transient=True,
+                    ) as live:
+                        for chunk in stream:
+                            streamed.append(chunk)
+                            live.update(streamed)
+
+                    commit_message = streamed.plain.replace("`", "")
+                    console.print(
                         Text(
-                            f"Commit message generated in {elapsed_time:.2f} seconds.",
+                            f"Commit message generated in {stream.total_s:.2f} seconds "
+                            f"(first token after {stream.first_token_s or 0:.2f}s).",
                             style="bold green",
                         )
                     )
 
-                console.print(f"\n[bold]Commit Message:[/bold]\n{commit_message}")
-
-                # Construct and print the git commit command
-                console.print(
-                    f"\n[bold]Git Commit Command:[/bold]\n[green]{commit_message}[/green]"
-                )
-
-                escaped_message = commit_message.replace("!", "\\!")
-                git_commit_command = f'git commit -m "{escaped_message}"'
-            except Exception as e:
-                console.print(f"\n[red]Error:[/red] {str(e)}")
-                console.print(
-                    "\n[red]Error:[/red] 프롬프트 생성 중 오류가 발생했습니다."
-                )
-                console.print("\n[red]Error:[/red] 프롬프트를 대신 저장합니다.")
-                git_commit_command = prompt
+                    if cache is not None and key is not None:
+                        cache.set(key, commit_message.encode("utf-8"))
+                    git_commit_command = _show_commit_message(console, commit_message)
+                except Exception as e:
+                    console.print(f"\n[red]Error:[/red] {str(e)}")
+                    console.print(
+                        "\n[red]Error:[/red] 프롬프트 생성 중 오류가 발생했습니다."
+                    )
+                    console.print("\n[red]Error:[/red] 프롬프트를 대신 저장합니다.")
+                    git_commit_command = prompt
 
             temp_file = create_temp_file(
                 filename="git_commit_msg.txt", content=git_commit_command
@@ -112,6 +160,8 @@ def add_git_commit_msg_prompt(app: typer.Typer, name: str) -> None:
             )
 
             open_file_with_vscode(temp_file)
+        except typer.Exit:
+            raise
         except GitError as e:
             console.print(f"\n[red]Error:[/red] {str(e)}")
             raise typer.Exit(1)
@@ -119,6 +169,67 @@ def add_git_commit_msg_prompt(app: typer.Typer, name: str) -> None:
             logger.error("git.prompt.failed", error=str(e))
             console.print("\n[red]Error:[/red] 프롬프트 생성 중 오류가 발생했습니다.")
             raise typer.Exit(1)
+        finally:
+            if cache is not None:
+                cache.close()
+
+
+def _show_commit_message(console: Console, commit_message: str) -> str:
+    """커밋 메시지를 출력하고 `git commit` 명령어 반환."""
+    console.print(f"\n[bold]Commit Message:[/bold]\n{commit_message}")
+
+    # Construct and print the git commit command
+    console.print(
+        f"\n[bold]Git Commit Command:[/bold]\n[green]{commit_message}[/green]"
+    )
+
+    escaped_message = commit_message.replace("!", "\\!")
+    return f'git commit -m "{escaped_message}"'
+
+
+def _open_message_cache() -> Optional[DiskCache]:
+    """생성된 커밋 메시지 캐시 열기 (열 수 없으면 None)."""
+    try:
+        return DiskCache(
+            get_cache_dir() / MESSAGE_CACHE_FILENAME,
+            max_bytes=get_config().cache.commit_msg_max_bytes,
+        )
+    except Exception as e:
+        logger.warning(f"Commit message cache unavailable: {e}")
+        return None
+
+
+def _message_cache_key(
+    git: GitCommands,
+    model: str,
+    log_count: int,
+    tree_depth: int,
+    max_diff_tokens: int,
+) -> Optional[str]:
+    """스테이지된 변경사항, 프롬프트 템플릿, 모델, 옵션으로 정해지는 캐시 키.
+
+    index의 트리와 HEAD가 같으면 스테이지된 diff도 같습니다. 템플릿은 내용의
+    해시를 버전으로 사용하므로 프롬프트를 고치면 이전 메시지는 쓰이지 않습니다.
+    로그 개수, 트리 깊이, diff 예산은 프롬프트 내용을 바꾸므로 키에 포함합니다.
+    스테이지 상태를 읽을 수 없으면 (충돌 중 등) None을 반환합니다.
+
+    Args:
+        git: 스테이지 상태를 읽을 GitCommands
+        model: 메시지를 생성하는 모델 이름
+        log_count: 프롬프트에 넣을 최근 로그 개수
+        tree_depth: 프롬프트에 넣을 디렉토리 트리 깊이
+        max_diff_tokens: 스테이지된 diff의 토큰 예산
+    """
+    try:
+        tree, head = git.get_staged_snapshot()
+    except GitError:
+        return None
+    template = hashlib.sha256(_PROMPT.encode("utf-8")).hexdigest()[:16]
+    options = f"l{log_count}.d{tree_depth}.t{max_diff_tokens}"
+    return (
+        f"{MESSAGE_CACHE_KEY_PREFIX}{model}:{template}:{options}:"
+        f"{head or '-'}:{tree}"
+    )
 
 
 _PROMPT = """You are an expert in writing Conventional Commit messages. Follow the Conventional Commits specification (v1.0.0) meticulously. The commit message structure must be:
@@ -0,0 +1,427 @@
+import mmap
+import os
+import stat
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from app.frameworks.logger import setup_logger as get_logger
+
+from .git_commands import GitError
+
+logger = get_logger(__name__)
+
+SUPPORTED_VERSIONS = (2, 3, 4)
+GITLINK_MODE = 0o160000
+SYMLINK_MODE = 0o120000
+
+# ctime, mtime (초, 나노초), dev, ino, mode, uid, gid, size, SHA-1, flags
+_ENTRY = struct.Struct(">10I20sH")
+_HEADER = struct.Struct(">4sII")
+_EXTENSION = struct.Struct(">4sI")
+_HASH_SIZE = 20
+# is_clean_many()에서 스레드 하나가 한 번에 lstat하는 항목 수
+_STAT_BATCH = 256
+
+# on-disk flags
+_ASSUME_VALID = 0x8000
+_EXTENDED = 0x4000
+_NAME_MASK = 0x0FFF
+# on-disk extended flags (v3 이상)
+_SKIP_WORKTREE = 0x4000
+_INTENT_TO_ADD = 0x2000
+
+# GitIndex가 항목마다 저장하는 flags (하위 2비트는 stage)
+STAGE_MASK = 0x03
+ASSUME_VALID = 0x04
+SKIP_WORKTREE = 0x08
+INTENT_TO_ADD = 0x10
+
+
+class UnsupportedIndexError(GitError):
+    """네이티브 reader가 읽을 수 없는 index (`git ls-files`로 대체해야 함)."""
+
+
+class IndexEntry(NamedTuple):
+    """index 항목 하나."""
+
+    path: str
+    mode: int
+    oid: str
+    size: int
+    mtime_ns: int
+    ctime_ns: int
+    ino: int
+    flags: int
+
+    @property
+    def stage(self) -> int:
+        return self.flags & STAGE_MASK
+
+
+class GitIndex:
+    """`.git/index`를 읽은 결과.
+
+    항목마다 객체를 만들지 않고 필드별 `array`와 하나의 bytes에 저장하므로,
+    10만 개 항목도 수 MB 안에 들어갑니다. 항목은 index 순서(경로의 바이트
+    순서)이며 충돌 중인 경로는 stage마다 한 번씩 나옵니다.
+    """
+
+    def __init__(self, version: int = 2, file_mtime_ns: int = 0) -> None:
+        self.version = version
+        # index 파일 자체의 mtime (racy-git 판단용)
+        self.file_mtime_ns = file_mtime_ns
+        self.modes = array("I")
+        self.sizes = array("I")
+        self.mtimes_ns = array("q")
+        self.ctimes_ns = array("q")
+        self.inos = array("I")
+        self.flags = array("B")
+        self._oids = bytearray()
+        self._paths = bytearray()
+        self._path_ends = array("I")
+
+    def __len__(self) -> int:
+        return len(self.modes)
+
+    def __getitem__(self, i: int) -> IndexEntry:
+        return IndexEntry(
+            path=self.path(i),
+            mode=self.modes[i],
+            oid=self.oid(i),
+            size=self.sizes[i],
+            mtime_ns=self.mtimes_ns[i],
+            ctime_ns=self.ctimes_ns[i],
+            ino=self.inos[i],
+            flags=self.flags[i],
+        )
+
+    def __iter__(self) -> Iterator[IndexEntry]:
+        return (self[i] for i in range(len(self)))
+
+    def path(self, i: int) -> str:
+        """i번째 항목의 경로 (저장소 루트 기준, `/` 구분)."""
+        start = self._path_ends[i - 1] if i else 0
+        return self._paths[start : self._path_ends[i]].decode(
+            "utf-8", errors="surrogateescape"
+        )
+
+    def path_bytes(self, i: int) -> bytes:
+        """i번째 항목의 경로 (인코딩하지 않은 바이트)."""
+        start = self._path_ends[i - 1] if i else 0
+        return bytes(self._paths[start : self._path_ends[i]])
+
+    def prefix_range(self, prefix: str) -> range:
+        """경로가 prefix로 시작하는 항목들의 범위.
+
+        index는 경로의 바이트 순서로 정렬되어 있으므로 이진 탐색으로 찾으며,
+        범위 밖의 항목은 읽지 않습니다.
+
+        Args:
+            prefix: 경로 prefix (예: "services/foo/")
+
+        Returns:
+            항목 번호 범위
+        """
+        if not prefix:
+            return range(len(self))
+        key = prefix.encode("utf-8", errors="surrogateescape")
+        paths = _PathView(self)
+        start = bisect_left(paths, key)
+        end = bisect_right(paths, key, lo=start, key=lambda path: path[: len(key)])
+        return range(start, end)
+
+    def oid(self, i: int) -> str:
+        """i번째 항목의 blob OID."""
+        return self._oids[i * _HASH_SIZE : (i + 1) * _HASH_SIZE].hex()
+
+    def is_clean(self, i: int, full_path: Union[str, Path]) -> bool:
+        """작업 트리 파일이 index에 기록된 내용과 같다고 확신할 수 있는지 확인.
+
+        `git ls-files --modified`와 같은 방식으로 lstat 결과를 index의 stat
+        정보와 비교합니다. 확신할 수 없는 경우(racy 항목, 충돌, intent-to-add,
+        submodule 등)는 False를 반환합니다.
+
+        Args:
+            i: 항목 번호
+            full_path: 작업 트리에서의 파일 경로
+
+        Returns:
+            파일 내용이 index의 blob과 같으면 True
+        """
+        flags = self.flags[i]
+        if flags & ASSUME_VALID:
+            return True
+        mode = self.modes[i]
+        if flags & (STAGE_MASK | INTENT_TO_ADD) or mode == GITLINK_MODE:
+            return False
+        mtime_ns = self.mtimes_ns[i]
+        if mtime_ns >= self.file_mtime_ns:
+            # index와 같은 시각에 수정되었을 수 있는 racy 항목
+            return False
+        try:
+            st = os.lstat(full_path)
+        except OSError:
+            return False
+
+        if mode == SYMLINK_MODE:
+            if not stat.S_ISLNK(st.st_mode):
+                return False
+        elif not stat.S_ISREG(st.st_mode) or bool(st.st_mode & 0o100) != bool(
+            mode & 0o100
+        ):
+            return False
+        return (
+            _same_time(mtime_ns, st.st_mtime_ns)
+            and _same_time(self.ctimes_ns[i], st.st_ctime_ns)
+            and self.sizes[i] == st.st_size & 0xFFFFFFFF
+            and self.inos[i] in (0, st.st_ino & 0xFFFFFFFF)
+        )
+
+    def is_clean_many(
+        self, items: Sequence[Tuple[int, str]], jobs: int = 8
+    ) -> List[bool]:
+        """여러 항목의 is_clean()을 스레드 여러 개로 확인.
+
+        git의 preload-index처럼 lstat을 병렬로 실행합니다 (lstat은 GIL을
+        놓으므로 네트워크/느린 파일 시스템에서 효과가 큼).
+
+        Args:
+            items: (항목 번호, 작업 트리 경로) 목록
+            jobs: 스레드 수
+
+        Returns:
+            items와 같은 순서의 결과
+        """
+
+        def check(batch: Sequence[Tuple[int, str]]) -> List[bool]:
+            return [self.is_clean(i, path) for i, path in batch]
+
+        batches = [
+            items[start : start + _STAT_BATCH]
+            for start in range(0, len(items), _STAT_BATCH)
+        ]
+        if jobs <= 1 or len(batches) <= 1:
+            return check(items)
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            return [
+                clean for result in executor.map(check, batches) for clean in result
+            ]
+
+
+class _PathView:
+    """이진 탐색용으로 GitIndex의 경로를 바이트 시퀀스처럼 보여주는 view."""
+
+    def __init__(self, index: GitIndex) -> None:
+        self._index = index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __getitem__(self, i: int) -> bytes:
+        return self._index.path_bytes(i)
+
+
+def _same_time(index_ns: int, stat_ns: int) -> bool:
+    """index 시각과 stat 시각 비교 (나노초를 기록하지 않는 git이면 초만 비교)."""
+    if index_ns % 1_000_000_000 == 0:
+        return index_ns // 1_000_000_000 == stat_ns // 1_000_000_000
+    return index_ns == stat_ns
+
+
+def read_index(index_path: Path) -> GitIndex:
+    """index 파일을 memory-map해서 읽기.
+
+    버전 2~4를 지원합니다. 선택적인 확장(TREE, REUC, UNTR 등)은 건너뛰고,
+    해석해야만 항목이 올바른 필수 확장(split index의 `link`, sparse index의
+    `sdir` 등)을 만나면 UnsupportedIndexError를 발생시킵니다.
+
+    Args:
+        index_path: index 파일 경로
+
+    Returns:
+        index 항목들 (파일이 없으면 빈 index)
+
+    Raises:
+        UnsupportedIndexError: 지원하지 않는 형식이나 확장인 경우
+    """
+    try:
+        file = open(index_path, "rb")
+    except FileNotFoundError:
+        return GitIndex()
+
+    with file:
+        file_stat = os.fstat(file.fileno())
+        if file_stat.st_size < _HEADER.size + _HASH_SIZE:
+            raise UnsupportedIndexError(f"index가 너무 작습니다: {index_path}")
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return _parse(data, file_stat.st_mtime_ns)
+
+
+def _parse(data: mmap.mmap, file_mtime_ns: int) -> GitIndex:
+    signature, version, count = _HEADER.unpack_from(data, 0)
+    if signature != b"DIRC":
+        raise UnsupportedIndexError("index 서명이 올바르지 않습니다")
+    if version not in SUPPORTED_VERSIONS:
+        raise UnsupportedIndexError(f"지원하지 않는 index 버전입니다: {version}")
+
+    index = GitIndex(version, file_mtime_ns)
+    end_of_entries = len(data) - _HASH_SIZE
+    pos = _HEADER.size
+    previous = b""
+    # 항목이 많으므로 루프 안에서는 지역 변수로 바인딩한 메서드만 사용
+    unpack, find = _ENTRY.unpack_from, data.find
+    add_mode, add_size = index.modes.append, index.sizes.append
+    add_mtime, add_ctime = index.mtimes_ns.append, index.ctimes_ns.append
+    add_ino, add_flags = index.inos.append, index.flags.append
+    add_end, oids, paths = index._path_ends.append, index._oids, index._paths
+    for _ in range(count):
+        start = pos
+        (ctime_s, ctime_ns, mtime_s, mtime_ns, _dev, ino, mode, _uid, _gid, size,
+         oid, on_disk_flags) = unpack(data, pos)  # fmt: skip
+        pos += _ENTRY.size
+
+        flags = (on_disk_flags >> 12) & STAGE_MASK
+        if on_disk_flags & _ASSUME_VALID:
+            flags |= ASSUME_VALID
+        if on_disk_flags & _EXTENDED:
+            if version < 3:
+                raise UnsupportedIndexError("v2 index에 확장 flags가 있습니다")
+            extended = (data[pos] << 8) | data[pos + 1]
+            pos += 2
+            if extended & _SKIP_WORKTREE:
+                flags |= SKIP_WORKTREE
+            if extended & _INTENT_TO_ADD:
+                flags |= INTENT_TO_ADD
+
+        if version == 4:
+            # 이전 경로에서 뒤쪽 N바이트를 지우고 NUL로 끝나는 suffix를 붙임
+            strip, pos = _read_varint(data, pos)
+            if strip > len(previous):
+                raise UnsupportedIndexError("손상된 v4 경로 압축입니다")
+            end = find(b"\0", pos, end_of_entries)
+            if end < 0:
+                raise UnsupportedIndexError("경로가 끝나지 않았습니다")
+            path = previous[: len(previous) - strip] + data[pos:end]
+            pos = end + 1
+        else:
+            end = pos + (on_disk_flags & _NAME_MASK)
+            if on_disk_flags & _NAME_MASK == _NAME_MASK:
+                end = find(b"\0", pos, end_of_entries)
+                if end < 0:
+                    raise UnsupportedIndexError("경로가 끝나지 않았습니다")
+            path = data[pos:end]
+            # 항목은 NUL 1~8개로 8바이트 단위까지 채워짐
+            pos = start + ((end - start + 8) & ~7)
+        if pos > end_of_entries:
+            raise UnsupportedIndexError("index 항목이 파일 끝을 넘었습니다")
+
+        add_mode(mode)
+        add_size(size)
+        add_mtime(mtime_s * 1_000_000_000 + mtime_ns)
+        add_ctime(ctime_s * 1_000_000_000 + ctime_ns)
+        add_ino(ino)
+        add_flags(flags)
+        oids += oid
+        paths += path
+        add_end(len(paths))
+        previous = path
+
+    while pos + _EXTENSION.size <= end_of_entries:
+        signature, size = _EXTENSION.unpack_from(data, pos)
+        if not b"A"[0] <= signature[0] <= b"Z"[0]:
+            raise UnsupportedIndexError(
+                f"지원하지 않는 필수 index 확장입니다: {signature.decode(errors='replace')}"
+            )
+        pos += _EXTENSION.size + size
+    return index
+
+
+def _read_varint(data: mmap.mmap, pos: int) -> Tuple[int, int]:
+    """git의 offset varint 읽기 (varint.c의 decode_varint)."""
+    byte = data[pos]
+    pos += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, pos
+
+
+def find_repository(directory: Path) -> Optional[Tuple[Path, Path]]:
+    """directory가 속한 작업 트리 루트와 git 디렉토리 찾기.
+
+    `.git` 파일(worktree, submodule)의 `gitdir:`도 따라갑니다. GIT_DIR,
+    GIT_INDEX_FILE 등 환경 변수로 위치가 바뀌었거나, `.git`을 해석할 수
+    없으면 None을 반환합니다.
+
+    Args:
+        directory: 시작 디렉토리
+
+    Returns:
+        (작업 트리 루트, git 디렉토리), 찾지 못하면 None
+    """
+    if any(
+        name in os.environ for name in ("GIT_DIR", "GIT_WORK_TREE", "GIT_INDEX_FILE")
+    ):
+        return None
+    directory = directory.resolve()
+    for root in (directory, *directory.parents):
+        dot_git = root / ".git"
+        if dot_git.is_dir():
+            return root, dot_git
+        if dot_git.is_file():
+            content = dot_git.read_text(errors="replace").strip()
+            if not content.startswith("gitdir:"):
+                return None
+            git_dir = Path(content[len("gitdir:") :].strip())
+            return root, (root / git_dir).resolve()
+    return None
+
+
+def load_index(directory: Path) -> Optional[Tuple[GitIndex, str]]:
+    """directory가 속한 저장소의 index를 네이티브 reader로 읽기.
+
+    SHA-256 저장소나 지원하지 않는 index처럼 네이티브로 읽을 수 없으면
+    None을 반환하므로, 호출하는 쪽은 `git ls-files`로 대체하면 됩니다.
+
+    Args:
+        directory: 저장소 안의 디렉토리
+
+    Returns:
+        (index, directory의 루트 기준 경로 prefix. 루트면 "", 아니면 "a/b/"),
+        읽을 수 없으면 None
+    """
+    found = find_repository(directory)
+    if found is None:
+        return None
+    root, git_dir = found
+    if _uses_sha256(git_dir):
+        logger.debug("git.index.fallback", reason="sha256")
+        return None
+    try:
+        index = read_index(git_dir / "index")
+    except (UnsupportedIndexError, OSError) as e:
+        logger.debug("git.index.fallback", reason=str(e))
+        return None
+
+    relative = directory.resolve().relative_to(root).as_posix()
+    return index, "" if relative == "." else relative + "/"
+
+
+def _uses_sha256(git_dir: Path) -> bool:
+    """저장소가 SHA-1이 아닌 객체 형식을 쓰는지 확인."""
+    # linked worktree의 설정은 공통 디렉토리에 있음
+    common = git_dir
+    commondir = git_dir / "commondir"
+    if commondir.is_file():
+        common = (git_dir / commondir.read_text().strip()).resolve()
+    try:
+        config = (common / "config").read_text(errors="replace")
+    except OSError:
+        return False
+    return "objectformat" in config.lower()
@@ -1,10 +1,12 @@
 from tempfile import gettempdir, tempdir
+from typing import List
 
 import typer
 from rich.console import Console
 
 from app.frameworks.logger import setup_logger as get_logger
 from app.tools.file_utils import create_temp_file
+from app.tools.path_tree import DEFAULT_MAX_ENTRIES
 from app.tools.vscode_utils import open_file_with_vscode
 
 from .git_commands import GitCommands, GitError
@@ -15,16 +17,37 @@ logger = get_logger(__name__)
 def add_git_tree(app: typer.Typer, name: str) -> None:
     @app.command(name=name)
     def function(
+        paths: List[str] = typer.Argument(
+            None, help="Only show these directories (default: whole repository)"
+        ),
         tree_depth: int = typer.Option(
             3, "--depth", "-d", help="Maximum depth for directory tree"
         ),
+        max_entries: int = typer.Option(
+            DEFAULT_MAX_ENTRIES,
+            "--max-entries",
+            min=1,
+            help="Summarize directories with more entries than this",
+        ),
+        sizes: bool = typer.Option(
+            False, "--sizes", "-s", help="Show file and directory sizes"
+        ),
+        use_cache: bool = typer.Option(
+            True, "--cache/--no-cache", help="Reuse the tree rendered for HEAD"
+        ),
     ) -> None:
         """Git repository의 파일 목록 출력."""
         console = Console()
 
         try:
             git = GitCommands(logger)
-            tree = git.get_directory_tree(tree_depth)
+            tree = git.get_directory_tree(
+                tree_depth,
+                max_entries=max_entries,
+                sizes=sizes,
+                use_cache=use_cache,
+                roots=paths,
+            )
 
             console.print(f"\n[bold]Project Structure:[/bold]\n{tree}")
 
@@ -2,6 +2,7 @@
 
 import os
 import shutil
+import sys
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
@@ -22,14 +23,21 @@ def get_global_config_path() -> Path:
     return Path(os.path.expanduser("~")) / ".config" / "h-cli" / "config.yaml"
 
 
+def get_cache_dir() -> Path:
+    """Get the directory for local caches, creating it if needed."""
+    cache_dir = Path(os.path.expanduser(get_config().cache.directory))
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
 def copy_default_config_if_not_exists() -> None:
     """Copy the default config to the global path if it doesn't exist."""
     global_config_path = get_global_config_path()
     if not global_config_path.exists():
         global_config_path.parent.mkdir(parents=True, exist_ok=True)
         default_config_path = get_config_path()
-        print(f"Copying config from: {default_config_path}")
-        print(f"Copying config to: {global_config_path}")
+        print(f"Copying config from: {default_config_path}", file=sys.stderr)
+        print(f"Copying config to: {global_config_path}", file=sys.stderr)
         shutil.copy2(default_config_path, global_config_path)
 
 
@@ -58,12 +66,91 @@ class LoggingConfig(BaseModel):
     )
 
 
+class CacheConfig(BaseModel):
+    """Local cache configuration."""
+
+    directory: str = Field(
+        default="~/.cache/h-cli", description="Directory for h-cli caches"
+    )
+    merge_max_bytes: int = Field(
+        default=512 * 1024 * 1024,
+        description="Size budget of the merge content cache (LRU eviction)",
+    )
+    tree_max_bytes: int = Field(
+        default=16 * 1024 * 1024,
+        description="Size budget of the rendered directory tree cache",
+    )
+    commit_msg_max_bytes: int = Field(
+        default=1024 * 1024,
+        description="Size budget of the generated commit message cache",
+    )
+    ai_max_bytes: int = Field(
+        default=64 * 1024 * 1024,
+        description="Size budget of the AI response cache (LRU eviction)",
+    )
+    ai_ttl_seconds: float = Field(
+        default=7 * 24 * 60 * 60,
+        description="Seconds a cached AI response is reused",
+    )
+
+
+class OpenAIConfig(BaseModel):
+    """OpenAI-compatible provider configuration, one section per provider."""
+
+    base_url: Optional[str] = Field(
+        default=None,
+        description="API root, e.g. http://localhost:8000/v1 for a self-hosted "
+        "server (default: the provider's)",
+    )
+    model: Optional[str] = Field(
+        default=None, description="Model name (default: the provider's default)"
+    )
+    connect_timeout_s: float = Field(
+        default=5.0, gt=0, description="Seconds to establish a connection"
+    )
+    read_timeout_s: float = Field(
+        default=120.0, gt=0, description="Seconds to wait for each read"
+    )
+    max_retries: int = Field(
+        default=3, ge=0, description="Retries on rate limits and server errors"
+    )
+
+
+class HedgeConfig(BaseModel):
+    """Hedged AI request configuration."""
+
+    enabled: bool = Field(
+        default=False, description="Send a second request when the first is slow"
+    )
+    providers: List[str] = Field(
+        default_factory=list,
+        description="Providers to ask, in order (default: ai_provider twice)",
+    )
+    percentile: float = Field(
+        default=0.95,
+        ge=0,
+        le=1,
+        description="Latency percentile after which the next request is sent",
+    )
+    delay_s: float = Field(
+        default=2.0,
+        ge=0,
+        description="Hedge delay until enough latencies have been recorded",
+    )
+    max_requests: int = Field(
+        default=2, ge=1, description="Most requests sent for one prompt"
+    )
+
+
 class Config(BaseSettings):
     """Main configuration model."""
 
     app: AppConfig = Field(description="Application configuration")
     plugins: PluginConfig = Field(description="Plugin configurations")
     logging: LoggingConfig = Field(description="Logging configuration")
+    cache: CacheConfig = Field(
+        default_factory=CacheConfig, description="Cache configuration"
+    )
     api_key: Optional[str] = Field(default=None, description="API key for AI models")
     gemini_api_key: Optional[str] = Field(
         default=None, description="API key for Gemini model"
@@ -72,11 +159,21 @@ class Config(BaseSettings):
         default=None, description="API key for OpenRouter"
     )
     ai_provider: str = Field(
-        default="gemini", description="AI provider to use (gemini or openai)"
+        default="gemini",
+        description="AI provider to use (gemini, openai, openrouter, or fake for tests)",
     )
     openai_api_key: Optional[str] = Field(
         default=None, description="API key for OpenAI"
     )
+    openai: OpenAIConfig = Field(
+        default_factory=OpenAIConfig, description="OpenAI provider configuration"
+    )
+    openrouter: OpenAIConfig = Field(
+        default_factory=OpenAIConfig, description="OpenRouter provider configuration"
+    )
+    hedge: HedgeConfig = Field(
+        default_factory=HedgeConfig, description="Hedged AI request configuration"
+    )
 
     @classmethod
     def from_yaml(cls, config_path: Path, **kwargs: Any) -> "Config":
@@ -105,6 +202,6 @@ def get_config() -> Config:
 
     if _config_instance is None:
         _config_instance = load_config()
-        print(f"Using config file: {get_global_config_path()}")
+        print(f"Using config file: {get_global_config_path()}", file=sys.stderr)
 
     return _config_instance
@@ -6,6 +6,7 @@ from click import get_current_context
 from rich.console import Console
 
 from app.adapters.ai import add_ai
+from app.adapters.base.merge_archive import add_merge_archive
 from app.adapters.base.merge_files import add_merge_files
 from app.adapters.git import add_git_clone, add_git_commit_msg_prompt, add_git_tree
 from app.core.config import load_config
@@ -85,6 +86,7 @@ add_git_commit_msg_prompt(app, "gp")
 add_git_tree(app, "gt")
 add_git_clone(app, "gc")
 add_merge_files(app, "m")
+add_merge_archive(app, "ma")
 add_ai(app, "ai")
 
 if __name__ == "__main__":
@@ -23,7 +23,7 @@ def setup_logger(
     """
     logging.basicConfig(
         format="%(message)s",
-        stream=sys.stdout,
+        stream=sys.stderr,
         level=level or logging.INFO,
     )
 
@@ -0,0 +1,171 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from app.frameworks.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Evict down to this fraction of the budget so eviction doesn't run on every set
+EVICT_TARGET_RATIO = 0.9
+# SQLite limits the number of host parameters per statement
+SQL_BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+"""
+
+
+class DiskCache:
+    """
+    Persistent key/value store with size-bounded LRU eviction.
+
+    Backed by a single SQLite file in WAL mode, so several `h` processes can
+    read and write the same cache at once.
+    """
+
+    def __init__(self, path: Union[str, Path], max_bytes: int) -> None:
+        """
+        Open (or create) a cache.
+
+        Args:
+            path: SQLite database file
+            max_bytes: Total size of stored values before LRU eviction kicks in
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the value stored under key, or None."""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        """
+        Look up many keys at once and mark the hits as recently used.
+
+        Args:
+            keys: Keys to look up
+
+        Returns:
+            Mapping of the keys that were found to their values
+        """
+        found: Dict[str, bytes] = {}
+        now = time.time()
+        with self._lock, self._transaction():
+            for batch in _batched(list(keys)):
+                marks = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM entries WHERE key IN ({marks})", batch
+                ).fetchall()
+                found.update((key, bytes(value)) for key, value in rows)
+                hits = [key for key in batch if key in found]
+                if hits:
+                    self._conn.execute(
+                        "UPDATE entries SET accessed = ? "
+                        f"WHERE key IN ({','.join('?' * len(hits))})",
+                        [now, *hits],
+                    )
+        return found
+
+    def set(self, key: str, value: bytes) -> None:
+        """Store value under key."""
+        self.set_many([(key, value)])
+
+    def set_many(self, items: Iterable[Tuple[str, bytes]]) -> None:
+        """Store many values in one transaction, then evict if over budget."""
+        now = time.time()
+        rows = [(key, value, len(value), now) for key, value in items]
+        if not rows:
+            return
+        with self._lock, self._transaction():
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, size, accessed) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        """Remove key from the cache if present."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+
+    def total_size(self) -> int:
+        """Total size in bytes of all stored values."""
+        with self._lock:
+            return self._total_size()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self._conn.close()
+
+    def _total_size(self) -> int:
+        row = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        return int(row[0])
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits its budget."""
+        total = self._total_size()
+        if total <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * EVICT_TARGET_RATIO)
+        doomed: List[str] = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY accessed ASC"
+        ):
+            if total <= target:
+                break
+            doomed.append(key)
+            total -= size
+
+        for batch in _batched(doomed):
+            self._conn.execute(
+                f"DELETE FROM entries WHERE key IN ({','.join('?' * len(batch))})",
+                batch,
+            )
+        logger.debug("cache.evicted", path=str(self.path), entries=len(doomed))
+
+    def _transaction(self) -> "_Transaction":
+        return _Transaction(self._conn)
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK around a block of statements."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._conn = conn
+
+    def __enter__(self) -> None:
+        self._conn.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type: object, exc: object, tb: object) -> None:
+        self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def _batched(keys: List[str]) -> Iterable[List[str]]:
+    for start in range(0, len(keys), SQL_BATCH_SIZE):
+        yield keys[start : start + SQL_BATCH_SIZE]
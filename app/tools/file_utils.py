@@ -1,6 +1,5 @@
 import os
 import tempfile
-from fnmatch import fnmatch
 from pathlib import Path
 from typing import List, Union
 
@@ -9,6 +8,17 @@ from app.frameworks.logger import setup_logger
 logger = setup_logger(__name__)
 
 
+def get_temp_file_path(filename: str) -> str:
+    """임시 디렉토리 안의 파일 경로 반환.
+    Args:
+        filename: 파일 이름
+
+    Returns:
+        임시 파일 경로
+    """
+    return os.path.join(tempfile.gettempdir(), filename)
+
+
 def create_temp_file(
     filename: str,
     content: str,
@@ -21,7 +31,7 @@ def create_temp_file(
     Returns:
         생성된 임시 파일 경로
     """
-    tempfile_path = os.path.join(tempfile.gettempdir(), filename)
+    tempfile_path = get_temp_file_path(filename)
 
     with open(tempfile_path, "w", encoding="utf-8") as temp:
         temp.write(content)
@@ -51,12 +61,34 @@ def is_binary_file(file_path: Union[str, Path]) -> bool:
         return True
 
 
-def should_exclude_file(
-    file_path: Union[str, Path], exclude_patterns: List[str], include_docs: bool = False
-) -> bool:
-    """Check if a file should be excluded based on glob patterns and file type."""
-    # Exclude .md files by default unless include_docs is True
-    if not include_docs and str(file_path).endswith(".md"):
-        return True
+def normalize_roots(directory: Union[str, Path], roots: List[str]) -> List[str]:
+    """
+    Turn subtree roots into '/'-separated paths relative to directory.
+
+    Roots below another root are dropped, so every file is under at most one.
+
+    Args:
+        directory: The directory roots are relative to (unless absolute)
+        roots: Paths of the subtrees to keep
 
-    return any(fnmatch(str(file_path), pattern) for pattern in exclude_patterns)
+    Returns:
+        Sorted relative roots; empty if one of them is directory itself
+
+    Raises:
+        ValueError: If a root is outside directory
+    """
+    base = os.path.abspath(directory)
+    normalized = set()
+    for root in roots:
+        relative = os.path.relpath(os.path.abspath(os.path.join(base, root)), base)
+        if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+            raise ValueError(f"{root} is outside {directory}")
+        if relative == os.curdir:
+            return []
+        normalized.add(Path(relative).as_posix())
+
+    kept: List[str] = []
+    for root in sorted(normalized):
+        if not any(root.startswith(parent + "/") for parent in kept):
+            kept.append(root)
+    return kept
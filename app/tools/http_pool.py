@@ -0,0 +1,182 @@
+import http.client
+import socket
+import threading
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from app.frameworks.logger import setup_logger as get_logger
+
+logger = get_logger(__name__)
+
+# Idle keep-alive connections kept per pool
+DEFAULT_POOL_SIZE = 4
+
+# Errors meaning a reused connection was closed by the server while idle
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+HTTPConnection = Union[http.client.HTTPConnection, http.client.HTTPSConnection]
+
+
+class PooledResponse:
+    """
+    A response whose connection goes back to the pool once the body is read.
+
+    Use as a context manager: on exit the connection is returned to the pool if
+    the body was read completely and the server allows keep-alive, and closed
+    otherwise.
+    """
+
+    def __init__(
+        self, pool: "HTTPPool", conn: HTTPConnection, response: http.client.HTTPResponse
+    ) -> None:
+        self._pool = pool
+        self._conn: Optional[HTTPConnection] = conn
+        self.response = response
+        self.status = response.status
+        self.headers = response.headers
+
+    def read(self) -> bytes:
+        """Read the whole body."""
+        return self.response.read()
+
+    def readline(self) -> bytes:
+        """Read one line of the body (b"" at the end)."""
+        return self.response.readline()
+
+    def close(self) -> None:
+        """Release the connection to the pool, or close it if it can't be reused."""
+        if self._conn is None:
+            return
+        reusable = self.response.isclosed() and not self.response.will_close
+        if not reusable:
+            self.response.close()
+        self._pool.release(self._conn, reusable)
+        self._conn = None
+
+    def __enter__(self) -> "PooledResponse":
+        return self
+
+    def __exit__(self, exc_type: object, exc: object, tb: object) -> None:
+        self.close()
+
+
+class HTTPPool:
+    """
+    Keep-alive HTTP(S) connections to one server, reused across requests.
+
+    Connections are created on demand and kept idle up to max_size; the most
+    recently used one is handed out first, since it's the least likely to have
+    been closed by the server. Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        max_size: int = DEFAULT_POOL_SIZE,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+    ) -> None:
+        """
+        Args:
+            base_url: Scheme, host and optional port (a path is ignored)
+            max_size: Idle connections kept for reuse
+            connect_timeout: Seconds to establish a connection
+            read_timeout: Seconds to wait for each read from the server
+        """
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported URL: {base_url}")
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.max_size = max_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._idle: List[HTTPConnection] = []
+        self._lock = threading.Lock()
+        # Connections created, for tests and logs
+        self.created = 0
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> PooledResponse:
+        """
+        Send a request and return once the response headers have arrived.
+
+        A reused connection the server has closed in the meantime is replaced
+        by a new one transparently.
+
+        Args:
+            method: HTTP method
+            path: Request path, including any query string
+            body: Request body
+            headers: Request headers
+
+        Returns:
+            PooledResponse: The response; close it (or use `with`) when done
+
+        Raises:
+            OSError: If the server can't be reached or times out
+            http.client.HTTPException: If the response is malformed
+        """
+        while True:
+            conn, reused = self._acquire()
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                return PooledResponse(self, conn, conn.getresponse())
+            except _STALE_ERRORS:
+                conn.close()
+                if not reused:
+                    raise
+                logger.debug("http.pool.stale", host=self.host)
+            except BaseException:
+                conn.close()
+                raise
+
+    def release(self, conn: HTTPConnection, reusable: bool = True) -> None:
+        """Return a connection after its response was read, or close it."""
+        with self._lock:
+            if reusable and conn.sock is not None and len(self._idle) < self.max_size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def _acquire(self) -> Tuple[HTTPConnection, bool]:
+        """An idle connection (reused=True) or a newly connected one."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+            self.created += 1
+
+        conn: HTTPConnection
+        if self.scheme == "https":
+            conn = http.client.HTTPSConnection(
+                self.host, self.port, timeout=self.connect_timeout
+            )
+        else:
+            conn = http.client.HTTPConnection(
+                self.host, self.port, timeout=self.connect_timeout
+            )
+        conn.connect()
+        # Connecting and waiting for the server have separate timeouts
+        assert conn.sock is not None
+        conn.sock.settimeout(self.read_timeout)
+        conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return conn, False
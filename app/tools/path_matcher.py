@@ -0,0 +1,206 @@
+import re
+from typing import FrozenSet, Iterable, List, Optional, Tuple
+
+GLOB_CHARS = frozenset("*?[")
+
+
+class PathMatcher:
+    """
+    A set of .gitignore-style patterns compiled for fast matching.
+
+    Patterns are matched against '/'-separated paths relative to the merge
+    directory, following .gitignore rules:
+
+    - A pattern without a slash matches a file or directory name at any depth
+      (`build`, `*.pyc`).
+    - A pattern with a leading or middle slash is anchored to the root
+      (`/setup.py`, `docs/*.rst`).
+    - A trailing slash only matches directories (`dist/`).
+    - `*` and `?` never match `/`; `**/`, `/**/` and a trailing `/**` match any
+      number of directories.
+    - A pattern that matches a directory matches everything below it.
+    - A backslash makes the next character literal (`\\#notes`, `\\!x`, `\\*`).
+
+    Negated (`!`) patterns are not supported.
+
+    Instead of calling fnmatch once per pattern, literal names become a
+    frozenset lookup on the path components, `*.ext` patterns become a suffix
+    lookup, literal anchored paths become a prefix lookup, and every remaining
+    glob is fused into a single compiled regular expression.
+    """
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        """
+        Compile patterns.
+
+        Args:
+            patterns: .gitignore-style patterns; blank patterns are ignored
+        """
+        self.patterns = list(patterns)
+        self._rules: List[Tuple[str, bool, bool]] = []
+        names: List[str] = []
+        dir_names: List[str] = []
+        suffixes: List[str] = []
+        paths: List[str] = []
+        regexes: List[str] = []
+
+        for raw in self.patterns:
+            pattern = raw.strip()
+            dir_only = pattern.endswith("/")
+            pattern = pattern.strip("/") if dir_only else pattern
+            if not pattern:
+                continue
+
+            anchored = "/" in pattern or raw.strip().startswith("/")
+            pattern = pattern.lstrip("/")
+            has_glob = not GLOB_CHARS.isdisjoint(pattern)
+            self._rules.append((pattern, anchored, dir_only))
+
+            if "\\" in pattern:
+                # Only the regex translation understands backslash escapes
+                regexes.append(_translate(pattern, anchored, dir_only))
+            elif not anchored and not has_glob:
+                (dir_names if dir_only else names).append(pattern)
+            elif (
+                not anchored
+                and not dir_only
+                and pattern.startswith("*.")
+                and GLOB_CHARS.isdisjoint(pattern[1:])
+            ):
+                suffixes.append(pattern[1:])
+            elif anchored and not dir_only and not has_glob:
+                paths.append(pattern)
+            else:
+                regexes.append(_translate(pattern, anchored, dir_only))
+
+        self._names: FrozenSet[str] = frozenset(names)
+        self._dir_names: FrozenSet[str] = frozenset(dir_names)
+        self._suffixes: FrozenSet[str] = frozenset(suffixes)
+        self._paths: FrozenSet[str] = frozenset(paths)
+        self._regex = (
+            re.compile("|".join(f"(?:{regex})" for regex in regexes), re.DOTALL)
+            if regexes
+            else None
+        )
+
+    def __bool__(self) -> bool:
+        return bool(
+            self._names
+            or self._dir_names
+            or self._suffixes
+            or self._paths
+            or self._regex
+        )
+
+    def to_git_pathspecs(self, exclude: bool = False) -> Optional[List[str]]:
+        """
+        Translate the patterns into equivalent git `:(glob)` pathspecs.
+
+        Each rule becomes a pathspec for the path itself and one for everything
+        below it, since git pathspecs with wildcards don't match leading
+        directories. Rules git can't express the same way (backslash escapes)
+        are dropped for exclusions, which only makes git return extra files;
+        for inclusions that would lose files, so None is returned instead.
+
+        Args:
+            exclude: Emit `:(exclude,glob)` pathspecs instead of `:(glob)`
+
+        Returns:
+            Optional[List[str]]: The pathspecs, or None if they can't be used
+        """
+        magic = ":(exclude,glob)" if exclude else ":(glob)"
+        pathspecs: List[str] = []
+        for pattern, anchored, dir_only in self._rules:
+            if "\\" in pattern:
+                if exclude:
+                    continue
+                return None
+            base = pattern if anchored else f"**/{pattern}"
+            if not dir_only:
+                pathspecs.append(magic + base)
+            pathspecs.append(f"{magic}{base}/**")
+        return pathspecs
+
+    def matches(self, path: str) -> bool:
+        """
+        Check whether a relative path (or one of its parent directories) matches.
+
+        Args:
+            path: '/'-separated path relative to the matcher's root
+
+        Returns:
+            True if any pattern matches
+        """
+        parts = path.split("/")
+
+        if self._names and not self._names.isdisjoint(parts):
+            return True
+        if self._dir_names and not self._dir_names.isdisjoint(parts[:-1]):
+            return True
+        if self._suffixes:
+            for part in parts:
+                dot = part.find(".")
+                while dot != -1:
+                    if part[dot:] in self._suffixes:
+                        return True
+                    dot = part.find(".", dot + 1)
+        if self._paths:
+            if path in self._paths:
+                return True
+            slash = path.find("/")
+            while slash != -1:
+                if path[:slash] in self._paths:
+                    return True
+                slash = path.find("/", slash + 1)
+        if self._regex is not None and self._regex.fullmatch(path):
+            return True
+        return False
+
+
+def _translate(pattern: str, anchored: bool, dir_only: bool) -> str:
+    """Translate one .gitignore glob into a regex matching a whole relative path."""
+    regex = ""
+    i = 0
+    n = len(pattern)
+    while i < n:
+        if pattern[i] == "\\" and i + 1 < n:
+            regex += re.escape(pattern[i + 1])
+            i += 2
+        elif pattern.startswith("**/", i) and (i == 0 or pattern[i - 1] == "/"):
+            regex += "(?:.*/)?"
+            i += 3
+        elif (
+            pattern.startswith("**", i)
+            and i + 2 == n
+            and i > 0
+            and pattern[i - 1] == "/"
+        ):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            while i < n and pattern[i] == "*":
+                i += 1
+            regex += "[^/]*"
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                regex += re.escape("[")
+                i += 1
+            else:
+                body = pattern[i + 1 : end]
+                if body[0] in "!^":
+                    body = "^" + body[1:]
+                regex += "[" + body.replace("\\", "\\\\") + "]"
+                i = end + 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+
+    prefix = "" if anchored else "(?:.*/)?"
+    # A matched directory matches everything below it; dir-only patterns require
+    # something below, since we only ever see file paths.
+    suffix = "/.*" if dir_only else "(?:/.*)?"
+    return prefix + regex + suffix
@@ -0,0 +1,157 @@
+from typing import Dict, List, Optional
+
+# Above this many entries a directory is shown as counts instead of listed
+DEFAULT_MAX_ENTRIES = 50
+
+
+class _Node:
+    __slots__ = ("children", "size", "files", "total_size")
+
+    def __init__(self) -> None:
+        # None for files
+        self.children: Optional[Dict[str, "_Node"]] = {}
+        self.size: Optional[int] = None
+        # Files and bytes at or below this node
+        self.files = 0
+        self.total_size = 0
+
+
+class PathTree:
+    """
+    A trie of '/'-separated paths that renders as a depth-limited tree.
+
+    Directory totals (file counts and sizes) are accumulated while paths are
+    added, so rendering never walks below the depth it prints.
+    """
+
+    def __init__(self) -> None:
+        self._root = _Node()
+
+    def add(self, path: str, size: Optional[int] = None) -> None:
+        """
+        Add a file.
+
+        Args:
+            path: '/'-separated path of the file
+            size: Size of the file in bytes, if known
+
+        Raises:
+            ValueError: If the path is below a file that was already added
+        """
+        node = self._root
+        node.files += 1
+        node.total_size += size or 0
+        *dirs, name = path.split("/")
+        for part in dirs:
+            if node.children is None:
+                raise ValueError(f"{path} is below a file")
+            node = node.children.setdefault(part, _Node())
+            node.files += 1
+            node.total_size += size or 0
+
+        leaf = _Node()
+        leaf.children = None
+        leaf.size = size
+        leaf.files = 1
+        leaf.total_size = size or 0
+        if node.children is None:
+            raise ValueError(f"{path} is below a file")
+        node.children.setdefault(name, leaf)
+
+    def __len__(self) -> int:
+        return self._root.files
+
+    def render(
+        self,
+        depth: int = 3,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        sizes: bool = False,
+    ) -> str:
+        """
+        Render the tree with box-drawing characters.
+
+        Directories deeper than depth, or with more than max_entries entries,
+        are collapsed into a single line with their file count. The top level
+        can't be collapsed, so only its first max_entries entries are listed,
+        followed by a line counting the rest.
+
+        Args:
+            depth: Number of path levels to show
+            max_entries: Maximum entries listed per directory
+            sizes: Whether to annotate files and directories with their sizes
+
+        Returns:
+            The rendered tree, one entry per line
+        """
+        lines: List[str] = []
+        self._render(self._root, "", 1, depth, max_entries, sizes, lines)
+        return "\n".join(lines)
+
+    def _render(
+        self,
+        node: _Node,
+        prefix: str,
+        level: int,
+        depth: int,
+        max_entries: int,
+        sizes: bool,
+        lines: List[str],
+    ) -> None:
+        children = node.children or {}
+        # Directories first, then files, each in name order
+        names = sorted(
+            children, key=lambda name: (children[name].children is None, name)
+        )
+        rest = names[max_entries:] if level == 1 else []
+        if rest:
+            names = names[:max_entries]
+        for i, name in enumerate(names):
+            child = children[name]
+            last = i == len(names) - 1 and not rest
+            branch = "└── " if last else "├── "
+
+            if child.children is None:
+                size = f" ({_format_size(child.size)})" if sizes and child.size else ""
+                lines.append(f"{prefix}{branch}{name}{size}")
+                continue
+
+            collapsed = level >= depth or len(child.children) > max_entries
+            summary = []
+            if collapsed:
+                summary.append(f"{child.files} file{'s' if child.files != 1 else ''}")
+            if sizes:
+                summary.append(_format_size(child.total_size))
+            suffix = f" ({', '.join(summary)})" if summary else ""
+            lines.append(f"{prefix}{branch}{name}/{suffix}")
+            if not collapsed:
+                self._render(
+                    child,
+                    prefix + ("    " if last else "│   "),
+                    level + 1,
+                    depth,
+                    max_entries,
+                    sizes,
+                    lines,
+                )
+
+        if rest:
+            files = sum(children[name].files for name in rest)
+            summary = [f"{files} file{'s' if files != 1 else ''}"]
+            if sizes:
+                summary.append(
+                    _format_size(sum(children[name].total_size for name in rest))
+                )
+            lines.append(
+                f"{prefix}└── ... {len(rest)} more entries ({', '.join(summary)})"
+            )
+
+
+def _format_size(size: Optional[int]) -> str:
+    value = float(size or 0)
+    if value < 1024:
+        return f"{value:.0f} B"
+    for unit in ("KB", "MB"):
+        value /= 1024
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+    return f"{value / 1024:.1f} GB"
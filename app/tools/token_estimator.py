@@ -0,0 +1,36 @@
+import re
+
+# Approximates how BPE tokenizers split text: runs of up to six ASCII letters
+# (a leading space is merged into the word), up to three digits, a line break
+# with its indentation, or any other single character (punctuation, CJK, ...).
+_TOKEN_RE = re.compile(r"[A-Za-z]{1,6}|\d{1,3}|\n[ \t]*|[^\sA-Za-z\d]")
+# Scan in slices so findall() never materializes more than this many chars
+_CHUNK_CHARS = 1 << 20
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate how many LLM tokens text will take.
+
+    The whole estimate is a single C-level regex scan per megabyte of text, so
+    it is cheap enough to run over every file of a large repository. Expect
+    it to land within roughly ±20% of real tokenizers for source code.
+
+    Args:
+        text: The text to measure
+
+    Returns:
+        The approximate token count
+    """
+    count = 0
+    start = 0
+    while start < len(text):
+        end = min(start + _CHUNK_CHARS, len(text))
+        if end < len(text):
+            # Don't split a word between two slices
+            newline = text.rfind("\n", start, end)
+            if newline > start:
+                end = newline
+        count += len(_TOKEN_RE.findall(text, start, end))
+        start = end
+    return count
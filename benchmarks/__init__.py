@@ -0,0 +1 @@
+"""Benchmarks for h-cli (run with `make bench`)."""
@@ -0,0 +1,132 @@
+"""Micro-benchmark the compiled PathMatcher against the old fnmatch filters.
+
+Runs both filter implementations over synthetic repository paths with the
+default ignore lists plus a configurable number of user patterns.
+
+Usage:
+    python -m benchmarks.bench_matcher --paths 100000 --patterns 50
+"""
+
+import argparse
+import random
+import time
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Callable, List, Union
+
+from app.adapters.base.merge_files import IGNORED_FILES, compile_merge_filters
+
+ROOT = Path("/repo")
+EXTENSIONS = [".py", ".ts", ".md", ".json", ".png", ".go", ".yaml", ".txt"]
+
+
+def make_paths(count: int, seed: int = 0) -> List[Path]:
+    """Synthetic relative paths, 1-6 directories deep."""
+    rng = random.Random(seed)
+    dirs = ["src", "lib", "tests", "docs", "node_modules", "vendor", "pkg", "app"]
+    return [
+        Path(
+            *rng.choices(dirs, k=rng.randint(1, 6)),
+            f"file_{i}{rng.choice(EXTENSIONS)}",
+        )
+        for i in range(count)
+    ]
+
+
+def make_patterns(count: int) -> List[str]:
+    """A mix of literal names, extension rules and globs."""
+    kinds = [
+        lambda i: f"generated_{i}",
+        lambda i: f"*.ext{i}",
+        lambda i: f"build_{i}/*.js",
+        lambda i: f"*_{i}.snap",
+    ]
+    return [kinds[i % len(kinds)](i) for i in range(count)]
+
+
+# The fnmatch helpers merge_files() used before PathMatcher, kept as reference
+
+
+def should_exclude_file(
+    file_path: Union[str, Path], exclude_patterns: List[str], include_docs: bool = False
+) -> bool:
+    """Check if a file should be excluded based on glob patterns and file type."""
+    # Exclude .md files by default unless include_docs is True
+    if not include_docs and str(file_path).endswith(".md"):
+        return True
+
+    return any(fnmatch(str(file_path), pattern) for pattern in exclude_patterns)
+
+
+def should_include_file(file_path: Path, include_patterns: List[str]) -> bool:
+    """
+    Check if a file should be included based on glob patterns.
+
+    Returns True if:
+    - include_patterns is empty (include all)
+    - OR file matches at least one of the include patterns
+    """
+    if not include_patterns:
+        return True
+
+    return any(fnmatch(str(file_path), pattern) for pattern in include_patterns)
+
+
+def fnmatch_filter(exclude: List[str], include: List[str]) -> Callable[[Path], bool]:
+    """The per-file checks merge_files() used before PathMatcher."""
+
+    def keep(file_path: Path) -> bool:
+        full_path = ROOT / file_path
+        if any(seg in (IGNORED_FILES + exclude) for seg in full_path.parts):
+            return False
+        if should_exclude_file(full_path, exclude, False):
+            return False
+        return should_include_file(file_path, include)
+
+    return keep
+
+
+def matcher_filter(exclude: List[str], include: List[str]) -> Callable[[Path], bool]:
+    """The compiled filters used by merge_files() now."""
+    exclude_matcher, include_matcher = compile_merge_filters(exclude, include, False)
+
+    def keep(file_path: Path) -> bool:
+        relative = file_path.as_posix()
+        if exclude_matcher.matches(relative):
+            return False
+        return include_matcher is None or include_matcher.matches(relative)
+
+    return keep
+
+
+def timed(keep: Callable[[Path], bool], paths: List[Path]) -> float:
+    start = time.perf_counter()
+    for path in paths:
+        keep(path)
+    return time.perf_counter() - start
+
+
+def run(paths: int, patterns: int) -> None:
+    """Time both implementations and print the speedup."""
+    files = make_paths(paths)
+    exclude = make_patterns(patterns) + ["node_modules"]
+    include: List[str] = ["*.py", "*.ts", "src/**"]
+
+    old = timed(fnmatch_filter(exclude, include), files)
+    new = timed(matcher_filter(exclude, include), files)
+    print(f"paths={paths} patterns={len(exclude) + len(include)}")
+    print(f"fnmatch     {old:.3f}s")
+    print(f"PathMatcher {new:.3f}s  speedup={old / new:.1f}x")
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paths", type=int, default=100_000)
+    parser.add_argument("--patterns", type=int, default=50)
+    args = parser.parse_args()
+    run(args.paths, args.patterns)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""Benchmark the merge pipeline on synthetic repositories.
+
+Generates throwaway git repositories at several scales (small text files in
+deep trees, some binary files and a few large files) and runs merge_files()
+with different flag combinations. Every scenario runs in a fresh interpreter
+so peak RSS is not polluted by earlier runs, and reports:
+
+- wall time (best of --repeat runs)
+- read/write syscalls of the interpreter from /proc/self/io (Linux only;
+  git subprocesses are not included)
+- peak Python allocations (tracemalloc, measured in a separate run)
+- peak RSS (resource.getrusage)
+
+Results are printed as a table and written as JSON. With --baseline, every
+metric is compared against a previous result file and the exit status is 1
+when one got worse by more than --threshold.
+
+Usage:
+    python -m benchmarks.bench_merge --scales 1k 10k --output bench.json
+    python -m benchmarks.bench_merge --scales 1k --baseline bench.json
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from app.adapters.base.merge_files import iter_merge_sections, merge_files
+from app.adapters.base.merge_writer import write_merged_bytes
+from app.tools.disk_cache import DiskCache
+
+
+class Scale(NamedTuple):
+    """Shape of a synthetic repository."""
+
+    files: int
+    # Share of files that contain NUL bytes
+    binary_ratio: float = 0.05
+    max_depth: int = 8
+    large_files: int = 1
+    large_file_bytes: int = 4 * 1024 * 1024
+
+
+SCALES: Dict[str, Scale] = {
+    "1k": Scale(files=1_000, large_files=1),
+    "10k": Scale(files=10_000, large_files=2),
+    "100k": Scale(files=100_000, large_files=4),
+}
+
+# Metrics compared against a baseline; all of them are "lower is better"
+METRICS = ("wall_s", "syscalls", "peak_alloc_bytes", "max_rss_kb")
+
+
+def create_repo(root: Path, scale: Scale, seed: int = 0) -> None:
+    """Create a git repository with the shape described by scale."""
+    rng = random.Random(seed)
+    dirs = ["src", "lib", "core", "util", "api", "models", "tests", "pkg"]
+    line = "    value = compute(value, 'abcdefghij') + 42  # synthetic\n"
+
+    for i in range(scale.files):
+        parent = root.joinpath(*rng.choices(dirs, k=rng.randint(0, scale.max_depth)))
+        parent.mkdir(parents=True, exist_ok=True)
+        if rng.random() < scale.binary_ratio:
+            (parent / f"asset_{i}.bin").write_bytes(
+                b"\x89BIN\x00" + rng.randbytes(rng.randint(64, 4096))
+            )
+        else:
+            lines = rng.randint(5, 60)
+            (parent / f"module_{i}.py").write_text(
+                f"def f_{i}(value):\n" + line * lines
+            )
+
+    for i in range(scale.large_files):
+        (root / f"large_{i}.txt").write_text(
+            line * (scale.large_file_bytes // len(line))
+        )
+
+    subprocess.run(["git", "init", "-q"], cwd=root, check=True)
+    subprocess.run(
+        ["git", "-c", "core.autocrlf=false", "add", "."], cwd=root, check=True
+    )
+
+
+def _to_devnull(repo: Path, **kwargs: object) -> None:
+    """What `h m -o FILE` does: stream raw sections into a real file."""
+    with open(os.devnull, "wb") as out:
+        write_merged_bytes(out, iter_merge_sections(repo, raw=True, **kwargs))
+
+
+def scenarios(cache_path: Path) -> Dict[str, Callable[[Path], object]]:
+    """Flag combinations to measure, by name."""
+    return {
+        "default": lambda repo: merge_files(repo),
+        "jobs-1": lambda repo: merge_files(repo, jobs=1),
+        "filtered": lambda repo: merge_files(
+            repo, exclude_patterns=["tests/", "*.txt"], include_patterns=["src/**"]
+        ),
+        "max-tokens": lambda repo: merge_files(repo, max_tokens=200_000),
+        "char-count": lambda repo: merge_files(repo, char_count=True),
+        "cache-warm": lambda repo: merge_files(
+            repo, cache=DiskCache(cache_path, max_bytes=1 << 34)
+        ),
+        "output-file": _to_devnull,
+    }
+
+
+def _syscalls() -> Optional[int]:
+    """Read and write syscalls of this process so far, if the OS reports them."""
+    try:
+        with open("/proc/self/io") as file:
+            counters = dict(line.split(": ") for line in file.read().splitlines())
+    except OSError:
+        return None
+    return int(counters["syscr"]) + int(counters["syscw"])
+
+
+def measure(scenario: str, repo: Path, repeat: int) -> Dict[str, Any]:
+    """Run one scenario in this process and collect its metrics."""
+    with tempfile.TemporaryDirectory() as tmp:
+        run = scenarios(Path(tmp) / "cache.sqlite3")[scenario]
+        if scenario == "cache-warm":
+            run(repo)
+
+        before = _syscalls()
+        start = time.perf_counter()
+        run(repo)
+        best = time.perf_counter() - start
+        after = _syscalls()
+
+        for _ in range(repeat - 1):
+            start = time.perf_counter()
+            run(repo)
+            best = min(best, time.perf_counter() - start)
+
+        tracemalloc.start()
+        run(repo)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "wall_s": round(best, 4),
+        "syscalls": (
+            after - before if before is not None and after is not None else None
+        ),
+        "peak_alloc_bytes": peak,
+        # Kilobytes on Linux
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def run_isolated(scenario: str, repo: Path, repeat: int) -> Dict[str, Any]:
+    """Run one scenario in a fresh interpreter so RSS starts from scratch."""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.bench_merge",
+            "--worker",
+            scenario,
+            "--repo",
+            str(repo),
+            "--repeat",
+            str(repeat),
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    metrics: Dict[str, Any] = json.loads(result.stdout.splitlines()[-1])
+    return metrics
+
+
+def compare(
+    results: Dict[str, Dict[str, Dict[str, Any]]],
+    baseline: Dict[str, Dict[str, Dict[str, Any]]],
+    threshold: float,
+) -> List[str]:
+    """Describe every metric that regressed by more than threshold."""
+    regressions = []
+    for scale, by_scenario in results.items():
+        for scenario, metrics in by_scenario.items():
+            previous = baseline.get(scale, {}).get(scenario, {})
+            for metric in METRICS:
+                old, new = previous.get(metric), metrics.get(metric)
+                if not isinstance(old, (int, float)) or not isinstance(
+                    new, (int, float)
+                ):
+                    continue
+                if old > 0 and new > old * (1 + threshold):
+                    regressions.append(
+                        f"{scale}/{scenario} {metric}: {old} -> {new} "
+                        f"(+{(new / old - 1) * 100:.0f}%)"
+                    )
+    return regressions
+
+
+def run(
+    scales: List[str],
+    names: List[str],
+    repeat: int,
+    output: Optional[Path],
+    baseline: Optional[Path],
+    threshold: float,
+) -> int:
+    """Benchmark every scale and scenario; return the process exit status."""
+    results: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    print(
+        f"{'scale':<6} {'scenario':<12} {'wall_s':>8} {'syscalls':>9} "
+        f"{'alloc_MiB':>10} {'rss_MiB':>8}"
+    )
+    for scale_name in scales:
+        with tempfile.TemporaryDirectory() as tmp:
+            repo = Path(tmp)
+            create_repo(repo, SCALES[scale_name])
+            results[scale_name] = {}
+            for name in names:
+                metrics = run_isolated(name, repo, repeat)
+                results[scale_name][name] = metrics
+                syscalls = metrics["syscalls"]
+                print(
+                    f"{scale_name:<6} {name:<12} {metrics['wall_s']:>8} "
+                    f"{'-' if syscalls is None else syscalls:>9} "
+                    f"{metrics['peak_alloc_bytes'] / 2**20:>10.1f} "
+                    f"{metrics['max_rss_kb'] / 1024:>8.1f}"
+                )
+
+    if output:
+        output.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Results written to {output}")
+
+    if baseline:
+        regressions = compare(results, json.loads(baseline.read_text()), threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {threshold:.0%} against {baseline}")
+    return 0
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", nargs="+", choices=SCALES, default=["1k", "10k"])
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=list(scenarios(Path())),
+        default=list(scenarios(Path())),
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="Results JSON to compare to")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Allowed relative regression per metric (default: 0.2)",
+    )
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--repo", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args.worker, args.repo, args.repeat)))
+        return
+    if args.baseline and not args.baseline.is_file():
+        # Checked up front, before minutes of benchmarking
+        sys.exit(
+            f"Baseline {args.baseline} not found; record one with "
+            "'make bench-baseline' (or --output on a known-good checkout)"
+        )
+    sys.exit(
+        run(
+            args.scales,
+            args.scenarios,
+            args.repeat,
+            args.output,
+            args.baseline,
+            args.threshold,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
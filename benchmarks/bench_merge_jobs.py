@@ -0,0 +1,90 @@
+"""Benchmark serial vs. threaded file reading in `h m`.
+
+Generates a throwaway git repository and times merge_files() with different
+--jobs values. Local disks answer from the page cache in microseconds, so
+--latency-ms adds a fixed delay to every file read to emulate the per-open
+round trip of an NFS-backed checkout.
+
+Usage:
+    python -m benchmarks.bench_merge_jobs --files 2000 --latency-ms 2
+"""
+
+import argparse
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+from unittest.mock import patch
+
+from app.adapters.base import merge_ingest
+from app.adapters.base.merge_files import merge_files
+
+
+def create_repo(root: Path, files: int, lines: int = 40) -> None:
+    """Create a git repository with `files` small text files."""
+    for i in range(files):
+        path = root / f"pkg{i % 50}" / f"module_{i}.py"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"# module {i}\n" + "value = 'x' * 64\n" * lines)
+
+    subprocess.run(["git", "init", "-q"], cwd=root, check=True)
+    subprocess.run(["git", "add", "."], cwd=root, check=True)
+
+
+def with_latency(
+    read_text: Callable[..., merge_ingest.ReadResult], latency: float
+) -> Callable[..., merge_ingest.ReadResult]:
+    """Wrap read_text() so every call waits `latency` seconds first."""
+
+    def slow_read_text(
+        full_path: Path, raw_min_bytes: Optional[int] = None
+    ) -> merge_ingest.ReadResult:
+        time.sleep(latency)
+        return read_text(full_path, raw_min_bytes)
+
+    return slow_read_text
+
+
+def run(files: int, jobs: List[int], latency_ms: float, repeat: int) -> None:
+    """Time merge_files() for every jobs value and print the speedup."""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        create_repo(root, files)
+
+        slow_read_text = with_latency(merge_ingest.read_text, latency_ms / 1000)
+        baseline_output = None
+        baseline_time = None
+
+        print(f"files={files} latency={latency_ms}ms repeat={repeat}")
+        with patch.object(merge_ingest, "read_text", slow_read_text):
+            for job_count in jobs:
+                best = float("inf")
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    output = merge_files(root, jobs=job_count)
+                    best = min(best, time.perf_counter() - start)
+
+                if baseline_output is None:
+                    baseline_output, baseline_time = output, best
+                identical = output == baseline_output
+                speedup = (baseline_time or best) / best
+                print(
+                    f"jobs={job_count:<3} best={best:.3f}s "
+                    f"speedup={speedup:.1f}x identical={identical}"
+                )
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.files, args.jobs, args.latency_ms, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import time
+from unittest.mock import MagicMock, patch
+
+import google.generativeai as genai
+import pytest
+from google.generativeai import protos
+from google.generativeai.types import generation_types
+from typer.testing import CliRunner
+
+from app.adapters.ai import (
+    SYSTEM_PROMPT,
+    CachedAI,
+    FakeAI,
+    ResponseCache,
+    TimedStream,
+    get_ai,
+)
+from app.adapters.ai.gemini import GeminiChatSession
+from app.core.config import Config
+from app.frameworks.cli import app
+from app.tools.disk_cache import DiskCache
+
+
+def fake_config(**kwargs):
+    return Config(app={}, plugins={}, logging={}, ai_provider="fake", **kwargs)
+
+
+def test_fake_ai_streams_chunks():
+    ai = FakeAI("hello world", chunk_size=4)
+
+    assert list(ai.stream_text("hi")) == ["hell", "o wo", "rld"]
+    assert ai.generate_text("again") == "hello world"
+    assert ai.prompts == ["hi", "again"]
+
+
+def test_timed_stream_records_latency():
+    ai = FakeAI("abcdef", chunk_size=2, first_token_delay=0.05, chunk_delay=0.02)
+    stream = TimedStream(ai.stream_text("hi"))
+
+    assert stream.first_token_s is None
+    assert "".join(stream) == "abcdef"
+    assert stream.first_token_s is not None and stream.total_s is not None
+    assert 0.05 <= stream.first_token_s < stream.total_s
+    assert stream.total_s >= 0.09
+    assert stream.chars == 6
+
+
+def test_get_ai_selects_provider():
+    assert isinstance(get_ai(fake_config()), FakeAI)
+    with pytest.raises(ValueError, match="Unsupported"):
+        get_ai(fake_config().model_copy(update={"ai_provider": "nope"}))
+
+
+def test_openai_compatible_providers_have_their_own_settings():
+    config = fake_config(
+        openai_api_key="sk-test",
+        openai={"model": "gpt-test"},
+        openrouter={"model": "router/test", "base_url": "http://localhost:8000/v1"},
+    )
+
+    openai = get_ai(config.model_copy(update={"ai_provider": "openai"}))
+    router = get_ai(config.model_copy(update={"ai_provider": "openrouter"}))
+
+    assert openai.model_name == "gpt-test"
+    assert router.model_name == "router/test"
+    assert router.base_url == "http://localhost:8000/v1"
+
+
+@pytest.fixture
+def fake_provider(tmp_path):
+    config = fake_config()
+    with (
+        patch("app.adapters.ai.get_config", return_value=config),
+        patch("app.adapters.ai.cache.get_config", return_value=config),
+        patch("app.adapters.ai.cache.get_cache_dir", return_value=tmp_path),
+        patch.object(
+            FakeAI, "stream_text", autospec=True, side_effect=FakeAI.stream_text
+        ) as stream,
+    ):
+        yield stream
+
+
+def test_ai_command_prints_stream(fake_provider):
+    result = CliRunner().invoke(app, ["ai", "hello"])
+
+    assert result.exit_code == 0, result.output
+    assert "This is a fake response.\n" in result.output
+
+
+def test_ai_command_caches_responses(fake_provider):
+    runner = CliRunner()
+
+    for args in [["ai", "hello"], ["ai", "hello  \n"], ["ai", "--no-cache", "hello"]]:
+        result = runner.invoke(app, args)
+        assert result.exit_code == 0, result.output
+        assert "This is a fake response." in result.output
+
+    # The second question only differs in trailing whitespace
+    assert fake_provider.call_count == 2
+
+
+def test_response_cache_expires(tmp_path):
+    cache = ResponseCache(DiskCache(tmp_path / "ai.sqlite3", max_bytes=1024), ttl=60)
+    ai = CachedAI(FakeAI("answer"), "fake", cache)
+
+    assert ai.generate_text("q") == "answer"
+    assert ai.generate_text("q") == "answer"
+    assert ai.generate_text("q", temperature=0.5) == "answer"
+    assert len(ai.ai.prompts) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    with patch("app.adapters.ai.cache.time.time", return_value=time.time() + 120):
+        assert cache.get(ai.key("q", {})) is None
+    assert cache.expired == 1
+
+
+def test_repl_keeps_one_session():
+    ai = FakeAI("answer")
+    with (
+        patch("app.adapters.ai.get_config", return_value=fake_config()),
+        patch("app.adapters.ai.get_ai", return_value=ai) as get,
+    ):
+        result = CliRunner().invoke(
+            app, ["ai", "--repl", "first"], input="follow up\n\n/reset\nagain\n"
+        )
+
+    assert result.exit_code == 0, result.output
+    assert get.call_count == 1
+    assert result.output.count("answer") == 3
+    first, follow_up, again = ai.prompts
+    assert first.startswith(SYSTEM_PROMPT) and first.endswith("first")
+    assert follow_up == (f"User: {first}\n\nAssistant: answer\n\nUser: follow up")
+    assert again == SYSTEM_PROMPT + "again"
+
+
+def test_gemini_chat_forgets_a_stream_broken_before_any_candidate():
+    def chunks():
+        # Usage metadata only, then the connection drops
+        yield protos.GenerateContentResponse()
+        raise ConnectionError("stream broke")
+
+    model = MagicMock()
+    model.start_chat.side_effect = lambda: genai.ChatSession(model)
+    model.generate_content.side_effect = lambda **kwargs: (
+        generation_types.GenerateContentResponse.from_iterator(chunks())
+    )
+    session = GeminiChatSession(MagicMock(model=model))
+
+    with pytest.raises(ConnectionError, match="stream broke"):
+        list(session.send("hi"))
+
+    assert session._chat.history == []
+    assert session.turns == []
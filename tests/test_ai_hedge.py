@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+
+from app.adapters.ai import (
+    AIInterface,
+    FakeAI,
+    HedgedDispatcher,
+    LatencyTracker,
+    run_detached,
+)
+
+
+def run(dispatcher, prompt="hi"):
+    start = time.perf_counter()
+    result = asyncio.run(dispatcher.generate_text(prompt))
+    return result, time.perf_counter() - start
+
+
+def test_fast_primary_is_not_hedged():
+    primary, backup = FakeAI("primary"), FakeAI("backup")
+    dispatcher = HedgedDispatcher([primary, backup], delay=0.2)
+
+    assert run(dispatcher)[0] == "primary"
+    assert backup.prompts == []
+    assert len(dispatcher.tracker) == 1
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    primary = FakeAI("primary", first_token_delay=5)
+    backup = FakeAI("backup", first_token_delay=0.01)
+    dispatcher = HedgedDispatcher([primary, backup], delay=0.05)
+
+    result, elapsed = run(dispatcher)
+
+    assert result == "backup"
+    assert elapsed < 1
+    assert primary.cancelled == 1
+    # The cancelled primary counts with the time it had run
+    backup_latency, primary_latency = sorted(dispatcher.tracker._samples)
+    assert backup_latency < 0.05 <= primary_latency
+
+
+class BlockingAI(AIInterface):
+    """A provider with only a blocking generate_text, run in a worker thread."""
+
+    def __init__(self, response, delay):
+        self.response = response
+        self.delay = delay
+
+    def generate_text(self, prompt, **kwargs):
+        time.sleep(self.delay)
+        return self.response
+
+
+def test_slow_thread_backed_provider_is_not_waited_for():
+    primary = BlockingAI("primary", delay=3)
+    backup = BlockingAI("backup", delay=0.01)
+    dispatcher = HedgedDispatcher([primary, backup], delay=0.05)
+
+    start = time.perf_counter()
+    assert run_detached(dispatcher.generate_text("hi")) == "backup"
+    assert time.perf_counter() - start < 1
+
+
+def test_single_provider_gets_a_duplicate_request():
+    ai = FakeAI("same", first_token_delay=0.2)
+    dispatcher = HedgedDispatcher([ai], delay=0.05, max_requests=3)
+
+    assert run(dispatcher)[0] == "same"
+    assert len(ai.prompts) == 3
+    assert ai.cancelled == 2
+
+
+def test_failure_is_replaced_without_waiting():
+    broken = FakeAI(error=RuntimeError("down"))
+    backup = FakeAI("backup")
+    dispatcher = HedgedDispatcher([broken, backup], delay=5)
+
+    result, elapsed = run(dispatcher)
+    assert result == "backup"
+    assert elapsed < 1
+
+    everything_down = HedgedDispatcher([broken, broken], delay=5)
+    with pytest.raises(RuntimeError, match="down"):
+        run(everything_down)
+
+
+def test_hedge_delay_follows_percentile(tmp_path):
+    tracker = LatencyTracker()
+    dispatcher = HedgedDispatcher([FakeAI()], percentile=0.9, delay=3, tracker=tracker)
+    assert dispatcher.hedge_delay() == 3
+
+    for i in range(1, 21):
+        tracker.record(i / 10)
+    assert dispatcher.hedge_delay() == pytest.approx(1.8)
+
+    history = tmp_path / "latency.json"
+    tracker.save(history)
+    assert len(LatencyTracker.load(history)) == 20
+    history.write_text("not json")
+    assert len(LatencyTracker.load(history)) == 0
+    # An unwritable directory is logged, not raised
+    tracker.save(tmp_path / "missing" / "latency.json")
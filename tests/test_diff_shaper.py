@@ -0,0 +1,84 @@
+from unittest.mock import patch
+
+from app.adapters.git import diff_shaper
+from app.adapters.git.diff_shaper import DiffShaper
+
+
+def file_diff(path, added):
+    return [
+        f"diff --git a/{path} b/{path}\n",
+        "index 1111111..2222222 100644\n",
+        f"--- a/{path}\n",
+        f"+++ b/{path}\n",
+        f"@@ -1,0 +1,{len(added)} @@\n",
+        *[f"+{line}\n" for line in added],
+    ]
+
+
+def test_small_diff_is_unchanged():
+    lines = file_diff("app.py", ["print('hi')"])
+
+    shaped = DiffShaper().shape(lines)
+
+    assert shaped.text == "".join(lines).rstrip("\n")
+    assert shaped.files == 1
+    assert shaped.original_lines == len(lines)
+
+
+def test_lock_minified_and_oversized_hunks_are_summarized():
+    lines = [
+        *file_diff("uv.lock", ["name = 'x'"] * 5000),
+        *file_diff("static/app.js", ["var a=1;" * 100]),
+        *file_diff("big.py", [f"value_{i} = {i}" for i in range(2000)]),
+        *file_diff("small.py", ["x = 1"]),
+    ]
+
+    shaped = DiffShaper(max_hunk_tokens=200).shape(lines)
+
+    assert "[lock file omitted: +5000 -0 lines]" in shaped.text
+    assert "[minified file omitted: +1 -0 lines]" in shaped.text
+    assert "@@ -1,0 +1,2000 @@ [hunk omitted: +2000 -0 lines]" in shaped.text
+    assert "+x = 1" in shaped.text
+    assert (shaped.generated, shaped.omitted_hunks) == (2, 1)
+
+
+def test_files_over_budget_become_numstat_summary():
+    lines = [
+        *file_diff("a.py", [f"a_{i} = {i}" for i in range(50)]),
+        *file_diff("b.py", [f"b_{i} = {i}" for i in range(50)]),
+    ]
+
+    shaped = DiffShaper(max_tokens=500).shape(lines)
+
+    assert "+a_49 = 49" in shaped.text
+    assert "+b_0" not in shaped.text
+    assert shaped.text.endswith("50\t0\tb.py")
+    assert shaped.summarized == 1
+    assert shaped.tokens <= 500
+
+
+def test_summarized_files_keep_no_hunk_lines():
+    files, rendered = [], []
+
+    class RecordingFileDiff(diff_shaper._FileDiff):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            files.append(self)
+
+        def render(self):
+            rendered.append(self.path)
+            return super().render()
+
+    lines = [
+        *file_diff("a.py", [f"a_{i} = {i}" for i in range(50)]),
+        *file_diff("b.py", [f"b_{i} = {i}" for i in range(5000)]),
+        *file_diff("c.py", [f"c_{i} = {i}" for i in range(50)]),
+    ]
+    with patch.object(diff_shaper, "_FileDiff", RecordingFileDiff):
+        shaped = DiffShaper(max_tokens=500, max_hunk_tokens=100_000).shape(lines)
+
+    assert shaped.text.endswith("5000\t0\tb.py\n50\t0\tc.py")
+    assert (shaped.summarized, shaped.omitted_hunks) == (2, 2)
+    # Only the file that fit was rendered; the others dropped their lines early
+    assert rendered == ["a.py"]
+    assert [sum(len(hunk.lines) for hunk in f.hunks) for f in files[1:]] == [0, 0]
@@ -0,0 +1,29 @@
+from app.tools.disk_cache import DiskCache
+
+
+def test_disk_cache_round_trip(tmp_path):
+    cache = DiskCache(tmp_path / "cache.sqlite3", max_bytes=1024)
+    cache.set_many([("a", b"1"), ("b", b"22")])
+
+    assert cache.get("a") == b"1"
+    assert cache.get_many(["a", "b", "missing"]) == {"a": b"1", "b": b"22"}
+    assert cache.total_size() == 3
+
+    cache.delete("a")
+    assert cache.get("a") is None
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(tmp_path / "cache.sqlite3", max_bytes=250)
+    cache.set("old", b"x" * 100)
+    cache.set("used", b"y" * 100)
+    cache.get("used")
+    cache.get("old")
+    cache.get("used")
+
+    cache.set("new", b"z" * 100)
+
+    assert cache.get("old") is None
+    assert cache.get("used") == b"y" * 100
+    assert cache.get("new") == b"z" * 100
+    assert cache.total_size() <= 250
@@ -0,0 +1,221 @@
+import subprocess
+import sys
+import time
+from unittest.mock import patch
+
+import pytest
+from typer.testing import CliRunner
+
+from app.adapters.git.git_clone import (
+    CloneJob,
+    CloneOptions,
+    CloneProgress,
+    clone_many,
+    clone_repository,
+    load_manifest,
+    mirror_path,
+    parse_progress,
+    repo_name_from_url,
+    run_with_progress,
+)
+from app.adapters.git.git_commands import GitError
+from app.frameworks.cli import app
+
+
+def git(*args, cwd=None):
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+@pytest.fixture
+def origin(tmp_path):
+    work = tmp_path / "work"
+    work.mkdir()
+    git("init", "-q", cwd=work)
+    git("config", "user.email", "test@example.com", cwd=work)
+    git("config", "user.name", "test", cwd=work)
+    for i, name in enumerate(["docs", "src", "src"]):
+        (work / name).mkdir(exist_ok=True)
+        (work / name / f"file_{i}.txt").write_text(f"{i}\n")
+        (work / "README").write_text(f"v{i}\n")
+        git("add", ".", cwd=work)
+        git("commit", "-qm", f"Commit {i}", cwd=work)
+    bare = tmp_path / "origin.git"
+    git("clone", "-q", "--bare", str(work), str(bare))
+    return f"file://{bare}"
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    with patch("app.adapters.git.git_clone.get_cache_dir", return_value=tmp_path):
+        yield tmp_path
+
+
+def test_parse_progress():
+    assert parse_progress("Receiving objects:  45% (450/1000), 1.20 MiB") == (
+        CloneProgress("Receiving objects", 45, 450, 1000)
+    )
+    assert parse_progress("remote: Counting objects: 100% (3/3), done.") == (
+        CloneProgress("Counting objects", 100, 3, 3)
+    )
+    assert parse_progress("Cloning into 'repo'...") is None
+
+
+def test_repo_name_from_url():
+    assert repo_name_from_url("https://github.com/org/repo.git") == "repo"
+    assert repo_name_from_url("git@github.com:org/repo.git") == "repo"
+    assert repo_name_from_url("file:///tmp/origin.git/") == "origin"
+
+
+def test_run_with_progress_drains_both_pipes():
+    # Far more than a pipe buffer on each stream; reading only one would hang
+    script = (
+        "import sys\n"
+        "for i in range(20000):\n"
+        "    sys.stderr.write(f'Receiving objects: {i % 100}% ({i}/20000)\\r')\n"
+        "    print('x' * 20)\n"
+        "sys.stderr.write('warning: done\\n')\n"
+    )
+    updates = []
+
+    result = run_with_progress([sys.executable, "-c", script], updates.append)
+
+    assert result.returncode == 0
+    assert len(result.stdout.splitlines()) == 20000
+    assert len(updates) == 20000
+    assert updates[-1] == CloneProgress("Receiving objects", 99, 19999, 20000)
+    assert result.stderr == "warning: done"
+
+
+def test_shallow_clone(origin, tmp_path):
+    target = tmp_path / "shallow"
+    updates = []
+
+    clone_repository(origin, target, CloneOptions(depth=1), on_progress=updates.append)
+
+    assert git("rev-list", "--count", "HEAD", cwd=target) == "1"
+    assert (target / "src" / "file_2.txt").exists()
+
+
+def test_sparse_blobless_clone(origin, tmp_path):
+    target = tmp_path / "sparse"
+
+    clone_repository(origin, target, CloneOptions(filter="blob:none", sparse=["docs"]))
+
+    assert (target / "README").exists()
+    assert (target / "docs" / "file_0.txt").exists()
+    assert not (target / "src").exists()
+    assert git("config", "remote.origin.partialclonefilter", cwd=target) == (
+        "blob:none"
+    )
+
+
+def test_clone_through_mirror(origin, tmp_path, cache_dir):
+    first, second = tmp_path / "first", tmp_path / "second"
+
+    clone_repository(origin, first, CloneOptions(mirror=True))
+    mirror = mirror_path(origin)
+    assert (mirror / "HEAD").exists()
+
+    # The mirror is fetched again, and the clone stays independent of it
+    clone_repository(origin, second, CloneOptions(mirror=True))
+    assert not (second / ".git" / "objects" / "info" / "alternates").exists()
+    assert git("rev-parse", "HEAD", cwd=first) == git("rev-parse", "HEAD", cwd=second)
+
+
+def test_clone_many_updates_a_shared_mirror_once_at_a_time(origin, tmp_path, cache_dir):
+    jobs = [
+        CloneJob(origin, tmp_path / "dev" / name, CloneOptions(mirror=True))
+        for name in ("one", "two", "three")
+    ]
+    running, overlaps = [], []
+
+    def run(command, *args, **kwargs):
+        if "--mirror" in command or "--git-dir" in command:
+            running.append(command)
+            overlaps.append(len(running))
+            time.sleep(0.05)
+            try:
+                return run_with_progress(command, *args, **kwargs)
+            finally:
+                running.remove(command)
+        return run_with_progress(command, *args, **kwargs)
+
+    with patch("app.adapters.git.git_clone.run_with_progress", side_effect=run):
+        results = clone_many(jobs, max_workers=3)
+
+    assert [r.status for r in results] == ["cloned", "cloned", "cloned"]
+    # One clone --mirror, then fetches, never two on the same mirror at once
+    assert overlaps == [1, 1, 1]
+
+
+def test_clone_failure_raises(tmp_path, cache_dir):
+    with pytest.raises(GitError, match="clone 중 오류가 발생했습니다"):
+        clone_repository(f"file://{tmp_path}/missing.git", tmp_path / "target")
+
+
+def test_load_manifest(tmp_path):
+    manifest = tmp_path / "repos.yaml"
+    manifest.write_text(
+        "defaults:\n"
+        "  depth: 1\n"
+        "repos:\n"
+        "  - https://example.com/org/a.git\n"
+        "  - url: https://example.com/org/b.git\n"
+        "    path: work/b\n"
+        "    blobless: true\n"
+        "    sparse: docs\n"
+        "  - https://example.com/org/a.git\n"
+    )
+
+    jobs = load_manifest(manifest, tmp_path / "dev", CloneOptions(mirror=True))
+
+    assert [(job.url, job.target) for job in jobs] == [
+        ("https://example.com/org/a.git", tmp_path / "dev" / "a"),
+        ("https://example.com/org/b.git", tmp_path / "dev" / "work" / "b"),
+    ]
+    assert jobs[0].options == CloneOptions(depth=1, mirror=True)
+    assert jobs[1].options == CloneOptions(
+        depth=1, filter="blob:none", sparse=["docs"], mirror=True
+    )
+
+    manifest.write_text("repos:\n  - path: missing-url\n")
+    with pytest.raises(ValueError, match="잘못된 항목"):
+        load_manifest(manifest, tmp_path)
+
+
+def test_clone_many_skips_fetches_and_reports_failures(origin, tmp_path):
+    jobs = [
+        CloneJob(origin, tmp_path / "dev" / "one"),
+        CloneJob(origin, tmp_path / "dev" / "two", CloneOptions(depth=1)),
+        CloneJob(f"file://{tmp_path}/missing.git", tmp_path / "dev" / "bad"),
+    ]
+    done = []
+
+    results = clone_many(jobs, max_workers=3, on_done=done.append)
+
+    assert [r.status for r in results] == ["cloned", "cloned", "failed"]
+    assert "clone 중 오류가 발생했습니다" in (results[2].error or "")
+    assert sorted(r.job.name for r in done) == ["bad", "one", "two"]
+
+    again = clone_many(jobs[:2])
+    assert [r.status for r in again] == ["skipped", "skipped"]
+    fetched = clone_many(jobs[:1], fetch=True)
+    assert [r.status for r in fetched] == ["fetched"]
+
+
+def test_gc_command_opens_editor_once(origin, tmp_path):
+    manifest = tmp_path / "repos.yaml"
+    manifest.write_text(f"- {origin}\n- url: {origin}\n  path: copy\n")
+
+    with patch("app.adapters.git.git_clone.open_file_with_vscode") as open_editor:
+        result = CliRunner().invoke(
+            app, ["gc", "--manifest", str(manifest), "--root", str(tmp_path / "dev")]
+        )
+
+    assert result.exit_code == 0, result.output
+    assert (tmp_path / "dev" / "origin" / "README").exists()
+    assert (tmp_path / "dev" / "copy" / "README").exists()
+    assert "2 cloned" in result.output
+    open_editor.assert_called_once_with(str(tmp_path / "dev"))
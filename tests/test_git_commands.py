@@ -0,0 +1,131 @@
+import os
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from app.adapters.git.git_commands import GitCommands, GitError
+from app.frameworks.logger import setup_logger
+
+
+@pytest.fixture(autouse=True)
+def tree_cache_dir(tmp_path_factory):
+    # Directory trees are cached by default; keep the user's cache out of tests
+    cache_dir = tmp_path_factory.mktemp("cache")
+    with patch("app.adapters.git.git_commands.get_cache_dir", return_value=cache_dir):
+        yield cache_dir
+
+
+@pytest.fixture
+def repo(tmp_path):
+    os.chdir(tmp_path)
+    os.system("git init -q")
+    os.system("git config user.email test@example.com && git config user.name test")
+    (tmp_path / "a.py").write_text("print('a')\n")
+    os.system("git add . && git commit -qm 'Initial commit'")
+    return tmp_path
+
+
+def test_collect_commit_context_runs_staged_diff_once(repo):
+    (repo / "a.py").write_text("print('b')\n")
+    os.system("git add a.py")
+    git = GitCommands(setup_logger(__name__))
+
+    with (
+        patch("subprocess.run", wraps=subprocess.run) as run,
+        patch("subprocess.Popen", wraps=subprocess.Popen) as popen,
+    ):
+        context = git.collect_commit_context(log_count=1)
+
+    commands = [call.args[0][1:3] for call in run.call_args_list + popen.call_args_list]
+    assert commands.count(["diff", "--staged"]) == 1
+    assert "+print('b')" in context.diff
+    assert context.logs[0].startswith("commit ")
+    assert "a.py" in context.tree
+    assert set(context.timings) == {"changes", "staged", "status", "logs", "tree"}
+
+
+def test_collect_commit_context_requires_staged_changes(repo):
+    (repo / "a.py").write_text("print('b')\n")
+    git = GitCommands(setup_logger(__name__))
+
+    with pytest.raises(GitError, match="스테이지된 변경사항이 없습니다"):
+        git.collect_commit_context()
+
+
+def test_cat_file_session_streams_many_objects(repo):
+    with GitCommands(setup_logger(__name__), cwd=repo) as git:
+        batch = git.cat_file()
+        blob, missing = batch.read_many(["HEAD:a.py", "HEAD:missing.py"])
+        info = git.cat_file(check_only=True).read("HEAD:a.py")
+
+        assert blob is not None and blob.data == b"print('a')\n"
+        assert missing is None
+        assert info is not None and info.size == len(b"print('a')\n")
+        assert info.data is None
+
+        # Abandoning a stream mid-way discards the session; the next one is fresh
+        next(batch.read_many(["HEAD:a.py"] * 3))
+        assert not batch.alive
+        assert git.cat_file().read("HEAD").type == "commit"
+
+
+def test_cat_file_session_serves_repeated_reads(repo):
+    with GitCommands(setup_logger(__name__), cwd=repo) as git:
+        batch = git.cat_file()
+        first = batch.read("HEAD:a.py")
+        second = batch.read("HEAD")
+
+        assert first is not None and first.data == b"print('a')\n"
+        assert second is not None and second.type == "commit"
+        assert batch.read("HEAD:missing.py") is None
+        assert batch.alive
+        assert git.cat_file() is batch
+
+
+def test_cat_file_session_rejects_reads_while_streaming(repo):
+    with GitCommands(setup_logger(__name__), cwd=repo) as git:
+        batch = git.cat_file()
+        stream = batch.read_many(["HEAD:a.py", "HEAD"])
+        assert next(stream) is not None
+
+        # The stream holds the session; re-entering it would deadlock
+        with pytest.raises(RuntimeError):
+            batch.read("HEAD")
+        with pytest.raises(RuntimeError):
+            next(batch.read_many(["HEAD"]))
+        assert [obj.type for obj in stream] == ["commit"]
+        assert batch.read("HEAD").type == "commit"
+
+
+def test_directory_tree_is_cached_by_tree_oid(repo):
+    git = GitCommands(setup_logger(__name__))
+
+    first = git.get_directory_tree(depth=2)
+    with patch.object(git, "run_command", wraps=git.run_command) as run:
+        second = git.get_directory_tree(depth=2)
+
+    assert first == second == "└── a.py"
+    assert [call.args[0][0] for call in run.call_args_list] == ["rev-parse"]
+
+
+def test_directory_tree_of_subtrees(repo):
+    for name in ["services/foo/src/app.py", "services/bar/main.py"]:
+        (repo / name).parent.mkdir(parents=True, exist_ok=True)
+        (repo / name).write_text("pass\n")
+    os.system("git add . && git commit -qm 'Add services'")
+    git = GitCommands(setup_logger(__name__))
+
+    tree = git.get_directory_tree(roots=["services/foo", "services/bar/"])
+    # A subtree is cached by its own OID
+    with patch.object(git, "run_command", wraps=git.run_command) as run:
+        assert git.get_directory_tree(roots=["services/foo"]) == (
+            "services/foo/\n└── src/\n    └── app.py"
+        )
+
+    assert tree == (
+        "services/foo/\n└── src/\n    └── app.py\n\nservices/bar/\n└── main.py"
+    )
+    assert [call.args[0][0] for call in run.call_args_list] == ["rev-parse"]
+    with pytest.raises(GitError, match="nope"):
+        git.get_directory_tree(roots=["nope"])
@@ -0,0 +1,86 @@
+import os
+from unittest.mock import patch
+
+import pytest
+from typer.testing import CliRunner
+
+from app.adapters.ai import FakeAI
+from app.frameworks.cli import app
+
+
+@pytest.fixture
+def repo(tmp_path):
+    os.chdir(tmp_path)
+    os.system("git init -q")
+    os.system("git config user.email test@example.com && git config user.name test")
+    (tmp_path / "a.py").write_text("print('a')\n")
+    os.system("git add . && git commit -qm 'Initial commit'")
+    (tmp_path / "a.py").write_text("print('b')\n")
+    os.system("git add a.py")
+    return tmp_path
+
+
+@pytest.fixture
+def ai(tmp_path):
+    module = "app.adapters.git.git_commit_msg_prompt"
+    fake = FakeAI("feat: print b")
+    with (
+        patch(f"{module}.get_cache_dir", return_value=tmp_path / "cache"),
+        patch(
+            "app.adapters.git.git_commands.get_cache_dir",
+            return_value=tmp_path / "cache",
+        ),
+        patch(f"{module}.open_file_with_vscode"),
+        patch(f"{module}.get_ai", return_value=fake),
+    ):
+        (tmp_path / "cache").mkdir()
+        yield fake
+
+
+def test_gp_reuses_message_for_same_staged_changes(repo, ai):
+    runner = CliRunner()
+
+    first = runner.invoke(app, ["gp"])
+    second = runner.invoke(app, ["gp"])
+
+    assert first.exit_code == 0, first.output
+    assert second.exit_code == 0, second.output
+    assert len(ai.prompts) == 1
+    assert "Using the cached commit message" in second.output
+    assert "feat: print b" in second.output
+
+    runner.invoke(app, ["gp", "--refresh"])
+    assert len(ai.prompts) == 2
+
+    # Different staged content is a different key
+    (repo / "a.py").write_text("print('c')\n")
+    os.system("git add a.py")
+    runner.invoke(app, ["gp"])
+    assert len(ai.prompts) == 3
+
+
+def test_gp_cache_key_follows_model_and_prompt_options(repo, ai):
+    runner = CliRunner()
+
+    runner.invoke(app, ["gp"])
+    for args in (["--logs", "2"], ["--depth", "1"], ["--max-diff-tokens", "500"]):
+        result = runner.invoke(app, ["gp", *args])
+        assert "Using the cached commit message" not in result.output, args
+    assert len(ai.prompts) == 4
+
+    with patch.object(FakeAI, "MODEL_NAME", "other-model"):
+        runner.invoke(app, ["gp"])
+    assert len(ai.prompts) == 5
+
+
+def test_gp_closes_cache_when_nothing_is_staged(repo, ai):
+    os.system("git commit -qm 'Change a'")
+
+    with patch(
+        "app.adapters.git.git_commit_msg_prompt._open_message_cache"
+    ) as open_cache:
+        open_cache.return_value.get.return_value = None
+        result = CliRunner().invoke(app, ["gp"])
+
+    assert result.exit_code == 1
+    open_cache.return_value.close.assert_called_once_with()
@@ -0,0 +1,148 @@
+import os
+import subprocess
+import time
+
+import pytest
+
+from app.adapters.base.merge_files import list_snapshot_files, list_tracked_files
+from app.adapters.git.git_commands import GitCommands
+from app.adapters.git.git_index import (
+    INTENT_TO_ADD,
+    UnsupportedIndexError,
+    load_index,
+    read_index,
+)
+from app.frameworks.logger import setup_logger
+
+
+def git(repo, *args):
+    return subprocess.run(
+        ["git", *args], cwd=repo, check=True, capture_output=True
+    ).stdout.decode()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    git(tmp_path, "init", "-q")
+    files = {
+        "a.py": "print('a')\n",
+        "src/b.py": "print('b')\n",
+        "src/deep/c.txt": "c\n",
+        "src/deep/naïve name.txt": "d\n",
+        "tool.sh": "#!/bin/sh\n",
+    }
+    past = time.time() - 60
+    for name, content in files.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+        # Entries written in the same second as the index are racily clean
+        os.utime(path, (past, past))
+    (tmp_path / "tool.sh").chmod(0o755)
+    os.symlink("a.py", tmp_path / "link")
+    os.utime(tmp_path / "link", (past, past), follow_symlinks=False)
+    git(tmp_path, "add", ".")
+    return tmp_path
+
+
+def ls_files_stage(repo):
+    records = git(repo, "ls-files", "-z", "--stage").split("\0")
+    return [
+        (record.split("\t")[1], int(record.split()[0], 8), record.split()[1])
+        for record in records
+        if record
+    ]
+
+
+@pytest.mark.parametrize("version", ["2", "3", "4"])
+def test_read_index_matches_ls_files(repo, version):
+    git(repo, "update-index", "--index-version", version)
+    (repo / "new.py").write_text("new\n")
+    git(repo, "add", "-N", "new.py")
+
+    index = read_index(repo / ".git" / "index")
+
+    assert index.version == max(int(version), 3)
+    assert [(e.path, e.mode, e.oid) for e in index] == ls_files_stage(repo)
+    entry = index[[e.path for e in index].index("src/b.py")]
+    assert entry.size == len("print('b')\n")
+    assert entry.mtime_ns == os.stat(repo / "src" / "b.py").st_mtime_ns
+    assert index[[e.path for e in index].index("new.py")].flags & INTENT_TO_ADD
+
+
+def test_read_index_rejects_unsupported_extensions(repo):
+    git(repo, "update-index", "--split-index")
+
+    with pytest.raises(UnsupportedIndexError):
+        read_index(repo / ".git" / "index")
+    assert load_index(repo) is None
+    # list_tracked_files() falls back to `git ls-files`
+    assert len(list_tracked_files(repo)) == 6
+
+
+def test_list_tracked_files_from_index(repo):
+    (repo / "a.py").write_text("print('changed')\n")
+
+    native = list_tracked_files(repo, blob_ids=True)
+
+    oids = {file.path.as_posix(): file.oid for file in native}
+    staged = {path: oid for path, _mode, oid in ls_files_stage(repo)}
+    assert list(oids) == list(staged)
+    # Modified files get no OID, clean ones get the index's
+    assert oids["a.py"] is None
+    assert oids["src/b.py"] == staged["src/b.py"]
+    assert oids["link"] == staged["link"]
+
+    subdir = list_tracked_files(repo / "src", blob_ids=True)
+    assert [file.path.as_posix() for file in subdir] == [
+        "b.py",
+        "deep/c.txt",
+        "deep/naïve name.txt",
+    ]
+    assert [file.path.as_posix() for file in list_snapshot_files(repo, ":")] == list(
+        staged
+    )
+
+
+def test_list_files_command_uses_index(repo):
+    os.chdir(repo / "src")
+    git_commands = GitCommands(setup_logger(__name__))
+
+    output = git_commands.list_files_command()
+
+    assert output.splitlines() == ["b.py", "deep/c.txt", "deep/naïve name.txt"]
+
+
+def test_prefix_range_selects_subtree(repo):
+    index = read_index(repo / ".git" / "index")
+
+    src = index.prefix_range("src/")
+    assert [index.path(i) for i in src] == [
+        path for path, _mode, _oid in ls_files_stage(repo) if path.startswith("src/")
+    ]
+    assert not index.prefix_range("nope/")
+    assert index.prefix_range("") == range(len(index))
+
+
+@pytest.mark.parametrize("native", [True, False])
+def test_list_files_under_roots(repo, native):
+    (repo / "src-old.py").write_text("old\n")
+    git(repo, "add", ".")
+    # Pathspecs force `git ls-files`
+    pathspecs = None if native else [":(exclude)*.sh"]
+
+    files = list_tracked_files(
+        repo / "src", pathspecs, blob_ids=True, roots=["deep", "b.py"]
+    )
+    assert [file.path.as_posix() for file in files] == [
+        "b.py",
+        "deep/c.txt",
+        "deep/naïve name.txt",
+    ]
+    assert all(file.oid for file in files)
+
+    snapshot = list_snapshot_files(repo, ":", roots=["src/deep"])
+    assert [file.path.as_posix() for file in snapshot] == [
+        "src/deep/c.txt",
+        "src/deep/naïve name.txt",
+    ]
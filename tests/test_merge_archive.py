@@ -0,0 +1,91 @@
+import gzip
+import os
+
+import pytest
+
+from app.adapters.base.merge_archive import MergeArchive, write_merge_archive
+from app.adapters.base.merge_files import iter_merge_parts, merge_files
+
+
+@pytest.fixture
+def repo(tmp_path):
+    (tmp_path / "a.py").write_text("print('a')\n")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "b.txt").write_text("line 1\nline 2\n")
+
+    os.chdir(tmp_path)
+    os.system("git init -q")
+    os.system("git add .")
+    return tmp_path
+
+
+def test_archive_decompresses_to_merged_text(repo, tmp_path_factory):
+    archive = tmp_path_factory.mktemp("out") / "merged.gz"
+
+    index = write_merge_archive(archive, iter_merge_parts(repo, blob_ids=True))
+
+    assert index.name == "merged.gz.index.jsonl"
+    assert gzip.decompress(archive.read_bytes()).decode() == merge_files(repo)
+
+
+def test_archive_reads_single_files(repo, tmp_path_factory):
+    archive = tmp_path_factory.mktemp("out") / "merged.gz"
+    write_merge_archive(archive, iter_merge_parts(repo, blob_ids=True))
+
+    with MergeArchive(archive) as merged:
+        assert [entry.path for entry in merged] == ["a.py", "src/b.txt"]
+        assert merged.read("src/b.txt") == "line 1\nline 2\n"
+        assert merged.entries["a.py"].oid is not None
+        assert merged.read_preamble().startswith("## Directory Structure\n")
+        with pytest.raises(KeyError):
+            merged.read("missing.py")
+
+
+def test_archive_diff_skips_unchanged_blobs(repo, tmp_path_factory):
+    out = tmp_path_factory.mktemp("out")
+    write_merge_archive(out / "old.gz", iter_merge_parts(repo, blob_ids=True))
+    (repo / "src" / "b.txt").write_text("line 1\nline two\n")
+    os.system("git add .")
+    write_merge_archive(out / "new.gz", iter_merge_parts(repo, blob_ids=True))
+
+    with MergeArchive(out / "old.gz") as old, MergeArchive(out / "new.gz") as new:
+        diff = "".join(old.diff(new))
+
+    assert "--- a/src/b.txt" in diff
+    assert "-line 2\n+line two\n" in diff
+    assert "a.py" not in diff
+
+
+def test_archive_diff_compares_truncated_blobs(repo, tmp_path_factory):
+    out = tmp_path_factory.mktemp("out")
+    (repo / "c.txt").write_text("".join(f"line {i}\n" for i in range(2000)))
+    os.system("git add .")
+    parts = iter_merge_parts(repo, blob_ids=True, max_tokens=400)
+    write_merge_archive(out / "old.gz", parts)
+    write_merge_archive(out / "new.gz", iter_merge_parts(repo, blob_ids=True))
+
+    with MergeArchive(out / "old.gz") as old, MergeArchive(out / "new.gz") as new:
+        assert old.entries["c.txt"].truncated
+        assert old.entries["c.txt"].oid == new.entries["c.txt"].oid
+        diff = "".join(old.diff(new))
+
+    # Same blob, but only the old archive kept part of it
+    assert "--- a/c.txt" in diff
+    assert "+line 1999\n" in diff
+    assert "a.py" not in diff
+
+
+def test_archive_round_trips_zstd(repo, tmp_path_factory):
+    zstandard = pytest.importorskip("zstandard")
+    archive = tmp_path_factory.mktemp("out") / "merged.zst"
+
+    write_merge_archive(archive, iter_merge_parts(repo, blob_ids=True), codec="zstd")
+
+    # Frames concatenate like gzip members, so the whole archive is the text
+    with zstandard.ZstdDecompressor().stream_reader(
+        archive.read_bytes(), read_across_frames=True
+    ) as reader:
+        assert reader.read().decode() == merge_files(repo)
+    with MergeArchive(archive) as merged:
+        assert merged.codec == "zstd"
+        assert merged.read("src/b.txt") == "line 1\nline 2\n"
@@ -1,4 +1,7 @@
+import io
 import os
+import subprocess
+import sys
 import tempfile
 from pathlib import Path
 from unittest.mock import patch
@@ -6,13 +9,30 @@ from unittest.mock import patch
 import pytest
 from typer.testing import CliRunner
 
-from app.adapters.base.merge_files import add_merge_files
+from app.adapters.base import merge_files as merge_files_module
+from app.adapters.base import merge_ingest
+from app.adapters.base.merge_files import (
+    add_merge_files,
+    iter_merge_sections,
+    list_tracked_files,
+    merge_files,
+    write_merged_files,
+)
 from app.frameworks.cli import app
+from app.tools.disk_cache import DiskCache
 
 pytest_plugins = ["pytest_logging"]
 
 runner = CliRunner()
 
+
+@pytest.fixture(autouse=True)
+def merge_cache_dir(tmp_path_factory):
+    # `h m` caches contents by default; keep the user's cache out of tests
+    cache_dir = tmp_path_factory.mktemp("cache")
+    with patch("app.adapters.base.merge_cache.get_cache_dir", return_value=cache_dir):
+        yield cache_dir
+
 @pytest.fixture
 def setup_test_files(tmp_path):
     # Create test files
@@ -26,7 +46,10 @@ def setup_test_files(tmp_path):
     os.chdir(tmp_path)
     os.system("git init")
     os.system("git add .")
-    os.system("git commit -m 'Initial commit'")
+    os.system(
+        "git -c user.name=test -c user.email=test@example.com"
+        " commit -m 'Initial commit'"
+    )
     
     return tmp_path, file1, file2
 
@@ -101,4 +124,165 @@ def test_merge_files_with_invalid_files(setup_test_files, caplog):
     # Check logs for warning message
     caplog.clear()
     result = runner.invoke(app, ["m", "--file", str(invalid_file)])
-    assert any("File not found, skipping" in record.message for record in caplog.records)
\ No newline at end of file
+    assert any("File not found, skipping" in record.message for record in caplog.records)
+
+
+def test_merge_files_streams_same_content_as_string_api(setup_test_files):
+    tmp_path, _, _ = setup_test_files
+
+    merged = merge_files(tmp_path, char_count=True)
+
+    buffer = io.StringIO()
+    written = write_merged_files(buffer, iter_merge_sections(tmp_path, char_count=True))
+
+    assert buffer.getvalue() == merged
+    assert written == len(merged)
+    assert "## File: [14 chars] file1.txt\nFile 1 content\n" in merged
+
+
+def test_merge_files_to_stdout(setup_test_files):
+    tmp_path, _, _ = setup_test_files
+
+    result = runner.invoke(app, ["m", "--dir", str(tmp_path), "--output", "-"])
+
+    assert result.exit_code == 0
+    assert "Merged Files" in result.output
+    assert "## File: file2.py\nFile 2 content\n" in result.output
+
+
+def test_merge_files_to_stdout_keeps_logs_out(setup_test_files):
+    tmp_path, file1, _ = setup_test_files
+    args = ["m", "--dir", str(tmp_path), "--no-cache", "-i", "*.py", "-f", str(file1)]
+    args += ["-o", "-"]
+
+    # A real process, since CliRunner doesn't capture the logging stream
+    result = subprocess.run(
+        [sys.executable, "-c", "from app.frameworks.cli import app; app()", *args],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": str(Path(__file__).parents[1])},
+    )
+
+    assert result.returncode == 0
+    assert result.stdout.startswith("\n\n\n----------Merged Files")
+    assert result.stdout.endswith("## File: file2.py\nFile 2 content\n")
+    assert "Skipping additional file" in result.stderr
+
+
+def test_merge_files_output_file_matches_text_output(setup_test_files):
+    tmp_path, _, _ = setup_test_files
+    (tmp_path / "large.py").write_text("print('large file')\n" * 100_000)
+    os.system("git add .")
+    output = tmp_path.parent / "merged.txt"
+
+    result = runner.invoke(
+        app, ["m", "--dir", str(tmp_path), "--no-cache", "-c", "-o", str(output)]
+    )
+    stdout = runner.invoke(
+        app, ["m", "--dir", str(tmp_path), "--no-cache", "-c", "-o", "-"]
+    )
+
+    assert result.exit_code == 0
+    assert output.read_text(encoding="utf-8") in stdout.output
+    assert "## File: [2000000 chars] large.py\n" in output.read_text()
+
+
+
+def test_merge_command_reads_the_index_natively(setup_test_files):
+    tmp_path, _, _ = setup_test_files
+    output = tmp_path.parent / "merged.txt"
+    module = "app.adapters.base.merge_files"
+
+    with (
+        patch(f"{module}.load_index", wraps=merge_files_module.load_index) as load,
+        patch(f"{module}._git_ls_files") as ls_files,
+    ):
+        result = runner.invoke(
+            app, ["m", "--dir", str(tmp_path), "-e", "*.txt", "-o", str(output)]
+        )
+
+    assert result.exit_code == 0, result.output
+    # Listed with blob OIDs from .git/index; no `git ls-files` is spawned
+    load.assert_called_once_with(tmp_path)
+    ls_files.assert_not_called()
+    merged = output.read_text()
+    assert "## File: file2.py\nFile 2 content\n" in merged
+    assert "file1.txt" not in merged
+
+def test_merge_files_reuses_cached_blobs(setup_test_files):
+    tmp_path, file1, _ = setup_test_files
+    cache = DiskCache(tmp_path.parent / "merge-cache.sqlite3", max_bytes=1 << 20)
+
+    first = merge_files(tmp_path, cache=cache, char_count=True)
+    file1.write_text("File 1 changed")
+
+    with patch(
+        "app.adapters.base.merge_ingest.read_text", wraps=merge_ingest.read_text
+    ) as read_text:
+        second = merge_files(tmp_path, cache=cache, char_count=True)
+
+    assert [call.args[0].name for call in read_text.call_args_list] == ["file1.txt"]
+    assert "File 1 changed" in second
+    assert second.replace("File 1 changed", "File 1 content") == first
+
+
+def test_merge_files_lets_git_filter_excluded_and_binary_files(setup_test_files):
+    tmp_path, _, _ = setup_test_files
+    (tmp_path / "build").mkdir()
+    (tmp_path / "build" / "out.py").write_text("generated")
+    (tmp_path / "image.dat").write_bytes(b"\x89PNG\x00\x00")
+    (tmp_path / "tab\tname.txt").write_text("tabbed")
+    os.system("git add .")
+
+    tracked = list_tracked_files(tmp_path, classify=True)
+    assert {file.path.name: file.binary for file in tracked}["image.dat"] is True
+
+    with patch(
+        "app.adapters.base.merge_ingest.read_text", wraps=merge_ingest.read_text
+    ) as read_text:
+        merged = merge_files(tmp_path, exclude_patterns=["build/"], jobs=1)
+
+    opened = sorted(call.args[0].name for call in read_text.call_args_list)
+    assert opened == ["file1.txt", "file2.py", "tab\tname.txt"]
+    assert "## File: tab\tname.txt\ntabbed\n" in merged
+    assert "generated" not in merged
+
+
+def test_merge_files_with_cache_checks_only_misses(setup_test_files):
+    tmp_path, _, _ = setup_test_files
+    cache = DiskCache(tmp_path.parent / "filter-cache.sqlite3", max_bytes=1 << 20)
+    (tmp_path / "build").mkdir()
+    (tmp_path / "build" / "out.py").write_text("generated")
+    (tmp_path / "image.dat").write_bytes(b"\x89PNG\x00\x00")
+    # Older than the index, so git's racy-clean check trusts its stat data
+    os.utime(tmp_path / "image.dat", (1_000_000_000, 1_000_000_000))
+    os.system("git add .")
+    uncached = merge_files(tmp_path, exclude_patterns=["build/"], jobs=1)
+
+    opened = []
+    for _ in range(2):
+        with patch(
+            "app.adapters.base.merge_ingest.read_text", wraps=merge_ingest.read_text
+        ) as read_text:
+            merged = merge_files(
+                tmp_path, exclude_patterns=["build/"], jobs=1, cache=cache
+            )
+        opened.append(sorted(call.args[0].name for call in read_text.call_args_list))
+        assert merged == uncached
+
+    # Excluded files are filtered in Python; the binary check runs on misses only
+    assert opened == [["file1.txt", "file2.py", "image.dat"], []]
+
+
+def test_merge_files_from_revision_and_index(setup_test_files):
+    tmp_path, file1, _ = setup_test_files
+    committed = merge_files(tmp_path)
+    file1.write_text("File 1 staged")
+    os.system("git add file1.txt")
+    file1.write_text("File 1 unstaged")
+
+    assert merge_files(tmp_path, rev="HEAD") == committed
+    assert "File 1 staged" in merge_files(tmp_path, rev=":")
+    assert "File 1 unstaged" in merge_files(tmp_path)
+    with pytest.raises(ValueError):
+        merge_files(tmp_path, rev="no-such-ref")
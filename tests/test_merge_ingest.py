@@ -0,0 +1,104 @@
+from pathlib import Path
+from unittest.mock import patch
+
+from app.adapters.base.merge_ingest import (
+    SpillBuffer,
+    content_range,
+    ingest_file,
+    ingest_files,
+    read_content,
+)
+from app.adapters.base.merge_writer import ByteRange, write_merged_bytes
+
+
+def test_ingest_file_reads_once_and_normalizes_newlines(tmp_path):
+    path = tmp_path / "crlf.txt"
+    path.write_bytes("héllo\r\nworld\r".encode("utf-8"))
+
+    with SpillBuffer() as spill, patch("builtins.open", wraps=open) as mocked_open:
+        entry = ingest_file(Path("crlf.txt"), path, spill)
+        assert mocked_open.call_count == 1
+        assert spill.read(entry.offset, entry.length) == "héllo\nworld\n"
+
+    assert entry.mergeable
+    assert entry.char_count == len("héllo\nworld\n")
+
+
+def test_ingest_file_classifies_binary_and_undecodable(tmp_path):
+    binary = tmp_path / "blob.bin"
+    binary.write_bytes(b"abc\x00def")
+    latin1 = tmp_path / "latin1.txt"
+    latin1.write_bytes("café".encode("latin-1"))
+
+    with SpillBuffer() as spill:
+        binary_entry = ingest_file(Path("blob.bin"), binary, spill)
+        latin1_entry = ingest_file(Path("latin1.txt"), latin1, spill)
+        missing_entry = ingest_file(Path("gone.txt"), tmp_path / "gone.txt", spill)
+
+    assert binary_entry.binary
+    assert missing_entry.binary
+    assert not latin1_entry.binary
+    assert latin1_entry.error is not None
+    assert not latin1_entry.mergeable
+
+
+def test_ingest_files_keeps_input_order_with_threads(tmp_path):
+    files = []
+    for i in range(50):
+        path = tmp_path / f"f{i}.txt"
+        path.write_text(f"content {i}")
+        files.append((Path(path.name), path))
+
+    with SpillBuffer() as spill:
+        entries = list(ingest_files(files, spill, jobs=8))
+        contents = [spill.read(e.offset, e.length) for e in entries]
+
+    assert [e.path for e in entries] == [path for path, _ in files]
+    assert contents == [f"content {i}" for i in range(50)]
+
+
+def test_large_utf8_files_are_referenced_on_disk(tmp_path):
+    plain = tmp_path / "big.txt"
+    plain.write_bytes("한글 text\n".encode("utf-8") * 1000)
+    crlf = tmp_path / "crlf.txt"
+    crlf.write_bytes(b"line\r\n" * 1000)
+
+    with SpillBuffer() as spill:
+        plain_entry, crlf_entry = ingest_files(
+            [(Path("big.txt"), plain), (Path("crlf.txt"), crlf)],
+            spill,
+            jobs=1,
+            raw_min_bytes=1024,
+        )
+
+        assert plain_entry.source == plain
+        assert plain_entry.char_count == len("한글 text\n") * 1000
+        assert content_range(plain_entry, spill) == ByteRange(
+            plain, 0, plain.stat().st_size
+        )
+        assert read_content(plain_entry, spill) == plain.read_text(encoding="utf-8")
+
+        # CRs need translating, so the file is decoded into the spill buffer
+        assert crlf_entry.source is None
+        assert read_content(crlf_entry, spill) == "line\n" * 1000
+
+
+def test_write_merged_bytes_matches_text_output(tmp_path):
+    source = tmp_path / "source.txt"
+    source.write_bytes("ünïcode\n".encode("utf-8") * 5000)
+
+    with SpillBuffer(max_memory=16) as spill:
+        offset, length = spill.append("spilled to disk ✓")
+        chunks = [
+            "head\n",
+            ByteRange(source, 0, source.stat().st_size),
+            spill.byte_range(offset, length),
+            "\n",
+        ]
+        out_path = tmp_path / "out.txt"
+        with open(out_path, "wb") as out:
+            written = write_merged_bytes(out, chunks)
+
+    expected = "head\n" + source.read_text(encoding="utf-8") + "spilled to disk ✓\n"
+    assert out_path.read_bytes() == expected.encode("utf-8")
+    assert written == len(expected.encode("utf-8"))
@@ -0,0 +1,122 @@
+import subprocess
+
+import pytest
+
+from app.adapters.base.merge_files import merge_files
+from app.adapters.base.merge_scope import ChangeScope, module_name
+
+
+def git(repo, *args):
+    subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    git(tmp_path, "init", "-q", "-b", "main")
+    git(tmp_path, "config", "user.email", "test@example.com")
+    git(tmp_path, "config", "user.name", "test")
+    for name in [
+        "app/models.py",
+        "app/views.py",
+        "app/__init__.py",
+        "lib/util.py",
+        "tests/test_views.py",
+        "tests/test_util.py",
+        "tests/__init__.py",
+    ]:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"# {name}\n")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-qm", "Initial commit")
+    git(tmp_path, "checkout", "-qb", "feature")
+    return tmp_path
+
+
+def merged_paths(merged):
+    return [
+        line.removeprefix("## File: ")
+        for line in merged.splitlines()
+        if line.startswith("## File: ")
+    ]
+
+
+def test_module_name():
+    assert module_name("src/foo.py") == "foo"
+    assert module_name("tests/test_foo.py") == "foo"
+    assert module_name("pkg/foo_test.go") == "foo"
+    assert module_name("web/Foo.spec.ts") == "foo"
+    assert module_name("latest.py") == "latest"
+
+
+def test_since_selects_branch_changes(repo):
+    (repo / "app/views.py").write_text("# changed\n")
+    (repo / "lib/util.py").unlink()
+    git(repo, "commit", "-qam", "Change views, remove util")
+    # Uncommitted edits are not part of main...HEAD
+    (repo / "app/models.py").write_text("# dirty\n")
+
+    merged = merge_files(repo, changes=ChangeScope(since="main"))
+
+    assert merged_paths(merged) == ["app/views.py"]
+
+
+def test_staged_and_unstaged(repo):
+    (repo / "app/views.py").write_text("# staged\n")
+    git(repo, "add", "app/views.py")
+    (repo / "lib/util.py").write_text("# unstaged\n")
+
+    assert merged_paths(merge_files(repo, changes=ChangeScope(staged=True))) == [
+        "app/views.py"
+    ]
+    assert merged_paths(merge_files(repo, changes=ChangeScope(unstaged=True))) == [
+        "lib/util.py"
+    ]
+    both = ChangeScope(staged=True, unstaged=True)
+    assert set(merged_paths(merge_files(repo, changes=both))) == {
+        "app/views.py",
+        "lib/util.py",
+    }
+
+
+def test_related_files(repo):
+    (repo / "app/views.py").write_text("# staged\n")
+    git(repo, "add", ".")
+
+    by_name = ChangeScope(staged=True, related=("name",))
+    assert set(merged_paths(merge_files(repo, changes=by_name))) == {
+        "app/views.py",
+        "tests/test_views.py",
+    }
+    by_dir = ChangeScope(staged=True, related=("dir",))
+    assert set(merged_paths(merge_files(repo, changes=by_dir))) == {
+        "app/__init__.py",
+        "app/models.py",
+        "app/views.py",
+    }
+
+
+def test_unknown_since_raises(repo):
+    with pytest.raises(ValueError, match="Can't list changes"):
+        merge_files(repo, changes=ChangeScope(since="no-such-branch"))
+
+
+def test_roots_restrict_merge(repo):
+    merged = merge_files(repo, roots=["app", str(repo / "tests/test_util.py")])
+    assert merged_paths(merged) == [
+        "app/__init__.py",
+        "app/models.py",
+        "app/views.py",
+        "tests/test_util.py",
+    ]
+
+    (repo / "app/views.py").write_text("# staged\n")
+    (repo / "lib/util.py").write_text("# staged\n")
+    git(repo, "add", ".")
+    scoped = ChangeScope(staged=True, related=("name",))
+    assert merged_paths(merge_files(repo, changes=scoped, roots=["lib"])) == [
+        "lib/util.py"
+    ]
+
+    with pytest.raises(ValueError, match="outside"):
+        merge_files(repo, roots=[".."])
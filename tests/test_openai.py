@@ -0,0 +1,191 @@
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from app.adapters.ai.openai import BACKOFF_BASE, OpenAIAI, OpenAIError
+
+
+def completion(text):
+    return {"choices": [{"message": {"role": "assistant", "content": text}}]}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append((self.path, dict(self.headers), body))
+        self.server.ports.append(self.client_address[1])
+        status, headers, payload = (
+            self.server.script.pop(0) if self.server.script else (200, {}, None)
+        )
+        if payload is None:
+            payload = completion("hello")
+        data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        if headers.pop("X-Drop", None) is not None:
+            # Close without telling the client, like an idle keep-alive timeout
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.daemon_threads = True
+    httpd.script, httpd.requests, httpd.ports = [], [], []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def sleeps():
+    with patch("app.adapters.ai.openai.time.sleep") as sleep:
+        yield sleep
+
+
+def make_ai(server, **kwargs):
+    host, port = server.server_address
+    return OpenAIAI(
+        "sk-test", model="test-model", base_url=f"http://{host}:{port}/v1", **kwargs
+    )
+
+
+def test_generate_text_reuses_connection(server):
+    ai = make_ai(server)
+
+    assert ai.generate_text("hi", temperature=0) == "hello"
+    assert ai.generate_text("again") == "hello"
+
+    path, headers, body = server.requests[0]
+    assert path == "/v1/chat/completions"
+    assert headers["Authorization"] == "Bearer sk-test"
+    assert body == {
+        "model": "test-model",
+        "messages": [{"role": "user", "content": "hi"}],
+        "temperature": 0,
+    }
+    assert ai.pool.created == 1
+    assert len(set(server.ports)) == 1
+
+
+def test_stream_text_parses_server_sent_events(server):
+    events = [{"choices": [{"delta": {"content": part}}]} for part in ["Hel", "lo"]]
+    sse = "".join(f"data: {json.dumps(event)}\n\n" for event in events)
+    server.script.append(
+        (
+            200,
+            {"Content-Type": "text/event-stream"},
+            (sse + "data: [DONE]\n\n").encode(),
+        )
+    )
+    ai = make_ai(server)
+
+    assert list(ai.stream_text("hi")) == ["Hel", "lo"]
+    assert server.requests[0][2]["stream"] is True
+    # The drained stream leaves the connection reusable
+    assert ai.generate_text("again") == "hello"
+    assert ai.pool.created == 1
+
+
+def test_retries_honour_retry_after(server, sleeps):
+    server.script += [
+        (503, {"Retry-After": "7"}, {"error": {"message": "overloaded"}}),
+        (429, {}, {"error": {"message": "slow down"}}),
+    ]
+    ai = make_ai(server)
+
+    assert ai.generate_text("hi") == "hello"
+    assert len(server.requests) == 3
+    first, second = [call.args[0] for call in sleeps.call_args_list]
+    assert first == 7
+    assert 0 <= second <= BACKOFF_BASE * 2
+
+
+def test_errors_are_raised(server, sleeps):
+    server.script.append((400, {}, {"error": {"message": "bad model"}}))
+    ai = make_ai(server, max_retries=2)
+
+    with pytest.raises(OpenAIError, match="bad model") as error:
+        ai.generate_text("hi")
+    assert error.value.status == 400
+    assert len(server.requests) == 1
+
+    server.script += [(500, {}, b"oops")] * 3
+    with pytest.raises(OpenAIError, match="500: oops"):
+        ai.generate_text("hi")
+    assert len(server.requests) == 4
+
+
+def test_stale_connection_is_replaced(server):
+    server.script.append((200, {"X-Drop": "1"}, None))
+    ai = make_ai(server, max_retries=0)
+
+    assert ai.generate_text("hi") == "hello"
+    assert ai.generate_text("again") == "hello"
+    assert ai.pool.created == 2
+
+
+def test_unreachable_server_is_retried(sleeps):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    ai = OpenAIAI(None, base_url=f"http://127.0.0.1:{port}/v1", max_retries=2)
+
+    with pytest.raises(OpenAIError, match="failed"):
+        ai.generate_text("hi")
+    assert sleeps.call_count == 2
+
+
+def test_malformed_response_is_retried(sleeps):
+    # A server that answers every connection with something other than HTTP
+    listener = socket.create_server(("127.0.0.1", 0))
+
+    def serve():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            with conn:
+                conn.recv(65536)
+                conn.sendall(b"garbage\r\n\r\n")
+
+    threading.Thread(target=serve, daemon=True).start()
+    port = listener.getsockname()[1]
+    ai = OpenAIAI(None, base_url=f"http://127.0.0.1:{port}/v1", max_retries=2)
+
+    try:
+        with pytest.raises(OpenAIError, match="failed"):
+            ai.generate_text("hi")
+    finally:
+        listener.close()
+    assert sleeps.call_count == 2
+
+
+def test_chat_session_sends_message_history(server):
+    sse = f"data: {json.dumps({'choices': [{'delta': {'content': 'one'}}]})}\n\n"
+    server.script += [(200, {}, sse.encode()), (200, {}, sse.encode())]
+    session = make_ai(server).start_chat()
+
+    assert "".join(session.send("first")) == "one"
+    assert "".join(session.send("second")) == "one"
+    assert server.requests[1][2]["messages"] == [
+        {"role": "user", "content": "first"},
+        {"role": "assistant", "content": "one"},
+        {"role": "user", "content": "second"},
+    ]
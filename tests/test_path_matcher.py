@@ -0,0 +1,63 @@
+import pytest
+
+from app.tools.path_matcher import PathMatcher
+
+
+@pytest.mark.parametrize(
+    "pattern, path, expected",
+    [
+        ("*.py", "a/b/c.py", True),
+        ("*.py", "c.pyc", False),
+        ("build", "x/build/y.txt", True),
+        ("build", "xbuild/y", False),
+        ("dist/", "dist", False),
+        ("dist/", "a/dist/x", True),
+        ("/setup.py", "setup.py", True),
+        ("/setup.py", "a/setup.py", False),
+        ("docs/*.rst", "docs/a.rst", True),
+        ("docs/*.rst", "docs/x/a.rst", False),
+        ("docs/*.rst", "x/docs/a.rst", False),
+        ("**/tests/**", "a/tests/b/c.py", True),
+        ("a/**/b", "a/b", True),
+        ("a/**/b", "a/x/y/b/z", True),
+        ("src/app", "src/app/x.py", True),
+        ("src/app", "src/apps/x.py", False),
+        ("*.egg-info", "foo.egg-info/PKG-INFO", True),
+        ("te?t_*.py", "a/test_x.py", True),
+        ("[!ab].txt", "a.txt", False),
+        ("\\#notes", "a/#notes", True),
+        ("\\#notes", "a/\\#notes", False),
+        ("\\!keep.txt", "!keep.txt", True),
+        ("a\\*b", "a*b", True),
+        ("a\\*b", "axb", False),
+    ],
+)
+def test_path_matcher_gitignore_semantics(pattern, path, expected):
+    assert PathMatcher([pattern]).matches(path) is expected
+
+
+def test_path_matcher_combines_patterns():
+    matcher = PathMatcher(["node_modules", "*.lock", "/docs/", "**/gen/*.ts", ""])
+
+    assert matcher.matches("web/node_modules/x/index.js")
+    assert matcher.matches("uv.lock")
+    assert matcher.matches("docs/index.md")
+    assert matcher.matches("a/gen/api.ts")
+    assert not matcher.matches("src/docs/index.md")
+    assert not matcher.matches("src/main.py")
+    assert not PathMatcher([])
+
+
+def test_path_matcher_git_pathspecs():
+    assert PathMatcher(["build/", "*.md", "/docs"]).to_git_pathspecs(exclude=True) == [
+        ":(exclude,glob)**/build/**",
+        ":(exclude,glob)**/*.md",
+        ":(exclude,glob)**/*.md/**",
+        ":(exclude,glob)docs",
+        ":(exclude,glob)docs/**",
+    ]
+    assert PathMatcher(["a\\*b", "*.py"]).to_git_pathspecs(exclude=True) == [
+        ":(exclude,glob)**/*.py",
+        ":(exclude,glob)**/*.py/**",
+    ]
+    assert PathMatcher(["a\\*b"]).to_git_pathspecs() is None
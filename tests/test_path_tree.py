@@ -0,0 +1,76 @@
+import pytest
+
+from app.tools.path_tree import PathTree, _format_size
+
+
+def make_tree():
+    tree = PathTree()
+    for path, size in [
+        ("README.md", 100),
+        ("src/app/main.py", 2048),
+        ("src/app/util.py", 1024),
+        ("src/lib/deep/er/x.py", 10),
+        ("vendor/a.js", 1),
+        ("vendor/b.js", 1),
+        ("vendor/c.js", 1),
+    ]:
+        tree.add(path, size)
+    return tree
+
+
+def test_render_limits_depth_and_lists_directories_first():
+    assert make_tree().render(depth=2) == "\n".join(
+        [
+            "├── src/",
+            "│   ├── app/ (2 files)",
+            "│   └── lib/ (1 file)",
+            "├── vendor/",
+            "│   ├── a.js",
+            "│   ├── b.js",
+            "│   └── c.js",
+            "└── README.md",
+        ]
+    )
+
+
+def test_render_collapses_large_directories_and_shows_sizes():
+    rendered = make_tree().render(depth=3, max_entries=2, sizes=True)
+
+    assert "├── vendor/ (3 files, 3 B)" in rendered
+    assert "│   ├── app/ (3.0 KB)" in rendered
+    assert "│   │   ├── main.py (2.0 KB)" in rendered
+    assert "a.js" not in rendered
+    assert len(make_tree()) == 7
+
+
+def test_render_caps_top_level_entries():
+    tree = PathTree()
+    for i in range(5):
+        tree.add(f"pkg{i}/main.py", 1024)
+    tree.add("README.md", 1)
+
+    assert tree.render(depth=1, max_entries=3, sizes=True) == "\n".join(
+        [
+            "├── pkg0/ (1 file, 1.0 KB)",
+            "├── pkg1/ (1 file, 1.0 KB)",
+            "├── pkg2/ (1 file, 1.0 KB)",
+            "└── ... 3 more entries (3 files, 2.0 KB)",
+        ]
+    )
+
+
+def test_add_rejects_paths_below_files():
+    tree = PathTree()
+    tree.add("a.py")
+
+    with pytest.raises(ValueError, match="below a file"):
+        tree.add("a.py/b.py")
+
+
+def test_format_size_units():
+    assert [_format_size(size) for size in (0, 1536, 3 * 2**20, 5 * 2**40)] == [
+        "0 B",
+        "1.5 KB",
+        "3.0 MB",
+        "5120.0 GB",
+    ]
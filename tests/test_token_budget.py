@@ -0,0 +1,58 @@
+import os
+from pathlib import Path
+
+from app.adapters.base.merge_budget import plan_budget, truncate_content
+from app.adapters.base.merge_files import merge_files
+from app.adapters.base.merge_ingest import SpillBuffer, ingest_file
+from app.tools.token_estimator import estimate_tokens
+
+
+def test_estimate_tokens_is_close_to_word_count():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("def add(a, b):\n    return a + b\n") == 14
+    assert estimate_tokens("x" * 60) == 10
+    assert estimate_tokens("안녕하세요") == 5
+
+
+def test_plan_budget_prefers_priority_then_small_files(tmp_path):
+    sizes = {"big.py": 400, "small.py": 10, "core.py": 150}
+    with SpillBuffer() as spill:
+        entries = []
+        for name, words in sizes.items():
+            path = tmp_path / name
+            path.write_text("word\n" * words)
+            entries.append(ingest_file(Path(name), path, spill))
+
+        decisions = plan_budget(
+            entries, spill, max_tokens=600, priority_patterns=["core.py"]
+        )
+        big = decisions[0]
+        truncated = truncate_content(
+            spill.read(entries[0].offset, entries[0].length), big
+        )
+
+    assert not decisions[2].truncated and not decisions[2].omitted
+    assert not decisions[1].truncated and not decisions[1].omitted
+    assert big.truncated
+    assert "[truncated:" in truncated
+    assert estimate_tokens(truncated) < 600 - 300
+
+
+def test_merge_files_annotates_omitted_files(tmp_path):
+    (tmp_path / "a.txt").write_text("alpha " * 10)
+    (tmp_path / "b.txt").write_text("beta " * 4000)
+    (tmp_path / "c.txt").write_text("gamma " * 5000)
+    (tmp_path / "d.txt").write_text("delta " * 5000)
+    extra = tmp_path.parent / f"{tmp_path.name}-extra.txt"
+    extra.write_text("extra " * 10)
+    for command in ("git init -q", "git add ."):
+        assert os.system(f"cd {tmp_path} && {command}") == 0
+
+    merged = merge_files(tmp_path, additional_files=[extra], max_tokens=5300)
+
+    assert "a.txt\nb.txt\n" in merged
+    assert "c.txt [truncated: ~5009 tokens]" in merged
+    assert "d.txt [omitted: ~5009 tokens]" in merged
+    assert "## File: d.txt" not in merged
+    assert "extra extra" in merged
+    assert estimate_tokens(merged) <= 5300